@@ -7,6 +7,8 @@ from . import scan_manager
 from . import profile_manager
 from . import result_parser
 from . import event_bus
+from . import history_store
+from . import scope_manager
 from . import app_loader
 
 __all__ = [
@@ -15,5 +17,7 @@ __all__ = [
     'profile_manager', 
     'result_parser',
     'event_bus',
+    'history_store',
+    'scope_manager',
     'app_loader'
 ]
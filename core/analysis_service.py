@@ -0,0 +1,185 @@
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Dict, Optional, Tuple
+
+from core.event_bus import EventBus
+from core.event_dispatch import DeliveryMode
+from shared.constants import ANALYSIS_SNAPSHOT_LIMIT
+from shared.models.result_analysis import ResultAnalysis, ServiceStat
+from shared.models.scan_result import ScanResult
+from shared.utils.cve_checker import CVEChecker
+from shared.utils.findings import FindingsCache
+from shared.utils.risk import (assess_port_risk, has_vulnerable_scripts, has_high_risk_scripts,
+                               find_potential_vulnerabilities)
+
+def analyze_result(result: ScanResult, findings: FindingsCache) -> ResultAnalysis:
+    """Считает статистику, гистограмму сервисов, находки и уровни риска одним проходом по хостам"""
+    # Версию фиксируем до прохода: хосты, дописанные во время подсчета, придут следующей версией
+    version = result.version
+    active_hosts = 0
+    open_ports = 0
+    os_detected = 0
+    service_count: Dict[str, int] = {}
+    service_ports: Dict[str, set] = {}
+    findings_per_host: Dict[str, int] = {}
+    risk_levels: Dict[Tuple[str, str, int], str] = {}
+    risk_counts = {"LOW": 0, "MEDIUM": 0, "HIGH": 0}
+
+    for host in result.hosts:
+        if host.state == "up":
+            active_hosts += 1
+        if host.os_family:
+            os_detected += 1
+        findings_per_host[host.ip] = len(findings.get(host))
+
+        vulnerable_scripts = has_vulnerable_scripts(host)
+        high_risk_scripts = has_high_risk_scripts(host)
+        for port in host.ports:
+            if port.state != "open":
+                continue
+            open_ports += 1
+            if port.service and port.service != "unknown":
+                service_count[port.service] = service_count.get(port.service, 0) + 1
+                service_ports.setdefault(port.service, set()).add(port.port)
+            risk = assess_port_risk(port, vulnerable_scripts, high_risk_scripts)
+            risk_levels[(host.ip, port.protocol, port.port)] = risk
+            risk_counts[risk] += 1
+
+    services = tuple(
+        ServiceStat(service, count, tuple(sorted(service_ports[service])))
+        for service, count in sorted(service_count.items(), key=lambda item: item[1], reverse=True)
+    )
+    potential = tuple(MappingProxyType(vuln) for vuln in find_potential_vulnerabilities(result.hosts))
+
+    return ResultAnalysis(
+        scan_id=result.scan_id,
+        version=version,
+        total_hosts=len(result.hosts),
+        active_hosts=active_hosts,
+        open_ports=open_ports,
+        os_detected=os_detected,
+        services=services,
+        findings_per_host=MappingProxyType(findings_per_host),
+        vulnerability_total=sum(findings_per_host.values()),
+        potential_vulnerabilities=potential,
+        risk_levels=MappingProxyType(risk_levels),
+        risk_counts=MappingProxyType(risk_counts)
+    )
+
+class AnalysisService:
+    """
+    Сервис анализа результатов в отдельном потоке.
+
+    На каждое results_updated/scan_completed результат ставится в очередь;
+    поток считает ResultAnalysis один раз на версию результата и публикует
+    неизменяемый снимок через EventBus.analysis_ready. Пока результат ждет
+    обработки, более новая версия того же сканирования заменяет его в очереди.
+    Вкладки берут готовый снимок через get_analysis вместо собственных
+    подсчетов в GUI потоке.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls, event_bus: EventBus):
+        if cls._instance is None:
+            cls._instance = AnalysisService(event_bus)
+        return cls._instance
+
+    def __init__(self, event_bus: EventBus):
+        self.event_bus = event_bus
+        self.logger = self._setup_logging()
+        # Находки по хостам общие для сервиса и вкладок
+        self.findings = FindingsCache(CVEChecker())
+
+        self._lock = threading.Condition()
+        self._pending: "OrderedDict[str, ScanResult]" = OrderedDict()
+        # scan_id -> (слабая ссылка на результат, снимок)
+        self._snapshots: "OrderedDict[str, Tuple[weakref.ref, ResultAnalysis]]" = OrderedDict()
+        self._stopped = False
+
+        # submit только ставит результат в очередь, поэтому вызывается прямо в потоке эмиттера
+        self.event_bus.connect_signal('results_updated', self._on_results, DeliveryMode.DIRECT)
+        self.event_bus.connect_signal('scan_completed', self._on_results, DeliveryMode.DIRECT)
+
+        self._thread = threading.Thread(target=self._run, daemon=True, name="result-analysis")
+        self._thread.start()
+
+    def _setup_logging(self):
+        """Настройка логирования"""
+        logging.basicConfig(level=logging.INFO)
+        return logging.getLogger(__name__)
+
+    def _on_results(self, data):
+        results = data.get('results')
+        if isinstance(results, ScanResult) and results.scan_id:
+            self.submit(results)
+
+    def submit(self, result: ScanResult):
+        """Ставит результат на анализ, если для его текущей версии снимка еще нет"""
+        with self._lock:
+            if self._fresh_snapshot(result) is not None:
+                return
+            self._pending[result.scan_id] = result
+            self._pending.move_to_end(result.scan_id)
+            self._lock.notify()
+
+    def get_analysis(self, result: ScanResult, compute: bool = False) -> Optional[ResultAnalysis]:
+        """
+        Снимок для текущей версии результата. Если он еще не готов: при compute=True
+        считается на месте (например, отчет нужен сейчас), иначе возвращается None.
+        """
+        if result is None:
+            return None
+        with self._lock:
+            analysis = self._fresh_snapshot(result)
+        if analysis is None and compute:
+            analysis = self._analyze(result)
+        return analysis
+
+    def _fresh_snapshot(self, result: ScanResult) -> Optional[ResultAnalysis]:
+        entry = self._snapshots.get(result.scan_id)
+        if entry is None or entry[0]() is not result or entry[1].version != result.version:
+            return None
+        return entry[1]
+
+    def _analyze(self, result: ScanResult) -> ResultAnalysis:
+        analysis = analyze_result(result, self.findings)
+        with self._lock:
+            self._snapshots[result.scan_id] = (weakref.ref(result), analysis)
+            self._snapshots.move_to_end(result.scan_id)
+            while len(self._snapshots) > ANALYSIS_SNAPSHOT_LIMIT:
+                self._snapshots.popitem(last=False)
+        return analysis
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._pending and not self._stopped:
+                    self._lock.wait()
+                if self._stopped:
+                    return
+                _, result = self._pending.popitem(last=False)
+                if self._fresh_snapshot(result) is not None:
+                    continue
+
+            try:
+                analysis = self._analyze(result)
+                self.findings.prune()
+                self.logger.info(f"Analysis of {result.scan_id} v{analysis.version}: {analysis.get_summary()}")
+                self.event_bus.analysis_ready.emit({
+                    'scan_id': result.scan_id,
+                    'version': analysis.version,
+                    'analysis': analysis
+                })
+            except Exception as e:
+                self.logger.error(f"Error analyzing results of {result.scan_id}: {e}")
+
+    def shutdown(self):
+        with self._lock:
+            self._stopped = True
+            self._pending.clear()
+            self._lock.notify()
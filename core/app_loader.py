@@ -6,6 +6,12 @@ from core.event_bus import EventBus
 from core.scan_manager import ScanManager
 from core.profile_manager import ProfileManager
 from core.result_parser import NmapResultParser
+from core.history_store import ScanHistoryStore
+from core.scope_manager import ScopeManager
+from core.analysis_service import AnalysisService
+from core.ui_watchdog import UiWatchdog
+from core.result_workspace import ResultWorkspace
+from shared.constants import UI_WATCHDOG_ENABLED
 
 class ApplicationLoader:
     def __init__(self):
@@ -58,6 +64,13 @@ class ApplicationLoader:
             self.modules['scan_manager'] = ScanManager.get_instance(self.event_bus)
             self.modules['profile_manager'] = ProfileManager.get_instance(self.event_bus)
             self.modules['result_parser'] = NmapResultParser.get_instance(self.event_bus)
+            self.modules['history_store'] = ScanHistoryStore.get_instance()
+            self.modules['scope_manager'] = ScopeManager.get_instance()
+            self.modules['analysis_service'] = AnalysisService.get_instance(self.event_bus)
+            self.modules['result_workspace'] = ResultWorkspace.get_instance(self.event_bus, self.modules['history_store'])
+            if UI_WATCHDOG_ENABLED:
+                self.modules['ui_watchdog'] = UiWatchdog.get_instance(self.event_bus)
+                self.modules['ui_watchdog'].start()
             
             self.logger.info("Core modules loaded successfully")
             
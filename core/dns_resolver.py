@@ -0,0 +1,152 @@
+import socket
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from shared.constants import DNS_MAX_WORKERS, DNS_DEFAULT_TTL, DNS_NEGATIVE_TTL
+from shared.utils.validators import split_targets, validate_domain, validate_ip, validate_network, validate_ip_range
+
+try:
+    import dns.resolver
+    DNSPYTHON_AVAILABLE = True
+except ImportError:
+    DNSPYTHON_AVAILABLE = False
+
+# Функция разрешения имени: имя -> (адреса, TTL в секундах или None)
+ResolveFunc = Callable[[str], Tuple[List[str], Optional[int]]]
+
+class DnsResolver:
+    """
+    Предварительное разрешение доменных целей перед запуском nmap.
+
+    Имена разрешаются параллельно в ограниченном пуле потоков, ответы
+    кэшируются с учетом TTL записи. Имена, указывающие на один адрес,
+    схлопываются в одну цель, а соответствие адрес -> имена сохраняется
+    для подписи результатов.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = DnsResolver(*args, **kwargs)
+        return cls._instance
+
+    def __init__(self, resolve_func: ResolveFunc = None, nameservers: List[str] = None,
+                 port: int = 53, max_workers: int = DNS_MAX_WORKERS):
+        self.logger = self._setup_logging()
+        self.max_workers = max_workers
+        self._cache: Dict[str, Tuple[List[str], float]] = {}
+        self._lock = threading.Lock()
+
+        if resolve_func is not None:
+            self._resolve_func = resolve_func
+        elif DNSPYTHON_AVAILABLE:
+            self._resolver = dns.resolver.Resolver(configure=nameservers is None)
+            if nameservers is not None:
+                # Например, локальный stub-резолвер для тестов
+                self._resolver.nameservers = list(nameservers)
+            self._resolver.port = port
+            self._resolve_func = self._resolve_dnspython
+        else:
+            if nameservers is not None:
+                self.logger.warning("dnspython is not installed, custom nameservers are ignored")
+            self._resolve_func = self._resolve_system
+
+    def _setup_logging(self):
+        """Настройка логирования"""
+        logging.basicConfig(level=logging.INFO)
+        return logging.getLogger(__name__)
+
+    def _resolve_dnspython(self, name: str) -> Tuple[List[str], Optional[int]]:
+        """Разрешает имя через dnspython - TTL берется из ответа"""
+        try:
+            answer = self._resolver.resolve(name, 'A')
+            return [record.address for record in answer], answer.rrset.ttl
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+            return [], None
+
+    @staticmethod
+    def _resolve_system(name: str) -> Tuple[List[str], Optional[int]]:
+        """Разрешает имя системным резолвером (TTL недоступен)"""
+        try:
+            infos = socket.getaddrinfo(name, None, socket.AF_INET, socket.SOCK_STREAM)
+        except socket.gaierror:
+            return [], None
+        addresses = []
+        for info in infos:
+            address = info[4][0]
+            if address not in addresses:
+                addresses.append(address)
+        return addresses, None
+
+    def _lookup(self, name: str) -> List[str]:
+        """Разрешает одно имя с использованием кэша"""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(name)
+            if cached and cached[1] > now:
+                return cached[0]
+
+        try:
+            addresses, ttl = self._resolve_func(name)
+        except Exception as e:
+            self.logger.warning(f"DNS lookup failed for {name}: {e}")
+            addresses, ttl = [], None
+
+        if ttl is None:
+            ttl = DNS_DEFAULT_TTL if addresses else DNS_NEGATIVE_TTL
+
+        with self._lock:
+            self._cache[name] = (addresses, time.monotonic() + ttl)
+        return addresses
+
+    def resolve_many(self, names: Iterable[str]) -> Dict[str, List[str]]:
+        """Разрешает имена параллельно; неразрешенные имена получают пустой список"""
+        unique_names = list(dict.fromkeys(name.lower() for name in names))
+        if not unique_names:
+            return {}
+
+        workers = min(self.max_workers, len(unique_names))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dns") as pool:
+            return dict(zip(unique_names, pool.map(self._lookup, unique_names)))
+
+    def collapse_targets(self, targets: List[str]) -> Tuple[List[str], Dict[str, List[str]]]:
+        """
+        Заменяет доменные цели их адресами и объединяет с остальными целями.
+        Возвращает (цели для nmap, адрес -> имена). Неразрешенные имена
+        остаются в списке как есть - nmap сообщит об ошибке сам.
+        """
+        names = [target for target in targets
+                 if validate_domain(target) and not (validate_ip(target) or validate_network(target)
+                                                     or validate_ip_range(target))]
+        if not names:
+            return targets, {}
+
+        resolved = self.resolve_many(names)
+
+        address_targets = [target for target in targets if target not in names]
+        host_labels: Dict[str, List[str]] = {}
+        unresolved = []
+        for name in names:
+            addresses = resolved.get(name.lower())
+            if not addresses:
+                unresolved.append(name)
+                continue
+            # Как и nmap, сканируем первый адрес имени
+            host_labels.setdefault(addresses[0], []).append(name)
+
+        # Объединяем адреса имен с адресными целями, дубликаты схлопываются
+        target_set, passthrough = split_targets(address_targets + list(host_labels))
+        collapsed = target_set.to_targets() + passthrough + unresolved
+
+        self.logger.info(f"Resolved {len(names) - len(unresolved)} of {len(names)} names "
+                         f"to {len(host_labels)} unique addresses")
+        return collapsed, host_labels
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
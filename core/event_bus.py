@@ -1,6 +1,101 @@
+import time
 import logging
-from PyQt6.QtCore import QObject, pyqtSignal
-from typing import Any, Dict, List, Callable
+import threading
+from PyQt6.QtCore import QObject, pyqtSignal, QTimer, Qt
+from typing import Any, Dict, List, Callable, Optional
+
+from core.event_dispatch import (DeliveryMode, QueuePolicy, BoundedQueue, BoundedRelay, PoolListener,
+                                 merge_events, create_listener_pool)
+from core.event_metrics import EventMetrics
+from shared.constants import UI_EVENT_MAX_RATE, EVENT_QUEUE_SIZE, EVENT_METRICS_ENABLED
+
+# После этих событий по scan_id промежуточных обновлений больше не будет
+TERMINAL_SIGNALS = ('scan_completed', 'scan_stopped', 'scan_failed')
+
+def merge_progress(previous: dict, data: dict) -> dict:
+    """Слияние событий прогресса: строки stderr (progress=-1) не затирают известный прогресс"""
+    merged = merge_events(previous, data)
+    if data.get('progress', 0) < 0 <= previous.get('progress', -1):
+        merged['progress'] = previous['progress']
+    return merged
+
+class CoalescingRelay(QObject):
+    """
+    Промежуточный подписчик, который сливает частые события по scan_id.
+
+    Эмиттер только сливает событие в ограниченную очередь (в своем потоке,
+    без ожидания GUI). Подписчик получает не больше max_rate доставок в
+    секунду, в каждой - по одному событию на сканирование. Финальное
+    состояние (прогресс 100%) и все накопленное по сканированию перед его
+    завершением доставляются сразу.
+    """
+    
+    _wake = pyqtSignal()
+    
+    def __init__(self, event_bus: 'EventBus', signal_name: str, slot: Callable, max_rate: float):
+        super().__init__(event_bus)
+        self.signal_name = signal_name
+        self._slot = slot
+        self._interval = 1.0 / max_rate
+        self.queue = BoundedQueue(EVENT_QUEUE_SIZE, QueuePolicy.MERGE, merge=merge_progress)
+        self._urgent = False
+        self._last_delivery = 0.0
+        self.delivered = 0
+        
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        self._wake.connect(self._schedule, Qt.ConnectionType.QueuedConnection)
+        
+        getattr(event_bus, signal_name).connect(self.push, Qt.ConnectionType.DirectConnection)
+        for terminal in TERMINAL_SIGNALS:
+            getattr(event_bus, terminal).connect(self._on_terminal)
+    
+    def push(self, data: dict):
+        """Вызывается в потоке эмиттера"""
+        urgent = data.get('progress', 0) >= 100
+        if urgent:
+            self._urgent = True
+        # Финальное событие будит GUI поток, даже если разбор уже ждет таймера
+        if self.queue.put(data) or urgent:
+            self._wake.emit()
+    
+    def _schedule(self):
+        if self._urgent:
+            self.flush()
+            return
+        if self._timer.isActive():
+            return
+        wait = self._last_delivery + self._interval - time.monotonic()
+        if wait <= 0:
+            self.flush()
+        else:
+            self._timer.start(int(wait * 1000) + 1)
+    
+    def _on_terminal(self, data: dict):
+        # Последнее промежуточное состояние не должно потеряться или опоздать
+        pending = self.queue.pop(data.get('scan_id'))
+        if pending is not None:
+            self._deliver(pending)
+    
+    def flush(self):
+        """Доставляет все накопленные события (по одному на сканирование)"""
+        self._timer.stop()
+        self._urgent = False
+        self._last_delivery = time.monotonic()
+        for data in self.queue.take_batch(release=True):
+            self._deliver(data)
+    
+    def _deliver(self, data: dict):
+        self.delivered += 1
+        try:
+            self._slot(data)
+        except Exception as e:
+            logging.getLogger('core.event_bus').error(f"Error in coalesced {self.signal_name} handler: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {'name': self.signal_name, 'mode': 'coalesced',
+                'delivered': self.delivered, **self.queue.get_stats()}
 
 class EventBus(QObject):
     """Центральная шина событий для межмодульной коммуникации"""
@@ -17,32 +112,136 @@ class EventBus(QObject):
     # События данных
     targets_updated = pyqtSignal(list)  # [targets]
     results_updated = pyqtSignal(dict)  # {scan_id, results}
+    hosts_discovered = pyqtSignal(dict)  # {scan_id, hosts} - хосты по мере их завершения nmap
+    analysis_ready = pyqtSignal(dict)    # {scan_id, version, analysis} - снимок ResultAnalysis
+    scan_diff_ready = pyqtSignal(dict)  # {old_scan_id, new_scan_id, diff}
+    workspace_changed = pyqtSignal(dict)  # {action, scan_id, scans} - открыто/вытеснено/закрыто сканирование
     
     # События UI
     command_updated = pyqtSignal(str)   # nmap_command
     status_message = pyqtSignal(str)    # message
     notification = pyqtSignal(dict)     # {type, title, message}
+    ui_stall = pyqtSignal(dict)         # {started_at, duration_ms, blocking, blocking_samples, samples}
 
     def __init__(self):
         super().__init__()
-        self._listeners: Dict[str, List[Callable]] = {}
+        # Кастомные события: event_type -> [(callback, получатель)]
+        self._listeners: Dict[str, List[tuple]] = {}
+        self._listeners_lock = threading.Lock()
+        self._relays: List[CoalescingRelay] = []
+        self._dispatchers: List[Any] = []
+        self._listener_pool = create_listener_pool()
         self.logger = logging.getLogger('core.event_bus')
+        
+        # Инструментирование: счетчик эмитов на каждом сигнале, обработчики оборачиваются при подключении
+        self.metrics = EventMetrics(EVENT_METRICS_ENABLED)
+        for name in self.signal_names():
+            getattr(self, name).connect(lambda data=None, name=name: self.metrics.record_emit(name, data),
+                                        Qt.ConnectionType.DirectConnection)
         self.logger.info("EventBus initialized")
     
-    def subscribe(self, event_type: str, callback: Callable):
-        """Подписка на кастомные события"""
-        if event_type not in self._listeners:
-            self._listeners[event_type] = []
-        self._listeners[event_type].append(callback)
+    @classmethod
+    def signal_names(cls) -> List[str]:
+        return [name for name, value in vars(cls).items() if isinstance(value, pyqtSignal)]
+    
+    def connect_signal(self, signal_name: str, slot: Callable, mode: DeliveryMode = DeliveryMode.QUEUED,
+                       max_queue: Optional[int] = None, policy: QueuePolicy = QueuePolicy.DROP_OLDEST):
+        """
+        Подключает слот к сигналу шины с явным способом доставки.
+
+        QUEUED - слот GUI потока, событие ставится в очередь событий Qt
+        (эмиттер из рабочего потока не трогает виджеты и не ждет их).
+        BOUNDED - как QUEUED, но у подписчика своя очередь из max_queue
+        событий с политикой переполнения: медленная вкладка теряет или
+        сливает устаревшие события, а не копит их.
+        POOL - не-UI подписчик в общем пуле потоков.
+        DIRECT - в потоке эмиттера, только для быстрых потокобезопасных слотов.
+        """
+        signal = getattr(self, signal_name)
+        name = f"{signal_name}->{getattr(slot, '__qualname__', repr(slot))}"
+        slot = self.metrics.wrap(signal_name, slot)
+        if mode == DeliveryMode.DIRECT:
+            signal.connect(slot, Qt.ConnectionType.DirectConnection)
+            return None
+        if mode == DeliveryMode.QUEUED:
+            # Шина живет в GUI потоке, поэтому эмит из рабочего потока уходит в очередь
+            signal.connect(slot, Qt.ConnectionType.QueuedConnection)
+            return None
+        
+        queue = BoundedQueue(max_queue or EVENT_QUEUE_SIZE, policy)
+        if mode == DeliveryMode.BOUNDED:
+            dispatcher = BoundedRelay(self, name, slot, queue)
+        else:
+            dispatcher = PoolListener(name, slot, queue, self._listener_pool)
+        signal.connect(dispatcher.push, Qt.ConnectionType.DirectConnection)
+        self._dispatchers.append(dispatcher)
+        return dispatcher
+    
+    def connect_coalesced(self, signal_name: str, slot: Callable,
+                          max_rate: Optional[float] = None) -> CoalescingRelay:
+        """
+        Подключает слот к частому сигналу (scan_progress, results_updated)
+        через CoalescingRelay: не больше max_rate доставок в секунду,
+        по одному объединенному событию на scan_id.
+        """
+        relay = CoalescingRelay(self, signal_name, self.metrics.wrap(signal_name, slot),
+                                max_rate or UI_EVENT_MAX_RATE)
+        self._relays.append(relay)
+        return relay
+    
+    def get_coalescing_stats(self) -> List[Dict[str, Any]]:
+        """Сколько событий получено и доставлено каждым объединяющим подписчиком"""
+        return [{'signal': relay.signal_name, 'received': relay.queue.received, 'delivered': relay.delivered}
+                for relay in self._relays]
+    
+    def get_dispatch_stats(self) -> List[Dict[str, Any]]:
+        """Очереди всех подписчиков с ограниченной доставкой: получено, доставлено, отброшено, слито"""
+        with self._listeners_lock:
+            listeners = [listener for entries in self._listeners.values()
+                         for _, listener in entries if listener is not None]
+        return ([dispatcher.get_stats() for dispatcher in self._dispatchers] +
+                [listener.get_stats() for listener in listeners] +
+                [relay.get_stats() for relay in self._relays])
+    
+    def subscribe(self, event_type: str, callback: Callable, mode: DeliveryMode = DeliveryMode.POOL,
+                  max_queue: Optional[int] = None, policy: QueuePolicy = QueuePolicy.DROP_OLDEST):
+        """
+        Подписка на кастомные события. По умолчанию обработчик выполняется
+        в пуле потоков, чтобы publish не ждал медленных слушателей;
+        DIRECT вызывает его синхронно в потоке publish.
+        """
+        listener = None
+        callback = self.metrics.wrap(event_type, callback)
+        if mode == DeliveryMode.POOL:
+            listener = PoolListener(f"{event_type}->{getattr(callback, '__qualname__', repr(callback))}",
+                                    callback, BoundedQueue(max_queue or EVENT_QUEUE_SIZE, policy),
+                                    self._listener_pool)
+        elif mode != DeliveryMode.DIRECT:
+            raise ValueError(f"Unsupported delivery mode for custom events: {mode}")
+        with self._listeners_lock:
+            self._listeners.setdefault(event_type, []).append((callback, listener))
     
     def publish(self, event_type: str, data: Any = None):
         """Публикация кастомных событий"""
-        if event_type in self._listeners:
-            for callback in self._listeners[event_type]:
-                try:
-                    callback(data)
-                except Exception as e:
-                    self.logger.error(f"Error in event listener: {e}")
+        self.metrics.record_emit(event_type, data)
+        with self._listeners_lock:
+            entries = list(self._listeners.get(event_type, ()))
+        for callback, listener in entries:
+            if listener is not None:
+                listener.push(data)
+                continue
+            try:
+                callback(data)
+            except Exception as e:
+                self.logger.error(f"Error in event listener: {e}")
+    
+    def dump_metrics(self, file_path: str):
+        """Сохраняет метрики сигналов, обработчиков и очередей подписчиков в JSON"""
+        self.metrics.dump_json(file_path, self.get_dispatch_stats())
+    
+    def shutdown(self):
+        """Останавливает пул не-UI подписчиков (ожидающие события отбрасываются)"""
+        self._listener_pool.shutdown(wait=False, cancel_futures=True)
 
     # Методы для эмитации событий с логированием
     def emit_scan_started(self, scan_data: Dict[str, Any]):
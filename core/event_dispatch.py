@@ -0,0 +1,199 @@
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional
+
+from PyQt6.QtCore import QObject, pyqtSignal, Qt
+
+from shared.constants import EVENT_POOL_WORKERS
+
+class DeliveryMode(Enum):
+    """Как событие шины доходит до подписчика"""
+    DIRECT = "direct"     # В потоке, который эмитировал сигнал (только для быстрых потокобезопасных слотов)
+    QUEUED = "queued"     # В GUI потоке через очередь событий Qt
+    BOUNDED = "bounded"   # В GUI потоке через ограниченную очередь подписчика с политикой переполнения
+    POOL = "pool"         # В пуле потоков, по порядку для каждого подписчика (не-UI потребители)
+
+class QueuePolicy(Enum):
+    """Что делать, когда очередь подписчика заполнена"""
+    DROP_OLDEST = "drop_oldest"   # Вытеснить самое старое событие
+    DROP_NEWEST = "drop_newest"   # Отбросить пришедшее событие
+    MERGE = "merge"               # Слить с ожидающим событием того же scan_id (новые поля перекрывают старые)
+
+def merge_events(previous: dict, data: dict) -> dict:
+    """Слияние двух событий одного сканирования"""
+    merged = dict(previous)
+    merged.update(data)
+    return merged
+
+class BoundedQueue:
+    """
+    Потокобезопасная ограниченная очередь событий одного подписчика.
+
+    put вызывается в потоке эмиттера и никогда не блокирует его: при
+    переполнении срабатывает политика. put возвращает True, если разбор
+    очереди нужно запланировать (разборщик не запущен) - так на очередь
+    приходится не больше одного запланированного разбора.
+    """
+
+    def __init__(self, max_size: int, policy: QueuePolicy = QueuePolicy.DROP_OLDEST,
+                 key: str = 'scan_id', merge: Callable[[dict, dict], dict] = merge_events):
+        self.max_size = max_size
+        self.policy = policy
+        self.key = key
+        self._merge = merge
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[Any, Any]" = OrderedDict()
+        self._sequence = 0
+        self._scheduled = False
+        self.received = 0
+        self.dropped = 0
+        self.merged = 0
+        self.high_water = 0
+
+    def _item_key(self, data: Any):
+        if self.policy == QueuePolicy.MERGE and isinstance(data, dict) and data.get(self.key) is not None:
+            return ('key', data.get(self.key))
+        self._sequence += 1
+        return ('seq', self._sequence)
+
+    def put(self, data: Any) -> bool:
+        with self._lock:
+            self.received += 1
+            key = self._item_key(data)
+            if key in self._items:
+                self._items[key] = self._merge(self._items[key], data)
+                self.merged += 1
+            else:
+                if len(self._items) >= self.max_size:
+                    self.dropped += 1
+                    if self.policy == QueuePolicy.DROP_NEWEST:
+                        return False
+                    self._items.popitem(last=False)
+                self._items[key] = data
+            self.high_water = max(self.high_water, len(self._items))
+
+            if self._scheduled:
+                return False
+            self._scheduled = True
+            return True
+
+    def take_batch(self, release: bool = False) -> List[Any]:
+        """
+        Забирает все события. Пустой список означает, что разборщик завершает
+        работу; release=True снимает планирование сразу (следующий put снова
+        вернет True), даже если события были.
+        """
+        with self._lock:
+            items = list(self._items.values())
+            self._items.clear()
+            if release or not items:
+                self._scheduled = False
+            return items
+
+    def discard(self):
+        """Отбрасывает ожидающие события и снимает запланированный разбор"""
+        with self._lock:
+            self.dropped += len(self._items)
+            self._items.clear()
+            self._scheduled = False
+
+    def pop(self, key_value: Any) -> Optional[Any]:
+        """Забирает ожидающее событие по значению ключа (для политики MERGE)"""
+        with self._lock:
+            return self._items.pop(('key', key_value), None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'received': self.received,
+                'dropped': self.dropped,
+                'merged': self.merged,
+                'pending': len(self._items),
+                'high_water': self.high_water
+            }
+
+class BoundedRelay(QObject):
+    """
+    Подписчик GUI потока с ограниченной очередью. Эмиттер только кладет
+    событие в очередь; в очередь событий Qt попадает не больше одного
+    пробуждения, поэтому медленная вкладка не копит там тысячи событий.
+    """
+
+    _wake = pyqtSignal()
+
+    def __init__(self, parent: QObject, name: str, slot: Callable, queue: BoundedQueue):
+        super().__init__(parent)
+        self.name = name
+        self.queue = queue
+        self._slot = slot
+        self.delivered = 0
+        self._wake.connect(self._drain, Qt.ConnectionType.QueuedConnection)
+
+    def push(self, data: Any):
+        if self.queue.put(data):
+            self._wake.emit()
+
+    def _drain(self):
+        while True:
+            batch = self.queue.take_batch()
+            if not batch:
+                return
+            for data in batch:
+                self.delivered += 1
+                try:
+                    self._slot(data)
+                except Exception as e:
+                    logging.getLogger('core.event_bus').error(f"Error in {self.name} handler: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'name': self.name, 'mode': DeliveryMode.BOUNDED.value,
+                'delivered': self.delivered, **self.queue.get_stats()}
+
+class PoolListener:
+    """
+    Не-UI подписчик, который выполняется в общем пуле потоков. События одного
+    подписчика обрабатываются по порядку (одна задача в пуле на подписчика),
+    разные подписчики - параллельно.
+    """
+
+    def __init__(self, name: str, slot: Callable, queue: BoundedQueue, executor: ThreadPoolExecutor):
+        self.name = name
+        self.queue = queue
+        self._slot = slot
+        self._executor = executor
+        self.delivered = 0
+
+    def push(self, data: Any):
+        if self.queue.put(data):
+            try:
+                self._executor.submit(self._drain)
+            except RuntimeError:
+                # Пул уже остановлен (выход из приложения)
+                self.queue.discard()
+
+    def _drain(self):
+        while True:
+            batch = self.queue.take_batch()
+            if not batch:
+                return
+            for data in batch:
+                self.delivered += 1
+                try:
+                    self._slot(data)
+                except Exception as e:
+                    logging.getLogger('core.event_bus').error(f"Error in {self.name} listener: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'name': self.name, 'mode': DeliveryMode.POOL.value,
+                'delivered': self.delivered, **self.queue.get_stats()}
+
+def create_listener_pool() -> ThreadPoolExecutor:
+    """Общий пул потоков для не-UI подписчиков шины"""
+    return ThreadPoolExecutor(max_workers=EVENT_POOL_WORKERS, thread_name_prefix="event-listener")
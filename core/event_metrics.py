@@ -0,0 +1,176 @@
+import json
+import time
+import logging
+import threading
+from bisect import bisect_left
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from shared.constants import EVENT_METRICS_BUCKETS_MS
+
+def estimate_payload_size(data: Any) -> int:
+    """
+    Грубый размер события в элементах: длина строк и коллекций,
+    число хостов для результатов. Вложенность просматривается на один
+    уровень, чтобы замер не стоил дороже самой доставки.
+    """
+    def size_of(value: Any) -> int:
+        hosts = getattr(value, 'hosts', None)
+        if isinstance(hosts, list):
+            return len(hosts)
+        if isinstance(value, (str, bytes, list, tuple, set, dict)):
+            return len(value)
+        return 1
+
+    if isinstance(data, dict):
+        return sum(size_of(value) for value in data.values())
+    return size_of(data)
+
+class LatencyHistogram:
+    """Гистограмма времени обработки по фиксированным границам в миллисекундах"""
+
+    def __init__(self, bounds_ms: tuple = EVENT_METRICS_BUCKETS_MS):
+        self.bounds_ms = bounds_ms
+        self.buckets = [0] * (len(bounds_ms) + 1)  # Последняя корзина - больше верхней границы
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, elapsed_ms: float):
+        self.buckets[bisect_left(self.bounds_ms, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def percentile(self, fraction: float) -> float:
+        """Оценка процентиля сверху: граница корзины, в которую он попал"""
+        if not self.count:
+            return 0.0
+        threshold = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= threshold:
+                return self.bounds_ms[index] if index < len(self.bounds_ms) else round(self.max_ms, 3)
+        return round(self.max_ms, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"<={bound}" for bound in self.bounds_ms] + [f">{self.bounds_ms[-1]}"]
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_ms, 3),
+            'avg_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'max_ms': round(self.max_ms, 3),
+            'buckets': dict(zip(labels, self.buckets))
+        }
+
+class EventMetrics:
+    """
+    Инструментирование EventBus: число эмитов и размер событий по сигналам,
+    гистограммы времени работы каждого обработчика.
+
+    Выключено по умолчанию - обертки обработчиков в этом случае только
+    проверяют флаг. Замеры приходят из GUI потока, рабочих потоков и пула
+    подписчиков, поэтому счетчики защищены блокировкой.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._signals: Dict[str, Dict[str, Any]] = {}
+        self._handlers: Dict[str, Dict[str, Any]] = {}
+        self._started = time.monotonic()
+        self.logger = logging.getLogger('core.event_bus')
+
+    def set_enabled(self, enabled: bool):
+        if enabled and not self.enabled:
+            # Частоты считаются от момента включения
+            self.reset()
+        self.enabled = enabled
+        self.logger.info(f"EventBus instrumentation {'enabled' if enabled else 'disabled'}")
+
+    def reset(self):
+        with self._lock:
+            self._signals.clear()
+            self._handlers.clear()
+            self._started = time.monotonic()
+
+    def record_emit(self, signal_name: str, data: Any):
+        if not self.enabled:
+            return
+        size = estimate_payload_size(data)
+        with self._lock:
+            stats = self._signals.get(signal_name)
+            if stats is None:
+                stats = self._signals[signal_name] = {'emits': 0, 'payload_total': 0, 'payload_max': 0}
+            stats['emits'] += 1
+            stats['payload_total'] += size
+            stats['payload_max'] = max(stats['payload_max'], size)
+
+    def record_handler(self, signal_name: str, handler: str, elapsed_ms: float, failed: bool = False):
+        with self._lock:
+            key = f"{signal_name}->{handler}"
+            stats = self._handlers.get(key)
+            if stats is None:
+                stats = self._handlers[key] = {'signal': signal_name, 'handler': handler,
+                                               'errors': 0, 'histogram': LatencyHistogram()}
+            stats['histogram'].add(elapsed_ms)
+            if failed:
+                stats['errors'] += 1
+
+    def wrap(self, signal_name: str, slot: Callable) -> Callable:
+        """Обертка обработчика, которая замеряет его время (когда инструментирование включено)"""
+        handler = getattr(slot, '__qualname__', repr(slot))
+
+        def instrumented(*args):
+            if not self.enabled:
+                return slot(*args)
+            started = time.perf_counter()
+            failed = False
+            try:
+                return slot(*args)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                self.record_handler(signal_name, handler, (time.perf_counter() - started) * 1000, failed)
+
+        instrumented.__qualname__ = handler
+        return instrumented
+
+    def get_signal_stats(self) -> List[Dict[str, Any]]:
+        """Статистика сигналов: эмиты, эмитов в секунду, средний и максимальный размер"""
+        elapsed = max(time.monotonic() - self._started, 1e-6)
+        with self._lock:
+            return [{
+                'signal': name,
+                'emits': stats['emits'],
+                'rate_per_sec': round(stats['emits'] / elapsed, 2),
+                'payload_avg': round(stats['payload_total'] / stats['emits'], 1),
+                'payload_max': stats['payload_max']
+            } for name, stats in sorted(self._signals.items())]
+
+    def get_handler_stats(self) -> List[Dict[str, Any]]:
+        """Статистика обработчиков, самые затратные по суммарному времени - первыми"""
+        with self._lock:
+            rows = [{'signal': stats['signal'], 'handler': stats['handler'], 'errors': stats['errors'],
+                     **stats['histogram'].to_dict()} for stats in self._handlers.values()]
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    def to_dict(self, dispatch: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        return {
+            'generated_at': datetime.now().isoformat(),
+            'enabled': self.enabled,
+            'window_sec': round(time.monotonic() - self._started, 3),
+            'signals': self.get_signal_stats(),
+            'handlers': self.get_handler_stats(),
+            'queues': dispatch or []
+        }
+
+    def dump_json(self, file_path: str, dispatch: Optional[List[Dict[str, Any]]] = None):
+        """Сохраняет снимок метрик в JSON для офлайн анализа"""
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(dispatch), f, indent=2, ensure_ascii=False)
+        self.logger.info(f"EventBus metrics saved to {file_path}")
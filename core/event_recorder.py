@@ -0,0 +1,311 @@
+import gzip
+import json
+import time
+import logging
+import threading
+import weakref
+from dataclasses import asdict
+from datetime import datetime
+from typing import Any, Callable, Dict, IO, List, Optional
+
+from PyQt6.QtCore import QObject, pyqtSignal, Qt
+
+from core.event_bus import EventBus
+from shared.constants import EVENT_RECORDING_FORMAT, EVENT_DERIVED_SIGNALS
+from shared.models.scan_config import ScanConfig
+from shared.models.scan_result import ScanResult, HostInfo, PortInfo
+from shared.utils.scan_diff import ScanDiff, DiffEntry, ChangeType
+from shared.utils.script_store import ScriptOutputStore
+
+def _open_recording(file_path: str, mode: str) -> IO[str]:
+    """Файл записи: JSON Lines, сжатый gzip при расширении .gz"""
+    if file_path.endswith('.gz'):
+        return gzip.open(file_path, mode + 't', encoding='utf-8')
+    return open(file_path, mode, encoding='utf-8')
+
+def _host_to_dict(host: HostInfo) -> Dict[str, Any]:
+    data = asdict(host)
+    # Выводы скриптов порта - динамический атрибут PortInfo, asdict его не видит
+    for port_data, port in zip(data['ports'], host.ports):
+        scripts = getattr(port, 'scripts', None)
+        if scripts:
+            port_data['scripts'] = dict(scripts)
+    return data
+
+def _host_from_dict(data: Dict[str, Any]) -> HostInfo:
+    ports = []
+    for port_data in data.get('ports', []):
+        port_data = dict(port_data)
+        scripts = port_data.pop('scripts', None)
+        port = PortInfo(**port_data)
+        if scripts:
+            port.scripts = scripts
+        ports.append(port)
+    return HostInfo(**{**data, 'ports': ports})
+
+def _datetime_to_str(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+def _datetime_from_str(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+class PayloadEncoder:
+    """
+    Сериализует полезную нагрузку сигналов в JSON-совместимый вид.
+
+    Результат сканирования публикуется много раз (после каждой части) и
+    только дописывается, поэтому для уже записанного объекта сохраняются
+    лишь новые хосты. Объекты различаются по ссылке ref, чтобы при
+    воспроизведении каждый результат был одним и тем же обновляемым
+    объектом, как в живом приложении.
+    """
+
+    def __init__(self):
+        self._results: Dict[int, tuple] = {}  # id(result) -> (слабая ссылка, ref, записано хостов)
+        self._next_ref = 0
+        self.unknown_types = set()
+
+    def encode(self, value: Any) -> Any:
+        if value is None or isinstance(value, (str, int, float, bool)):
+            return value
+        if isinstance(value, dict):
+            return {str(key): self.encode(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple, set)):
+            return [self.encode(item) for item in value]
+        if isinstance(value, ScanResult):
+            return self._encode_result(value)
+        if isinstance(value, ScanConfig):
+            return {'__type__': 'ScanConfig', 'data': value.to_dict()}
+        if isinstance(value, HostInfo):
+            return {'__type__': 'HostInfo', 'data': _host_to_dict(value)}
+        if isinstance(value, ScanDiff):
+            return {'__type__': 'ScanDiff', 'old_scan_id': value.old_scan_id, 'new_scan_id': value.new_scan_id,
+                    'entries': [{**asdict(entry), 'change_type': entry.change_type.value}
+                                for entry in value.entries]}
+        if isinstance(value, datetime):
+            return {'__type__': 'datetime', 'value': value.isoformat()}
+        # Прочие объекты не воспроизводятся - сохраняем только описание
+        self.unknown_types.add(type(value).__name__)
+        return {'__type__': 'repr', 'value': repr(value)}
+
+    def _encode_result(self, result: ScanResult) -> Dict[str, Any]:
+        entry = self._results.get(id(result))
+        if entry is None or entry[0]() is not result or entry[2] > len(result.hosts):
+            ref = self._next_ref
+            self._next_ref += 1
+            written = 0
+        else:
+            _, ref, written = entry
+        self._results[id(result)] = (weakref.ref(result), ref, len(result.hosts))
+        return {
+            '__type__': 'ScanResult',
+            'ref': ref,
+            'scan_id': result.scan_id,
+            'config': result.config.to_dict() if result.config else None,
+            'start_time': _datetime_to_str(result.start_time),
+            'end_time': _datetime_to_str(result.end_time),
+            'status': result.status,
+            'version': result.version,
+            'hosts_from': written,
+            'hosts': [_host_to_dict(host) for host in result.hosts[written:]]
+        }
+
+class PayloadDecoder:
+    """Обратное преобразование: результаты собираются в те же объекты по ref"""
+
+    def __init__(self):
+        self._results: Dict[int, ScanResult] = {}
+
+    def decode(self, value: Any) -> Any:
+        if isinstance(value, list):
+            return [self.decode(item) for item in value]
+        if not isinstance(value, dict):
+            return value
+        kind = value.get('__type__')
+        if kind is None:
+            return {key: self.decode(item) for key, item in value.items()}
+        if kind == 'ScanResult':
+            return self._decode_result(value)
+        if kind == 'ScanConfig':
+            return ScanConfig.from_dict(value['data'])
+        if kind == 'HostInfo':
+            return _host_from_dict(value['data'])
+        if kind == 'ScanDiff':
+            return ScanDiff(value['old_scan_id'], value['new_scan_id'],
+                            [DiffEntry(**{**entry, 'change_type': ChangeType(entry['change_type'])})
+                             for entry in value['entries']])
+        if kind == 'datetime':
+            return datetime.fromisoformat(value['value'])
+        return value.get('value')
+
+    def _decode_result(self, data: Dict[str, Any]) -> ScanResult:
+        result = self._results.get(data['ref'])
+        if result is None:
+            result = self._results[data['ref']] = ScanResult(
+                scan_id=data['scan_id'],
+                config=ScanConfig.from_dict(data['config']) if data['config'] else None,
+                script_store=ScriptOutputStore()
+            )
+        del result.hosts[data['hosts_from']:]
+        for host_data in data['hosts']:
+            host = _host_from_dict(host_data)
+            result.script_store.adopt_host(host)
+            result.hosts.append(host)
+        result.start_time = _datetime_from_str(data['start_time'])
+        result.end_time = _datetime_from_str(data['end_time'])
+        result.status = data['status']
+        result.version = data['version']
+        return result
+
+class EventRecorder:
+    """
+    Запись всего потока сигналов EventBus в файл с отметками времени.
+
+    Событие сериализуется сразу в потоке эмиттера (пока объект результата
+    не изменился) и дописывается строкой JSON. Первая строка - заголовок
+    с форматом и временем начала записи. Производные сигналы не
+    записываются - при воспроизведении их публикует сервис анализа.
+    """
+
+    def __init__(self, event_bus: EventBus, file_path: str):
+        self.event_bus = event_bus
+        self.file_path = file_path
+        self.logger = self._setup_logging()
+        self._encoder = PayloadEncoder()
+        self._lock = threading.Lock()
+        self._file: Optional[IO[str]] = None
+        self._handlers: List[tuple] = []
+        self._started = 0.0
+        self.events = 0
+
+    def _setup_logging(self):
+        """Настройка логирования"""
+        logging.basicConfig(level=logging.INFO)
+        return logging.getLogger(__name__)
+
+    def start(self):
+        self._file = _open_recording(self.file_path, 'w')
+        self._started = time.monotonic()
+        self._file.write(json.dumps({'format': EVENT_RECORDING_FORMAT,
+                                     'started_at': datetime.now().isoformat()}) + "\n")
+        for name in self.event_bus.signal_names():
+            if name in EVENT_DERIVED_SIGNALS:
+                continue
+            handler = self._make_handler(name)
+            getattr(self.event_bus, name).connect(handler, Qt.ConnectionType.DirectConnection)
+            self._handlers.append((name, handler))
+        self.logger.info(f"Recording EventBus traffic to {self.file_path}")
+
+    def _make_handler(self, signal_name: str) -> Callable:
+        return lambda data=None: self.record(signal_name, data)
+
+    def record(self, signal_name: str, data: Any):
+        with self._lock:
+            if self._file is None:
+                return
+            try:
+                line = json.dumps({'t': round(time.monotonic() - self._started, 6),
+                                   'signal': signal_name,
+                                   'data': self._encoder.encode(data)}, ensure_ascii=False)
+                self._file.write(line + "\n")
+                self.events += 1
+            except Exception as e:
+                self.logger.error(f"Failed to record {signal_name}: {e}")
+
+    def stop(self):
+        for name, handler in self._handlers:
+            try:
+                getattr(self.event_bus, name).disconnect(handler)
+            except (TypeError, RuntimeError):
+                pass
+        self._handlers.clear()
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.close()
+            self._file = None
+        if self._encoder.unknown_types:
+            self.logger.warning(f"Payload types recorded as text only: {sorted(self._encoder.unknown_types)}")
+        self.logger.info(f"Recorded {self.events} events to {self.file_path}")
+
+class EventReplayer(QObject):
+    """
+    Воспроизведение записанного потока в EventBus со скоростью 1x, Nx
+    или максимальной (speed=0).
+
+    Сигналы эмитируются из отдельного потока, как их эмитируют поток nmap
+    и менеджер сканирований, поэтому вкладки проходят те же очереди и
+    объединение событий. Производные сигналы (analysis_ready) не
+    воспроизводятся, даже если есть в записи. По окончании (и при
+    ошибке чтения записи) эмитируется finished со статистикой прогона.
+    """
+
+    finished = pyqtSignal(dict)  # {events, skipped, recorded_sec, wall_sec, events_per_sec[, error]}
+
+    def __init__(self, event_bus: EventBus, file_path: str, speed: float = 1.0):
+        super().__init__()
+        self.event_bus = event_bus
+        self.file_path = file_path
+        self.speed = speed
+        self.logger = logging.getLogger(__name__)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Воспроизводит запись в фоновом потоке"""
+        self._thread = threading.Thread(target=self.run, daemon=True, name="event-replay")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self) -> Dict[str, Any]:
+        """Воспроизводит запись в текущем потоке и возвращает статистику"""
+        decoder = PayloadDecoder()
+        events = skipped = 0
+        recorded = 0.0
+        error = None
+        started = time.monotonic()
+
+        try:
+            with _open_recording(self.file_path, 'r') as f:
+                header = json.loads(f.readline() or '{}')
+                if header.get('format') != EVENT_RECORDING_FORMAT:
+                    raise ValueError(f"{self.file_path} is not an EventBus recording")
+
+                for line in f:
+                    if self._stop.is_set():
+                        break
+                    record = json.loads(line)
+                    signal_name = record['signal']
+                    recorded = record['t']
+                    if signal_name in EVENT_DERIVED_SIGNALS or not hasattr(self.event_bus, signal_name):
+                        skipped += 1
+                        continue
+
+                    if self.speed > 0:
+                        delay = recorded / self.speed - (time.monotonic() - started)
+                        if delay > 0:
+                            self._stop.wait(delay)
+
+                    data = decoder.decode(record['data'])
+                    getattr(self.event_bus, signal_name).emit(data)
+                    events += 1
+        except (OSError, ValueError, KeyError) as e:
+            # finished эмитируется и при ошибке - иначе --headless не завершится
+            error = str(e)
+            self.logger.error(f"Replay of {self.file_path} failed: {e}")
+
+        wall = time.monotonic() - started
+        stats = {
+            'events': events,
+            'skipped': skipped,
+            'recorded_sec': round(recorded, 3),
+            'wall_sec': round(wall, 3),
+            'events_per_sec': round(events / wall, 1) if wall > 0 else 0.0
+        }
+        if error:
+            stats['error'] = error
+        self.logger.info(f"Replay of {self.file_path} finished: {stats}")
+        self.finished.emit(stats)
+        return stats
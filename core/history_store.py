@@ -0,0 +1,625 @@
+import json
+import sqlite3
+import threading
+import time
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from shared.constants import HISTORY_DB_FILE
+from shared.models.scan_config import ScanConfig
+from shared.models.scan_result import ScanResult, HostInfo, PortInfo
+from shared.utils.blob_store import RawXmlStore
+from shared.utils.script_store import ScriptOutputStore
+from shared.utils.validators import targets_key
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id TEXT PRIMARY KEY,
+    result_scan_id TEXT,
+    status TEXT,
+    scan_type TEXT,
+    targets TEXT,
+    config TEXT,
+    start_time REAL,
+    end_time REAL,
+    created_at REAL NOT NULL,
+    hosts_count INTEGER DEFAULT 0,
+    open_ports_count INTEGER DEFAULT 0,
+    raw_xml_digest TEXT,
+    targets_key TEXT
+);
+
+CREATE TABLE IF NOT EXISTS hosts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    scan_id TEXT NOT NULL REFERENCES scans(id) ON DELETE CASCADE,
+    ip TEXT NOT NULL,
+    hostname TEXT,
+    state TEXT,
+    os_family TEXT,
+    os_details TEXT,
+    mac TEXT
+);
+
+CREATE TABLE IF NOT EXISTS ports (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    host_id INTEGER NOT NULL REFERENCES hosts(id) ON DELETE CASCADE,
+    port INTEGER NOT NULL,
+    protocol TEXT,
+    state TEXT,
+    service TEXT,
+    version TEXT,
+    reason TEXT,
+    version_seen_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS scripts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    host_id INTEGER NOT NULL REFERENCES hosts(id) ON DELETE CASCADE,
+    port_id INTEGER REFERENCES ports(id) ON DELETE CASCADE,
+    script_id TEXT NOT NULL,
+    output TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_scans_created_at ON scans(created_at);
+CREATE INDEX IF NOT EXISTS idx_scans_start_time ON scans(start_time);
+CREATE INDEX IF NOT EXISTS idx_scans_targets_key ON scans(targets_key);
+CREATE INDEX IF NOT EXISTS idx_scans_raw_xml_digest ON scans(raw_xml_digest);
+CREATE INDEX IF NOT EXISTS idx_hosts_scan_id ON hosts(scan_id);
+CREATE INDEX IF NOT EXISTS idx_hosts_ip ON hosts(ip);
+CREATE INDEX IF NOT EXISTS idx_ports_host_id ON ports(host_id);
+CREATE INDEX IF NOT EXISTS idx_ports_port ON ports(port, protocol);
+CREATE INDEX IF NOT EXISTS idx_ports_service ON ports(service);
+CREATE INDEX IF NOT EXISTS idx_scripts_host_id ON scripts(host_id);
+CREATE INDEX IF NOT EXISTS idx_scripts_port_id ON scripts(port_id);
+"""
+
+_QUERY_CHUNK = 500  # Параметров в одном IN (...)
+
+class ScanHistoryStore:
+    """Постоянное хранилище истории сканирований на SQLite"""
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls, db_path: str = None):
+        if cls._instance is None:
+            cls._instance = ScanHistoryStore(db_path or HISTORY_DB_FILE)
+        return cls._instance
+
+    def __init__(self, db_path: str = HISTORY_DB_FILE):
+        self.db_path = db_path
+        self.logger = self._setup_logging()
+        self._lock = threading.RLock()
+
+        # Одно соединение на процесс, доступ сериализуется через _lock
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        if db_path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode = WAL")
+        self._migrate()
+        self._conn.executescript(_SCHEMA)
+        self._backfill_targets_keys()
+        self._conn.commit()
+
+        self.logger.info(f"Scan history store opened: {db_path}")
+
+    def _setup_logging(self):
+        """Настройка логирования"""
+        logging.basicConfig(level=logging.INFO)
+        return logging.getLogger(__name__)
+
+    def _migrate(self):
+        """Добавляет колонки, появившиеся после создания базы"""
+        columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(scans)")}
+        if not columns:
+            # Новая база, таблицы создаст схема
+            return
+        if 'raw_xml_digest' not in columns:
+            self._conn.execute("ALTER TABLE scans ADD COLUMN raw_xml_digest TEXT")
+        if 'targets_key' not in columns:
+            self._conn.execute("ALTER TABLE scans ADD COLUMN targets_key TEXT")
+
+        columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(hosts)")}
+        if 'mac' not in columns:
+            self._conn.execute("ALTER TABLE hosts ADD COLUMN mac TEXT")
+
+        columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(ports)")}
+        if 'version_seen_at' not in columns:
+            self._conn.execute("ALTER TABLE ports ADD COLUMN version_seen_at REAL")
+
+    def _backfill_targets_keys(self):
+        """Вычисляет ключ целей для сканирований, сохраненных до его появления"""
+        rows = self._conn.execute("SELECT id, targets FROM scans WHERE targets_key IS NULL").fetchall()
+        self._conn.executemany(
+            "UPDATE scans SET targets_key = ? WHERE id = ?",
+            [(targets_key(json.loads(row['targets']) if row['targets'] else []), row['id']) for row in rows]
+        )
+
+    # ---------------------------------------------------------------- запись
+
+    def save_scan(self, scan_id: str, result: ScanResult) -> bool:
+        """Сохраняет результат сканирования (перезаписывает существующий scan_id)"""
+        try:
+            created_at = time.time()
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM scans WHERE id = ?", (scan_id,))
+                self._conn.execute(
+                    "INSERT INTO scans (id, result_scan_id, status, scan_type, targets, config, "
+                    "start_time, end_time, created_at, hosts_count, open_ports_count, raw_xml_digest, "
+                    "targets_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        scan_id,
+                        result.scan_id,
+                        result.status,
+                        result.config.scan_type.value if result.config else None,
+                        json.dumps(result.config.targets if result.config else []),
+                        json.dumps(result.config.to_dict()) if result.config else None,
+                        result.start_time.timestamp() if result.start_time else None,
+                        result.end_time.timestamp() if result.end_time else None,
+                        created_at,
+                        result.get_hosts_count(),
+                        result.get_open_ports_count(),
+                        result.raw_xml_blob.digest if result.raw_xml_blob else None,
+                        targets_key(result.config.targets if result.config else [])
+                    )
+                )
+
+                for host in result.hosts:
+                    self._insert_host(scan_id, host, created_at)
+
+            self.logger.info(f"Saved scan {scan_id} to history ({len(result.hosts)} hosts)")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error saving scan {scan_id} to history: {e}")
+            return False
+
+    def _insert_host(self, scan_id: str, host: HostInfo, created_at: float):
+        """Записывает хост, его порты и скрипты"""
+        cursor = self._conn.execute(
+            "INSERT INTO hosts (scan_id, ip, hostname, state, os_family, os_details, mac) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (scan_id, host.ip, host.hostname, host.state, host.os_family, host.os_details, host.mac)
+        )
+        host_id = cursor.lastrowid
+
+        port_script_keys = set()
+        for port in host.ports:
+            # Версия, взятая из кэша, сохраняет время своего -sV, а не этого сканирования
+            version_seen_at = port.version_seen_at or (created_at if port.version else None)
+            cursor = self._conn.execute(
+                "INSERT INTO ports (host_id, port, protocol, state, service, version, reason, version_seen_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (host_id, port.port, port.protocol, port.state, port.service, port.version, port.reason,
+                 version_seen_at)
+            )
+            port_id = cursor.lastrowid
+
+            for script_id, output in getattr(port, 'scripts', {}).items():
+                self._conn.execute(
+                    "INSERT INTO scripts (host_id, port_id, script_id, output) VALUES (?, ?, ?, ?)",
+                    (host_id, port_id, script_id, output)
+                )
+                port_script_keys.add(f"port{port.port}_{script_id}")
+
+        # Копии скриптов портов (port{N}_{id}) в host.scripts не дублируем -
+        # они восстанавливаются из таблицы scripts при загрузке
+        for script_id, output in host.scripts.items():
+            if script_id in port_script_keys:
+                continue
+            self._conn.execute(
+                "INSERT INTO scripts (host_id, port_id, script_id, output) VALUES (?, NULL, ?, ?)",
+                (host_id, script_id, output)
+            )
+
+    def delete_scan(self, scan_id: str) -> bool:
+        """Удаляет сканирование из истории вместе с XML, на который больше никто не ссылается"""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT raw_xml_digest FROM scans WHERE id = ?", (scan_id,)).fetchone()
+            if row is None:
+                return False
+            self._conn.execute("DELETE FROM scans WHERE id = ?", (scan_id,))
+            digest = row['raw_xml_digest']
+            if digest and self._conn.execute("SELECT 1 FROM scans WHERE raw_xml_digest = ? LIMIT 1",
+                                             (digest,)).fetchone():
+                digest = None
+        if digest:
+            RawXmlStore.get_instance().remove([digest])
+        return True
+
+    def clear(self):
+        """Полностью очищает историю вместе с сохраненным XML"""
+        with self._lock, self._conn:
+            digests = [row['raw_xml_digest'] for row in self._conn.execute(
+                "SELECT DISTINCT raw_xml_digest FROM scans WHERE raw_xml_digest IS NOT NULL")]
+            self._conn.execute("DELETE FROM scans")
+        RawXmlStore.get_instance().remove(digests)
+
+    # ---------------------------------------------------------------- чтение
+
+    def has_scan(self, scan_id: str) -> bool:
+        """Проверяет наличие сканирования в истории"""
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM scans WHERE id = ?", (scan_id,)).fetchone()
+        return row is not None
+
+    def get_scan_summary(self, scan_id: str) -> Optional[Dict[str, Any]]:
+        """Возвращает сводку сканирования без загрузки хостов"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM scans WHERE id = ?", (scan_id,)).fetchone()
+        return self._summary_from_row(row) if row else None
+
+    def list_scans(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """Возвращает сводки сканирований, новые первыми"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM scans ORDER BY created_at DESC LIMIT ? OFFSET ?", (limit, offset)
+            ).fetchall()
+        return [self._summary_from_row(row) for row in rows]
+
+    def find_previous_scan(self, scan_id: str) -> Optional[str]:
+        """Возвращает ID предыдущего сканирования тех же целей (в любом порядке и записи)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT prev.id FROM scans cur JOIN scans prev "
+                "ON prev.targets_key = cur.targets_key AND prev.created_at < cur.created_at "
+                "WHERE cur.id = ? ORDER BY prev.created_at DESC LIMIT 1",
+                (scan_id,)
+            ).fetchone()
+        return row['id'] if row else None
+
+    def get_scans_between(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """Возвращает сводки сканирований, выполненных в интервале времени"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM scans WHERE created_at BETWEEN ? AND ? ORDER BY created_at",
+                (start.timestamp(), end.timestamp())
+            ).fetchall()
+        return [self._summary_from_row(row) for row in rows]
+
+    def find_hosts(self, ip: str) -> List[Dict[str, Any]]:
+        """Ищет все появления хоста в истории, новые первыми"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT h.scan_id, h.ip, h.hostname, h.state, h.os_family, s.created_at "
+                "FROM hosts h JOIN scans s ON s.id = h.scan_id "
+                "WHERE h.ip = ? ORDER BY s.created_at DESC",
+                (ip,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_host_activity(self, since: datetime = None, critical_services: Iterable[str] = (),
+                          ips: Iterable[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Агрегирует историю по IP (за период since, только по ips, если заданы):
+        когда хост последний раз был up, сколько раз сканировался, максимум
+        открытых (и критичных) портов и сколько разных наборов открытых портов
+        у него наблюдалось. Наборы сравниваются только среди сканирований,
+        где хост был up, и только в пределах одного типа сканирования -
+        иначе Quick и Comprehensive давали бы "изменение" на пустом месте.
+        """
+        conditions: List[str] = []
+        params: List[Any] = []
+        if since is not None:
+            conditions.append("s.created_at >= ?")
+            params.append(since.timestamp())
+        if ips is None:
+            return self._host_activity(conditions, params, critical_services)
+
+        # Запросы пачками, чтобы не упереться в лимит параметров SQLite
+        ips = list(dict.fromkeys(ips))
+        activity: Dict[str, Dict[str, Any]] = {}
+        for offset in range(0, len(ips), _QUERY_CHUNK):
+            chunk = ips[offset:offset + _QUERY_CHUNK]
+            ip_condition = f"h.ip IN ({', '.join('?' * len(chunk))})"
+            activity.update(self._host_activity([ip_condition] + conditions, chunk + params, critical_services))
+        return activity
+
+    def _host_activity(self, conditions: List[str], params: List[Any],
+                       critical_services: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        services = list(critical_services)
+        service_filter = f"service IN ({', '.join('?' * len(services))})" if services else "0"
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        up_where = f"WHERE h.state = 'up'{''.join(' AND ' + condition for condition in conditions)} "
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT h.ip, "
+                "MAX(CASE WHEN h.state = 'up' THEN s.created_at END) AS last_up, "
+                "SUM(CASE WHEN h.state = 'up' THEN 1 ELSE 0 END) AS times_up, "
+                "COUNT(*) AS times_seen, "
+                "MAX(COALESCE(pc.open_ports, 0)) AS max_open_ports, "
+                "MAX(COALESCE(pc.critical_ports, 0)) AS max_critical_ports "
+                "FROM hosts h JOIN scans s ON s.id = h.scan_id "
+                "LEFT JOIN ("
+                "  SELECT host_id, COUNT(*) AS open_ports, "
+                f"  SUM(CASE WHEN {service_filter} THEN 1 ELSE 0 END) AS critical_ports "
+                "  FROM ports WHERE state = 'open' GROUP BY host_id"
+                ") pc ON pc.host_id = h.id "
+                f"{where}GROUP BY h.ip",
+                services + params
+            ).fetchall()
+            # Наборы открытых портов каждого появления хоста в состоянии up
+            port_rows = self._conn.execute(
+                "SELECT h.ip, s.scan_type, GROUP_CONCAT(p.protocol || '/' || p.port) AS open_ports "
+                "FROM hosts h JOIN scans s ON s.id = h.scan_id "
+                "LEFT JOIN ports p ON p.host_id = h.id AND p.state = 'open' "
+                f"{up_where}GROUP BY h.id",
+                params
+            ).fetchall()
+
+        port_sets: Dict[tuple, set] = {}
+        for row in port_rows:
+            # Порядок GROUP_CONCAT не определен - сравниваем множества
+            open_ports = frozenset(row['open_ports'].split(',')) if row['open_ports'] else frozenset()
+            port_sets.setdefault((row['ip'], row['scan_type']), set()).add(open_ports)
+
+        activity = {row['ip']: {**dict(row), 'port_variants': 0} for row in rows}
+        for (ip, _), variants in port_sets.items():
+            if ip in activity:
+                activity[ip]['port_variants'] = max(activity[ip]['port_variants'], len(variants))
+        return activity
+
+    def get_port_frequencies(self, protocol: str = "tcp", since: datetime = None) -> List[Dict[str, Any]]:
+        """
+        Возвращает, на скольких разных хостах был открыт каждый порт,
+        самые распространенные первыми
+        """
+        conditions = ["p.state = 'open'"]
+        params: List[Any] = []
+        if protocol:
+            conditions.append("p.protocol = ?")
+            params.append(protocol)
+        if since is not None:
+            conditions.append("s.created_at >= ?")
+            params.append(since.timestamp())
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT p.port, p.protocol, COUNT(DISTINCT h.ip) AS hosts "
+                "FROM ports p JOIN hosts h ON h.id = p.host_id JOIN scans s ON s.id = h.scan_id "
+                f"WHERE {' AND '.join(conditions)} "
+                "GROUP BY p.port, p.protocol ORDER BY hosts DESC, p.port",
+                params
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_service_fingerprints(self, max_age_seconds: float,
+                                 script_intensity: str = None) -> Dict[tuple, Dict[str, Any]]:
+        """
+        Возвращает последние известные версии сервисов по (ip, протокол, порт),
+        определенные -sV не раньше max_age_seconds назад. Учитываются только
+        порты с версией - она появляется лишь при -sV, поэтому угаданные по
+        номеру имена не попадают. Если задан script_intensity, берутся только
+        сканирования, где на порте работали скрипты этой интенсивности, - их
+        вывод переносится вместе с версией (см. load_cached_scripts).
+        """
+        conditions = ["p.state = 'open'", "p.version != ''", "COALESCE(p.version_seen_at, s.created_at) >= ?"]
+        params: List[Any] = [time.time() - max_age_seconds]
+        if script_intensity is not None:
+            conditions.append("(s.scan_type = 'comprehensive' OR json_extract(s.config, '$.script_scan'))")
+            conditions.append("json_extract(s.config, '$.scan_intensity') = ?")
+            params.append(script_intensity)
+
+        with self._lock:
+            # В SQLite остальные колонки берутся из строки с MAX(...)
+            # Старые строки без version_seen_at считаются определенными в момент сканирования
+            rows = self._conn.execute(
+                "SELECT h.ip, h.id AS host_id, p.id AS port_id, p.port, p.protocol, p.service, p.version, "
+                "MAX(COALESCE(p.version_seen_at, s.created_at)) AS seen_at "
+                "FROM ports p JOIN hosts h ON h.id = p.host_id JOIN scans s ON s.id = h.scan_id "
+                f"WHERE {' AND '.join(conditions)} "
+                "GROUP BY h.ip, p.protocol, p.port",
+                params
+            ).fetchall()
+        return {(row['ip'], row['protocol'], row['port']): dict(row) for row in rows}
+
+    def load_cached_scripts(self, port_ids: Iterable[int],
+                            host_ids: Iterable[int]) -> Tuple[Dict[int, Dict[str, str]], Dict[int, Dict[str, str]]]:
+        """
+        Вывод скриптов для переноса из истории: (port_id -> скрипты порта,
+        host_id -> скрипты уровня хоста)
+        """
+        port_scripts: Dict[int, Dict[str, str]] = {}
+        host_scripts: Dict[int, Dict[str, str]] = {}
+        queries = (
+            (list(dict.fromkeys(port_ids)), "port_id IN ({})", 'port_id', port_scripts),
+            (list(dict.fromkeys(host_ids)), "host_id IN ({}) AND port_id IS NULL", 'host_id', host_scripts)
+        )
+        for ids, condition, key, target in queries:
+            # Запросы пачками, чтобы не упереться в лимит параметров SQLite
+            for offset in range(0, len(ids), _QUERY_CHUNK):
+                chunk = ids[offset:offset + _QUERY_CHUNK]
+                with self._lock:
+                    rows = self._conn.execute(
+                        "SELECT host_id, port_id, script_id, output FROM scripts "
+                        f"WHERE {condition.format(', '.join('?' * len(chunk)))} ORDER BY id",
+                        chunk
+                    ).fetchall()
+                for row in rows:
+                    target.setdefault(row[key], {})[row['script_id']] = row['output']
+        return port_scripts, host_scripts
+
+    def find_ports(self, port: int = None, service: str = None, state: str = "open",
+                   limit: int = 1000) -> List[Dict[str, Any]]:
+        """Ищет порты по номеру и/или сервису"""
+        conditions = []
+        params: List[Any] = []
+        if port is not None:
+            conditions.append("p.port = ?")
+            params.append(port)
+        if service:
+            conditions.append("p.service = ?")
+            params.append(service)
+        if state:
+            conditions.append("p.state = ?")
+            params.append(state)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT h.scan_id, h.ip, p.port, p.protocol, p.state, p.service, p.version, s.created_at "
+                "FROM ports p JOIN hosts h ON h.id = p.host_id JOIN scans s ON s.id = h.scan_id "
+                f"{where} ORDER BY s.created_at DESC LIMIT ?",
+                params
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def load_scan(self, scan_id: str) -> Optional[ScanResult]:
+        """Загружает полный результат сканирования из истории"""
+        try:
+            with self._lock:
+                scan_row = self._conn.execute("SELECT * FROM scans WHERE id = ?", (scan_id,)).fetchone()
+                if scan_row is None:
+                    return None
+
+                host_rows = self._conn.execute(
+                    "SELECT * FROM hosts WHERE scan_id = ? ORDER BY id", (scan_id,)
+                ).fetchall()
+                port_rows = self._conn.execute(
+                    "SELECT p.* FROM ports p JOIN hosts h ON h.id = p.host_id "
+                    "WHERE h.scan_id = ? ORDER BY p.id", (scan_id,)
+                ).fetchall()
+                script_rows = self._conn.execute(
+                    "SELECT sc.* FROM scripts sc JOIN hosts h ON h.id = sc.host_id "
+                    "WHERE h.scan_id = ? ORDER BY sc.id", (scan_id,)
+                ).fetchall()
+
+            config = None
+            if scan_row['config']:
+                config = ScanConfig.from_dict(json.loads(scan_row['config']))
+
+            result = ScanResult(
+                scan_id=scan_row['result_scan_id'] or scan_id,
+                config=config,
+                start_time=self._to_datetime(scan_row['start_time']),
+                end_time=self._to_datetime(scan_row['end_time']),
+                status=scan_row['status'] or "completed",
+                raw_xml_blob=RawXmlStore.get_instance().get(scan_row['raw_xml_digest']),
+                script_store=ScriptOutputStore()
+            )
+
+            result.hosts = self._build_hosts(host_rows, port_rows, script_rows, result.script_store)
+
+            return result
+
+        except Exception as e:
+            self.logger.error(f"Error loading scan {scan_id} from history: {e}")
+            return None
+
+    @staticmethod
+    def _build_hosts(host_rows, port_rows, script_rows, script_store: ScriptOutputStore) -> List[HostInfo]:
+        """Собирает HostInfo из строк таблиц hosts, ports и scripts"""
+        hosts_by_id: Dict[int, HostInfo] = {}
+        for row in host_rows:
+            hosts_by_id[row['id']] = HostInfo(
+                ip=row['ip'],
+                hostname=row['hostname'] or "",
+                state=row['state'] or "unknown",
+                os_family=row['os_family'] or "",
+                os_details=row['os_details'] or "",
+                mac=row['mac'] or ""
+            )
+
+        ports_by_id: Dict[int, PortInfo] = {}
+        for row in port_rows:
+            port = PortInfo(
+                port=row['port'],
+                protocol=row['protocol'] or "",
+                state=row['state'] or "unknown",
+                service=row['service'] or "unknown",
+                version=row['version'] or "",
+                reason=row['reason'] or "",
+                version_seen_at=row['version_seen_at']
+            )
+            ports_by_id[row['id']] = port
+            hosts_by_id[row['host_id']].ports.append(port)
+
+        # Раскладываем скрипты так же, как это делает NmapResultParser
+        for row in script_rows:
+            host = hosts_by_id[row['host_id']]
+            output = script_store.intern(row['output'])
+            if row['port_id'] is None:
+                host.scripts[row['script_id']] = output
+            else:
+                port = ports_by_id[row['port_id']]
+                if not hasattr(port, 'scripts'):
+                    port.scripts = {}
+                port.scripts[row['script_id']] = output
+                host.scripts[f"port{port.port}_{row['script_id']}"] = output
+
+        return list(hosts_by_id.values())
+
+    def load_latest_hosts(self, ips: Iterable[str], script_store: ScriptOutputStore = None,
+                          scan_type: str = None) -> Dict[str, HostInfo]:
+        """
+        Загружает последнее сохраненное состояние каждого хоста из списка
+        (в каком бы сканировании он ни встречался, или только среди
+        сканирований типа scan_type)
+        """
+        if script_store is None:
+            script_store = ScriptOutputStore()
+        ips = list(dict.fromkeys(ips))
+        hosts: Dict[str, HostInfo] = {}
+
+        # Запросы пачками, чтобы не упереться в лимит параметров SQLite
+        for offset in range(0, len(ips), _QUERY_CHUNK):
+            chunk = ips[offset:offset + _QUERY_CHUNK]
+            placeholders = ', '.join('?' * len(chunk))
+            type_condition = " AND s.scan_type = ?" if scan_type else ""
+            with self._lock:
+                host_rows = self._conn.execute(
+                    "SELECT h.* FROM hosts h JOIN scans s ON s.id = h.scan_id "
+                    f"WHERE h.ip IN ({placeholders}){type_condition} ORDER BY s.created_at DESC, h.id DESC",
+                    chunk + ([scan_type] if scan_type else [])
+                ).fetchall()
+
+                latest = {}
+                for row in host_rows:
+                    latest.setdefault(row['ip'], row)
+                host_ids = [row['id'] for row in latest.values()]
+                if not host_ids:
+                    continue
+
+                id_placeholders = ', '.join('?' * len(host_ids))
+                port_rows = self._conn.execute(
+                    f"SELECT * FROM ports WHERE host_id IN ({id_placeholders}) ORDER BY id", host_ids
+                ).fetchall()
+                script_rows = self._conn.execute(
+                    f"SELECT * FROM scripts WHERE host_id IN ({id_placeholders}) ORDER BY id", host_ids
+                ).fetchall()
+
+            for host in self._build_hosts(list(latest.values()), port_rows, script_rows, script_store):
+                hosts[host.ip] = host
+
+        return hosts
+
+    def close(self):
+        """Закрывает соединение с базой"""
+        with self._lock:
+            self._conn.close()
+
+    # ---------------------------------------------------------------- helpers
+
+    def _summary_from_row(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Преобразует строку таблицы scans в сводку"""
+        return {
+            'scan_id': row['id'],
+            'result_scan_id': row['result_scan_id'],
+            'status': row['status'],
+            'scan_type': row['scan_type'],
+            'targets': json.loads(row['targets']) if row['targets'] else [],
+            'start_time': self._to_datetime(row['start_time']),
+            'end_time': self._to_datetime(row['end_time']),
+            'created_at': self._to_datetime(row['created_at']),
+            'hosts_count': row['hosts_count'],
+            'open_ports_count': row['open_ports_count']
+        }
+
+    @staticmethod
+    def _to_datetime(value: Optional[float]) -> Optional[datetime]:
+        return datetime.fromtimestamp(value) if value is not None else None
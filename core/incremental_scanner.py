@@ -0,0 +1,312 @@
+import hashlib
+import logging
+from dataclasses import replace
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from core.event_bus import EventBus
+from core.history_store import ScanHistoryStore
+from core.nmap_engine import NmapEngine
+from core.port_model import PortFrequencyModel, format_port_list
+from shared.constants import SMART_PORTS_BASELINE, RESCAN_PROBE_COVERAGE, RESCAN_PROBE_MAX_PORTS
+from shared.models.scan_config import ScanConfig, ScanType
+from shared.models.scan_result import ScanResult, HostInfo, PortInfo
+from shared.utils.script_store import ScriptOutputStore
+
+PortKey = Tuple[str, str, int]  # (ip, протокол, порт)
+
+def host_fingerprint(host: HostInfo, ports: Optional[Set[int]] = None, hostname: Optional[str] = None) -> str:
+    """
+    Отпечаток хоста: хэш набора открытых портов, MAC и имени.
+    Если задан ports, учитываются только эти порты (то, что проверил легкий проход).
+    hostname заменяет имя хоста (например, имя с подписью доменной цели).
+    """
+    open_ports = sorted(f"{port.protocol}/{port.port}" for port in host.ports
+                        if port.state == "open" and (ports is None or port.port in ports))
+    hostname = host.hostname if hostname is None else hostname
+    material = "|".join([",".join(open_ports), host.mac.lower(), hostname.lower()])
+    return hashlib.sha1(material.encode('utf-8')).hexdigest()
+
+class IncrementalScanner:
+    """
+    Инкрементальное сканирование с переиспользованием истории.
+
+    Версии сервисов берутся из кэша отпечатков (последний -sV по порту
+    не старше max-age), а -sV отправляется одним вызовом nmap только на
+    новые или изменившиеся порты.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls, event_bus: EventBus):
+        if cls._instance is None:
+            cls._instance = IncrementalScanner(event_bus)
+        return cls._instance
+
+    def __init__(self, event_bus: EventBus):
+        self.event_bus = event_bus
+        self.nmap_engine = NmapEngine.get_instance(event_bus)
+        self.history_store = ScanHistoryStore.get_instance()
+        self.logger = self._setup_logging()
+
+    def _setup_logging(self):
+        """Настройка логирования"""
+        logging.basicConfig(level=logging.INFO)
+        return logging.getLogger(__name__)
+
+    @staticmethod
+    def wants_version_detection(config: ScanConfig) -> bool:
+        """Есть ли в конфигурации -sV, которое можно сократить"""
+        return (config.scan_type == ScanType.COMPREHENSIVE or
+                (config.scan_type == ScanType.STEALTH and config.service_version))
+
+    def _progress(self, config: ScanConfig, progress: int, status: str):
+        self.event_bus.scan_progress.emit({
+            'scan_id': config.scan_id,
+            'progress': progress,
+            'status': status
+        })
+
+    def execute_service_scan(self, config: ScanConfig) -> ScanResult:
+        """
+        SYN проход без -sV, затем версии из кэша для неизменившихся портов
+        и один целевой -sV вызов для остальных
+        """
+        is_comprehensive = config.scan_type == ScanType.COMPREHENSIVE
+
+        # 1. Быстрый SYN проход: состояние портов без определения версий
+        syn_config = replace(
+            config,
+            scan_type=ScanType.STEALTH,
+            service_version=False,
+            script_scan=False,
+            os_detection=config.os_detection or is_comprehensive
+        )
+        self._progress(config, 5, "Incremental: SYN pass...")
+        result = self.nmap_engine.execute_scan(syn_config)
+        if not result or result.status == "error":
+            return result
+
+        # 2. Сопоставляем открытые порты с кэшем отпечатков. Если нужны скрипты,
+        # кэш берется только из сканирований со скриптами той же интенсивности
+        needs_scripts = config.script_scan or is_comprehensive
+        script_intensity = config.scan_intensity.value if needs_scripts else None
+        try:
+            fingerprints = self.history_store.get_service_fingerprints(config.service_cache_max_age,
+                                                                       script_intensity)
+        except Exception as e:
+            self.logger.warning(f"Service fingerprint cache unavailable: {e}")
+            fingerprints = {}
+
+        reused = 0
+        probe_hosts: List[str] = []
+        probe_ports: Set[int] = set()
+        cached_ports: List[Tuple[HostInfo, PortInfo, int]] = []
+        cached_hosts: Dict[int, HostInfo] = {}  # host_id в истории -> полностью закэшированный хост
+        for host in result.hosts:
+            host_needs_probe = False
+            latest = None
+            for port in host.ports:
+                if port.state != "open":
+                    continue
+                cached = fingerprints.get((host.ip, port.protocol, port.port))
+                if cached:
+                    port.service = cached['service'] or port.service
+                    port.version = cached['version']
+                    # Возраст версии считается от ее -sV, а не от этого сканирования
+                    port.version_seen_at = cached['seen_at']
+                    cached_ports.append((host, port, cached['port_id']))
+                    if latest is None or cached['seen_at'] > latest['seen_at']:
+                        latest = cached
+                    reused += 1
+                else:
+                    host_needs_probe = True
+                    probe_ports.add(port.port)
+            if host_needs_probe:
+                probe_hosts.append(host.ip)
+            elif latest is not None:
+                # Хост целиком из кэша не пробуется - скрипты хоста тоже из истории
+                cached_hosts[latest['host_id']] = host
+
+        if needs_scripts and cached_ports:
+            self._carry_cached_scripts(result, cached_ports, cached_hosts)
+
+        self.logger.info(f"Incremental scan {config.scan_id}: {reused} services reused from cache, "
+                         f"{len(probe_ports)} ports on {len(probe_hosts)} hosts need -sV")
+
+        # 3. Один целевой -sV вызов на новые и изменившиеся порты
+        if probe_hosts:
+            self._progress(config, 50, f"Incremental: version detection on {len(probe_hosts)} hosts...")
+            probe_config = replace(
+                config,
+                targets=probe_hosts,
+                scan_type=ScanType.STEALTH,
+                service_version=True,
+                os_detection=False,
+                script_scan=needs_scripts,
+                port_range=format_port_list(list(probe_ports)),
+                smart_ports=False
+            )
+            probe_result = self.nmap_engine.execute_scan(probe_config)
+            if probe_result and probe_result.status != "error":
+                self._merge_probe(result, probe_result, fingerprints)
+            else:
+                self.logger.warning(f"Version probe for {config.scan_id} failed, keeping SYN results")
+
+        result.config = config
+        return result
+
+    def _carry_cached_scripts(self, result: ScanResult, cached_ports: List[Tuple[HostInfo, PortInfo, int]],
+                              cached_hosts: Dict[int, HostInfo]):
+        """Переносит вывод скриптов портов (и хостов), версии которых взяты из кэша"""
+        try:
+            port_scripts, host_scripts = self.history_store.load_cached_scripts(
+                [port_id for _, _, port_id in cached_ports], cached_hosts.keys())
+        except Exception as e:
+            self.logger.warning(f"Cached script output unavailable: {e}")
+            return
+
+        for host, port, port_id in cached_ports:
+            scripts = port_scripts.get(port_id)
+            if scripts:
+                port.scripts = dict(scripts)
+                for script_id, output in scripts.items():
+                    host.scripts[f"port{port.port}_{script_id}"] = output
+        for host_id, host in cached_hosts.items():
+            for script_id, output in host_scripts.get(host_id, {}).items():
+                host.scripts.setdefault(script_id, output)
+        if result.script_store:
+            for host in {id(host): host for host, _, _ in cached_ports}.values():
+                result.script_store.adopt_host(host)
+
+    @staticmethod
+    def _merge_probe(result: ScanResult, probe: ScanResult, fingerprints: Dict[PortKey, Dict]):
+        """Переносит версии и скрипты целевого -sV прохода в результат SYN прохода"""
+        probed = {}
+        for host in probe.hosts:
+            for port in host.ports:
+                probed[(host.ip, port.protocol, port.port)] = port
+        probe_hosts = {host.ip: host for host in probe.hosts}
+
+        for host in result.hosts:
+            for port in host.ports:
+                key = (host.ip, port.protocol, port.port)
+                # Порты из кэша не трогаем: в общий -p они попали из-за других хостов
+                if key in fingerprints or key not in probed:
+                    continue
+                source = probed[key]
+                port.service = source.service
+                port.version = source.version
+                scripts = getattr(source, 'scripts', None)
+                if scripts:
+                    port.scripts = scripts
+                    for script_id, output in scripts.items():
+                        host.scripts[f"port{port.port}_{script_id}"] = output
+
+            # Скрипты уровня хоста и ОС, если SYN проход их не дал
+            probe_host = probe_hosts.get(host.ip)
+            if probe_host:
+                port_keys = {f"port{port.port}_{script_id}" for port in probe_host.ports
+                             for script_id in getattr(port, 'scripts', {})}
+                for script_id, output in probe_host.scripts.items():
+                    if script_id not in port_keys:
+                        host.scripts.setdefault(script_id, output)
+                if not host.os_family and probe_host.os_family:
+                    host.os_family = probe_host.os_family
+                    host.os_details = probe_host.os_details
+                if result.script_store:
+                    result.script_store.adopt_host(host)
+
+    def _probe_ports(self) -> List[int]:
+        """Порты легкого прохода: самые частые по истории плюс базовый список"""
+        try:
+            ports, _ = PortFrequencyModel.get_instance(self.history_store).top_ports(
+                RESCAN_PROBE_COVERAGE, RESCAN_PROBE_MAX_PORTS)
+        except Exception as e:
+            self.logger.warning(f"Port model unavailable for rescan probe: {e}")
+            ports = []
+        return sorted(set(ports) | set(SMART_PORTS_BASELINE))
+
+    def execute_incremental_rescan(self, config: ScanConfig,
+                                   run_full: Callable[[ScanConfig], ScanResult]) -> ScanResult:
+        """
+        Инкрементальный пересканер: обнаружение хостов с легкой проверкой
+        top-портов, сравнение отпечатков с последним сохраненным состоянием
+        и полный профиль только для новых и изменившихся хостов.
+        Неизменившиеся хосты переносятся из истории.
+        """
+        probe_ports = self._probe_ports()
+
+        # 1. Легкий проход: обнаружение + top-порты, без версий и скриптов
+        probe_config = replace(
+            config,
+            scan_type=ScanType.STEALTH,
+            service_version=False,
+            os_detection=False,
+            script_scan=False,
+            smart_ports=False,
+            incremental=False,
+            incremental_rescan=False,
+            port_range=format_port_list(probe_ports)
+        )
+        self._progress(config, 5, f"Rescan: discovery on {len(probe_ports)} top ports...")
+        probe = self.nmap_engine.execute_scan(probe_config)
+        if not probe or probe.status == "error":
+            return probe
+
+        live_hosts = [host for host in probe.hosts if host.state == "up"]
+
+        # 2. Сравнение с последним известным состоянием каждого хоста
+        merged = ScanResult(
+            scan_id=config.scan_id,
+            config=config,
+            start_time=datetime.now(),
+            status="completed",
+            script_store=ScriptOutputStore()
+        )
+        try:
+            # База - только сканирования того же профиля: хост из Quick или Discovery
+            # беднее и не должен переноситься в результат Comprehensive
+            baseline = self.history_store.load_latest_hosts([host.ip for host in live_hosts], merged.script_store,
+                                                            config.scan_type.value)
+        except Exception as e:
+            self.logger.warning(f"Rescan baseline unavailable, scanning all hosts: {e}")
+            baseline = {}
+
+        probe_set = set(probe_ports)
+        changed: List[str] = []
+        for host in live_hosts:
+            previous = baseline.get(host.ip)
+            # В истории имя уже с подписью доменной цели (ScanManager._label_hosts),
+            # поэтому хост легкого прохода сравнивается с тем же именем
+            hostname = host.hostname
+            if not hostname and config.host_labels.get(host.ip):
+                hostname = ", ".join(config.host_labels[host.ip])
+            if (previous is None or previous.state != "up" or
+                    host_fingerprint(previous, probe_set) != host_fingerprint(host, probe_set, hostname)):
+                changed.append(host.ip)
+            else:
+                previous.state = "up"
+                merged.hosts.append(previous)
+
+        self.logger.info(f"Incremental rescan {config.scan_id}: {len(live_hosts)} live hosts, "
+                         f"{len(merged.hosts)} unchanged carried forward, {len(changed)} to rescan")
+
+        # 3. Полный профиль только для новых и изменившихся хостов
+        if changed:
+            self._progress(config, 30, f"Rescan: full profile on {len(changed)} changed hosts...")
+            full = run_full(replace(config, targets=changed, incremental_rescan=False))
+            if full and full.status != "error":
+                for host in full.hosts:
+                    merged.script_store.adopt_host(host)
+                    merged.hosts.append(host)
+            else:
+                # Полный проход не удался - оставляем хотя бы данные легкого прохода
+                self.logger.warning(f"Full profile for {config.scan_id} failed, keeping probe results")
+                changed_set = set(changed)
+                merged.hosts.extend(host for host in live_hosts if host.ip in changed_set)
+
+        merged.end_time = datetime.now()
+        return merged
+
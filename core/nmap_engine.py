@@ -12,6 +12,47 @@ import logging
 from core.event_bus import EventBus
 from shared.models.scan_config import ScanConfig, ScanType, ScanIntensity  # ОБНОВЛЕННЫЙ ИМПОРТ
 from shared.models.scan_result import ScanResult
+from shared.utils.blob_store import RawXmlStore
+from core.scope_manager import ScopeManager
+from core.port_model import PortFrequencyModel
+
+class HostStream:
+    """
+    Выделяет завершенные элементы <host> из XML, который nmap пишет в stdout,
+    и публикует разобранные хосты через hosts_discovered, не дожидаясь конца
+    сканирования. Итоговый результат по-прежнему строится из полного XML.
+    """
+    
+    def __init__(self, event_bus: EventBus, scan_config: ScanConfig):
+        self.event_bus = event_bus
+        self.scan_id = scan_config.scan_id
+        self.published = 0
+        self._lines: Optional[List[str]] = None
+    
+    def feed(self, line: str):
+        """Принимает очередную строку XML (уже без пробелов по краям)"""
+        if self._lines is None:
+            # <hostnames>/<hostscript> тоже начинаются с <host - отсекаем их.
+            # При -sn nmap пишет <host><status .../> одной строкой
+            if not (line.startswith('<host>') or line.startswith('<host ')):
+                return
+            self._lines = []
+        self._lines.append(line)
+        if line.endswith('</host>'):
+            host_xml = '\n'.join(self._lines)
+            self._lines = None
+            self._publish(host_xml)
+    
+    def _publish(self, host_xml: str):
+        from core.result_parser import NmapResultParser
+        host = NmapResultParser.get_instance().parse_host_xml(host_xml)
+        if host is None or host.state != "up":
+            return
+        self.published += 1
+        self.event_bus.hosts_discovered.emit({
+            'scan_id': self.scan_id,
+            'hosts': [host]
+        })
 
 class NmapEngine:
     """Движок для выполнения nmap сканирований"""
@@ -101,8 +142,7 @@ class NmapEngine:
                     scan_id=scan_config.scan_id,
                     config=scan_config,
                     hosts=[],
-                    status="timeout",
-                    raw_xml=""
+                    status="timeout"
                 )
             
             # Даем потоку время завершиться
@@ -130,8 +170,7 @@ class NmapEngine:
                 scan_id=scan_config.scan_id,
                 config=scan_config,
                 hosts=[],
-                status="error",
-                raw_xml=""
+                status="error"
             )
 
     def execute_comprehensive_scan(self, scan_config: ScanConfig) -> ScanResult:
@@ -192,8 +231,7 @@ class NmapEngine:
                     scan_id=scan_config.scan_id,
                     config=scan_config,
                     hosts=[],
-                    status="timeout",
-                    raw_xml=""
+                    status="timeout"
                 )
             
             # Парсим результаты
@@ -218,8 +256,7 @@ class NmapEngine:
                 scan_id=scan_config.scan_id,
                 config=scan_config,
                 hosts=[],
-                status="error",
-                raw_xml=""
+                status="error"
             )
     
     def _build_comprehensive_command(self, scan_config: ScanConfig) -> str:
@@ -238,6 +275,15 @@ class NmapEngine:
         elif scan_config.scan_intensity == ScanIntensity.PENETRATION:
             cmd_parts.append("--script=safe,default,version,discovery,vuln,exploit")
         
+        # Список портов по истории сканирований вместо стандартного
+        smart_port_spec = self._smart_port_spec(scan_config)
+        if smart_port_spec:
+            cmd_parts.append(f"-p {smart_port_spec}")
+        
+        # Исключения области сканирования
+        if scan_config.exclude_file:
+            cmd_parts.append(ScopeManager.exclude_option(scan_config))
+        
         # Добавляем цели
         cmd_parts.extend(scan_config.targets)
         
@@ -254,6 +300,7 @@ class NmapEngine:
             in_xml = False
             last_progress = 0
             script_output_buffer = []
+            host_stream = HostStream(self.event_bus, scan_config)
             
             # Читаем stdout
             for line in process.stdout:
@@ -266,6 +313,7 @@ class NmapEngine:
                 
                 if in_xml:
                     xml_content.append(line)
+                    host_stream.feed(line)
                     # Проверяем конец XML
                     if '</nmaprun>' in line:
                         break
@@ -290,6 +338,7 @@ class NmapEngine:
             if xml_content:
                 with open(xml_file_path, 'w', encoding='utf-8') as f:
                     f.write('\n'.join(xml_content))
+            self.logger.debug(f"Streamed {host_stream.published} hosts of {scan_config.scan_id}")
                     
         except Exception as e:
             self.logger.error(f"Error processing nmap output: {e}")
@@ -308,6 +357,7 @@ class NmapEngine:
             xml_content = []
             in_xml = False
             last_progress = 0
+            host_stream = HostStream(self.event_bus, scan_config)
             
             for line in process.stdout:
                 line = line.strip()
@@ -318,6 +368,7 @@ class NmapEngine:
                 
                 if in_xml:
                     xml_content.append(line)
+                    host_stream.feed(line)
                     if '</nmaprun>' in line:
                         break
                 else:
@@ -446,6 +497,13 @@ class NmapEngine:
             pass
         return None
 
+    @staticmethod
+    def _smart_port_spec(scan_config: ScanConfig) -> Optional[str]:
+        """Аргумент -p по модели частот портов (None - smart ports выключены или истории мало)"""
+        if not scan_config.smart_ports or scan_config.scan_type in [ScanType.DISCOVERY, ScanType.CUSTOM]:
+            return None
+        return PortFrequencyModel.get_instance().build_port_spec(scan_config.smart_ports_coverage)
+
     def _build_nmap_command(self, scan_config: ScanConfig) -> str:
         """
         Строит команду nmap из конфигурации - УЛУЧШЕННАЯ ВЕРСИЯ
@@ -456,9 +514,15 @@ class NmapEngine:
         if scan_config.timing_template:
             cmd_parts.append(f"-{scan_config.timing_template}")
         
+        # Список портов по истории сканирований вместо стандартного
+        smart_port_spec = self._smart_port_spec(scan_config)
+        
         # Тип сканирования
         if scan_config.scan_type == ScanType.QUICK:
-            cmd_parts.append("-F")  # Быстрое сканирование основных портов
+            if smart_port_spec:
+                cmd_parts.append(f"-p {smart_port_spec}")
+            else:
+                cmd_parts.append("-F")  # Быстрое сканирование основных портов
         elif scan_config.scan_type == ScanType.STEALTH:
             cmd_parts.append("-sS")
         elif scan_config.scan_type == ScanType.COMPREHENSIVE:
@@ -469,6 +533,8 @@ class NmapEngine:
             # Для кастомного сканирования используем пользовательскую команду
             if scan_config.custom_command and scan_config.custom_command.strip():
                 custom_cmd = scan_config.custom_command.strip()
+                if scan_config.exclude_file and "--excludefile" not in custom_cmd:
+                    custom_cmd += f" {ScopeManager.exclude_option(scan_config)}"
                 if "-oX" not in custom_cmd:
                     custom_cmd += " -oX -"
                 return custom_cmd
@@ -494,9 +560,15 @@ class NmapEngine:
                     cmd_parts.append("--script=safe,default,version,discovery,vuln,exploit")
         
         # Диапазон портов (не для quick и discovery)
-        if (scan_config.port_range and 
-            scan_config.scan_type not in [ScanType.QUICK, ScanType.DISCOVERY]):
-            cmd_parts.append(f"-p {scan_config.port_range}")
+        if scan_config.scan_type not in [ScanType.QUICK, ScanType.DISCOVERY]:
+            if smart_port_spec:
+                cmd_parts.append(f"-p {smart_port_spec}")
+            elif scan_config.port_range:
+                cmd_parts.append(f"-p {scan_config.port_range}")
+        
+        # Исключения области сканирования
+        if scan_config.exclude_file:
+            cmd_parts.append(ScopeManager.exclude_option(scan_config))
         
         # Цели
         cmd_parts.extend(scan_config.targets)
@@ -520,8 +592,7 @@ class NmapEngine:
                     scan_id=scan_config.scan_id,
                     config=scan_config,
                     hosts=[],
-                    status="error",
-                    raw_xml=""
+                    status="error"
                 )
             
             file_size = os.path.getsize(xml_file_path)
@@ -531,8 +602,7 @@ class NmapEngine:
                     scan_id=scan_config.scan_id,
                     config=scan_config,
                     hosts=[],
-                    status="error",
-                    raw_xml=""
+                    status="error"
                 )
             
             self.logger.info(f"XML file size: {file_size} bytes")
@@ -546,10 +616,12 @@ class NmapEngine:
                     scan_id=scan_config.scan_id,
                     config=scan_config,
                     hosts=[],
-                    status="error", 
-                    raw_xml=""
+                    status="error"
                 )
             
+            # Исходный XML один раз сжимаем на диск, в памяти держим только ссылку
+            raw_xml_blob = self._store_raw_xml(xml_file_path)
+            
             # Проверяем что XML валидный
             if not xml_content.startswith('<?xml'):
                 self.logger.warning("XML content doesn't start with <?xml")
@@ -558,13 +630,14 @@ class NmapEngine:
                     config=scan_config,
                     hosts=[],
                     status="error",
-                    raw_xml=xml_content
+                    raw_xml_blob=raw_xml_blob
                 )
             
             from core.result_parser import NmapResultParser
             parser = NmapResultParser.get_instance()
             
             result = parser.parse_xml(xml_content, scan_config)
+            result.raw_xml_blob = raw_xml_blob
             self.logger.info(f"Parsed {len(result.hosts)} hosts from XML")
             return result
             
@@ -574,10 +647,17 @@ class NmapEngine:
                 scan_id=scan_config.scan_id,
                 config=scan_config,
                 hosts=[],
-                status="error",
-                raw_xml=""
+                status="error"
             )
     
+    def _store_raw_xml(self, xml_file_path: str):
+        """Сохраняет XML вывод в сжатое хранилище"""
+        try:
+            return RawXmlStore.get_instance().put_file(xml_file_path)
+        except Exception as e:
+            self.logger.warning(f"Failed to store raw XML: {e}")
+            return None
+    
     def stop_scan(self, scan_id: str):
         """Останавливает сканирование"""
         if scan_id in self.active_processes:
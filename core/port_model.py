@@ -0,0 +1,119 @@
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from core.history_store import ScanHistoryStore
+from shared.constants import (SMART_PORTS_COVERAGE, SMART_PORTS_MAX, SMART_PORTS_MIN_OBSERVATIONS,
+                              SMART_PORTS_REFRESH_SECONDS, SMART_PORTS_BASELINE)
+
+def format_port_list(ports: List[int]) -> str:
+    """Сворачивает список портов в компактную строку для -p: 22,80,8000-8010"""
+    parts = []
+    ordered = sorted(set(ports))
+    index = 0
+    while index < len(ordered):
+        start = end = ordered[index]
+        while index + 1 < len(ordered) and ordered[index + 1] == end + 1:
+            index += 1
+            end = ordered[index]
+        parts.append(str(start) if start == end else f"{start}-{end}")
+        index += 1
+    return ",".join(parts)
+
+class PortFrequencyModel:
+    """
+    Модель частоты открытых портов по истории сканирований.
+
+    Частота порта - число разных хостов, на которых он был открыт. Список
+    top-K строится жадно: порты добавляются по убыванию частоты, пока не
+    покрыта нужная доля всех наблюдений открытых портов.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls, history_store: ScanHistoryStore = None):
+        if cls._instance is None:
+            cls._instance = PortFrequencyModel(history_store or ScanHistoryStore.get_instance())
+        return cls._instance
+
+    def __init__(self, history_store: ScanHistoryStore):
+        self.history_store = history_store
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._frequencies: Dict[str, List[Tuple[int, int]]] = {}
+        self._loaded_at: Dict[str, float] = {}
+
+    def get_frequencies(self, protocol: str = "tcp") -> List[Tuple[int, int]]:
+        """Возвращает (порт, число хостов), самые частые первыми; кэшируется"""
+        with self._lock:
+            # Без отметки загрузки кэш не используется: monotonic() вскоре после
+            # старта системы может быть меньше периода обновления
+            loaded_at = self._loaded_at.get(protocol)
+            if (loaded_at is not None and protocol in self._frequencies
+                    and time.monotonic() - loaded_at < SMART_PORTS_REFRESH_SECONDS):
+                return self._frequencies[protocol]
+
+        rows = self.history_store.get_port_frequencies(protocol)
+        frequencies = [(row['port'], row['hosts']) for row in rows]
+
+        with self._lock:
+            self._frequencies[protocol] = frequencies
+            self._loaded_at[protocol] = time.monotonic()
+        return frequencies
+
+    def invalidate(self):
+        """Сбрасывает кэш (например, после очистки истории)"""
+        with self._lock:
+            self._loaded_at.clear()
+
+    def top_ports(self, coverage: float = SMART_PORTS_COVERAGE, max_ports: int = SMART_PORTS_MAX,
+                  protocol: str = "tcp") -> Tuple[List[int], float]:
+        """
+        Возвращает минимальный список портов, покрывающий долю coverage
+        исторически открытых сервисов, и фактическое покрытие
+        """
+        frequencies = self.get_frequencies(protocol)
+        total = sum(hosts for _, hosts in frequencies)
+        if not total:
+            return [], 0.0
+
+        ports = []
+        covered = 0
+        for port, hosts in frequencies:
+            if covered >= coverage * total or len(ports) >= max_ports:
+                break
+            ports.append(port)
+            covered += hosts
+        return ports, covered / total
+
+    def coverage_of(self, ports: List[int], protocol: str = "tcp") -> float:
+        """Какую долю исторически открытых сервисов покрывает список портов"""
+        frequencies = self.get_frequencies(protocol)
+        total = sum(hosts for _, hosts in frequencies)
+        if not total:
+            return 0.0
+        selected = set(ports)
+        return sum(hosts for port, hosts in frequencies if port in selected) / total
+
+    def build_port_spec(self, coverage: float = SMART_PORTS_COVERAGE) -> Optional[str]:
+        """
+        Строит аргумент для -p по истории. None - если истории недостаточно
+        и нужно оставить стандартный список nmap.
+        """
+        try:
+            frequencies = self.get_frequencies("tcp")
+        except Exception as e:
+            self.logger.warning(f"Failed to load port frequencies: {e}")
+            return None
+
+        observations = sum(hosts for _, hosts in frequencies)
+        if observations < SMART_PORTS_MIN_OBSERVATIONS:
+            return None
+
+        ports, covered = self.top_ports(coverage)
+        spec = format_port_list(ports + SMART_PORTS_BASELINE)
+        self.logger.info(f"Smart port list: {len(ports)} historical ports cover {covered:.1%} "
+                         f"of {observations} open port observations")
+        return spec
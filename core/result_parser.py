@@ -5,6 +5,7 @@ from datetime import datetime
 
 from shared.models.scan_result import ScanResult, HostInfo, PortInfo
 from shared.models.scan_config import ScanConfig
+from shared.utils.script_store import ScriptOutputStore
 
 class NmapResultParser:
     """Парсер результатов nmap сканирования"""
@@ -33,7 +34,8 @@ class NmapResultParser:
                 scan_id=scan_config.scan_id,
                 config=scan_config,
                 start_time=datetime.now(),
-                status="completed"
+                status="completed",
+                script_store=ScriptOutputStore()
             )
             
             # Парсим информацию о сканировании
@@ -41,12 +43,14 @@ class NmapResultParser:
             
             # Парсим хосты
             for host_element in root.findall('.//host'):
-                host_info = self._parse_host(host_element)
+                host_info = self._parse_host(host_element, scan_result.script_store)
                 if host_info:
                     scan_result.hosts.append(host_info)
             
             scan_result.end_time = datetime.now()
             self.logger.info(f"Parsed {len(scan_result.hosts)} hosts from nmap output")
+            if scan_result.script_store.references:
+                self.logger.info(f"Script output dedupe: {scan_result.script_store.get_summary()}")
             
             return scan_result
             
@@ -55,17 +59,21 @@ class NmapResultParser:
             return ScanResult(
                 scan_id=scan_config.scan_id,
                 config=scan_config,
-                status="error",
-                raw_xml=xml_content
+                status="error"
             )
     
+    def parse_host_xml(self, host_xml: str) -> Optional[HostInfo]:
+        """Парсит отдельный элемент <host> (потоковый вывод nmap до завершения сканирования)"""
+        try:
+            return self._parse_host(ET.fromstring(host_xml))
+        except ET.ParseError as e:
+            self.logger.warning(f"Malformed host element in nmap output: {e}")
+            return None
+    
     def _parse_scan_info(self, root: ET.Element, scan_result: ScanResult):
         """Парсит общую информацию о сканировании"""
         try:
-            scan_info = root.find('scaninfo')
-            if scan_info is not None:
-                scan_result.raw_xml = ET.tostring(root, encoding='unicode')
-                
+            # Исходный XML не дублируем в памяти - NmapEngine сохраняет его на диск
             # Парсим время начала и окончания
             start_time = root.get('start')
             if start_time:
@@ -77,7 +85,7 @@ class NmapResultParser:
         except:
             pass
     
-    def _parse_host(self, host_element: ET.Element) -> Optional[HostInfo]:
+    def _parse_host(self, host_element: ET.Element, script_store: ScriptOutputStore = None) -> Optional[HostInfo]:
         """Парсит информацию о хосте - УЛУЧШЕННАЯ ВЕРСИЯ"""
         try:
             # IP адрес
@@ -94,6 +102,13 @@ class NmapResultParser:
             
             host_info = HostInfo(ip=ip)
             
+            # MAC адрес (только для хостов в локальном сегменте)
+            mac_element = host_element.find("address[@addrtype='mac']")
+            if mac_element is not None:
+                host_info.mac = mac_element.get('addr', '')
+            if script_store is None:
+                script_store = ScriptOutputStore()
+            
             # Hostname - ИСПРАВЛЕННЫЙ ПАРСИНГ
             hostnames_element = host_element.find('hostnames')
             if hostnames_element is not None:
@@ -114,7 +129,7 @@ class NmapResultParser:
             # Парсим порты - ВАЖНО: проверяем наличие открытых портов
             ports_element = host_element.find('ports')
             if ports_element is not None:
-                host_info.ports = self._parse_ports(ports_element)
+                host_info.ports = self._parse_ports(ports_element, script_store)
                 self.logger.info(f"Found {len(host_info.ports)} ports for host {ip}")
             
             # Парсим информацию об ОС - УЛУЧШЕННЫЙ ПАРСИНГ
@@ -125,10 +140,10 @@ class NmapResultParser:
             # Парсим скрипты nmap - ВАЖНО ДЛЯ УЯЗВИМОСТЕЙ
             hostscript_element = host_element.find('hostscript')
             if hostscript_element is not None:
-                self._parse_host_scripts(hostscript_element, host_info)
+                self._parse_host_scripts(hostscript_element, host_info, script_store)
             
             # Парсим скрипты портов - ДОБАВЛЯЕМ ДЛЯ УЯЗВИМОСТЕЙ
-            self._parse_port_scripts(host_element, host_info)
+            self._parse_port_scripts(host_info)
             
             self.logger.info(f"Parsed host {ip}: {len(host_info.ports)} ports, OS: {host_info.os_family}")
             return host_info
@@ -137,7 +152,7 @@ class NmapResultParser:
             self.logger.error(f"Error parsing host: {e}")
             return None
     
-    def _parse_ports(self, ports_element: ET.Element) -> List[PortInfo]:
+    def _parse_ports(self, ports_element: ET.Element, script_store: ScriptOutputStore) -> List[PortInfo]:
         """Парсит информацию о портах - УЛУЧШЕННАЯ ВЕРСИЯ"""
         ports = []
         
@@ -194,11 +209,10 @@ class NmapResultParser:
                     script_id = script_element.get('id')
                     script_output = script_element.get('output', '')
                     if script_id and script_output:
-                        port_scripts[script_id] = script_output
+                        port_scripts[script_id] = script_store.intern(script_output)
                 
                 if port_scripts:
-                    # Сохраняем скрипты в host_info для легкого доступа
-                    # Они будут добавлены позже в _parse_port_scripts
+                    # Ссылки на эти же строки добавляются в host_info в _parse_port_scripts
                     port_info.scripts = port_scripts
                 
                 ports.append(port_info)
@@ -251,7 +265,8 @@ class NmapResultParser:
         except Exception as e:
             self.logger.debug(f"Error parsing OS info: {e}")
     
-    def _parse_host_scripts(self, hostscript_element: ET.Element, host_info: HostInfo):
+    def _parse_host_scripts(self, hostscript_element: ET.Element, host_info: HostInfo,
+                            script_store: ScriptOutputStore):
         """Парсит скрипты nmap на уровне хоста"""
         try:
             for script_element in hostscript_element.findall('script'):
@@ -259,7 +274,7 @@ class NmapResultParser:
                 script_output = script_element.get('output', '')
                 
                 if script_id and script_output:
-                    host_info.scripts[script_id] = script_output
+                    host_info.scripts[script_id] = script_store.intern(script_output)
                     
                     # Анализируем специфические скрипты для уязвимостей
                     if script_id == "smb-os-discovery":
@@ -272,42 +287,17 @@ class NmapResultParser:
         except Exception as e:
             self.logger.debug(f"Error parsing host scripts: {e}")
     
-    def _parse_port_scripts(self, host_element: ET.Element, host_info: HostInfo):
-        """Парсит скрипты для каждого порта - НОВЫЙ МЕТОД ДЛЯ УЯЗВИМОСТЕЙ"""
+    def _parse_port_scripts(self, host_info: HostInfo):
+        """Добавляет скрипты портов в host_info - НОВЫЙ МЕТОД ДЛЯ УЯЗВИМОСТЕЙ"""
         try:
-            ports_element = host_element.find('ports')
-            if ports_element is None:
-                return
-                
-            for port_element in ports_element.findall('port'):
-                port_id = port_element.get('portid')
-                if not port_id:
-                    continue
+            for port in host_info.ports:
+                for script_id, script_output in getattr(port, 'scripts', {}).items():
+                    # Ключ с привязкой к порту ссылается на ту же строку, что и port.scripts
+                    host_info.scripts[f"port{port.port}_{script_id}"] = script_output
                     
-                # Находим соответствующий порт в host_info
-                target_port = None
-                for port in host_info.ports:
-                    if str(port.port) == port_id:
-                        target_port = port
-                        break
-                
-                if not target_port:
-                    continue
-                
-                # Парсим скрипты для этого порта
-                script_elements = port_element.findall('script')
-                for script_element in script_elements:
-                    script_id = script_element.get('id')
-                    script_output = script_element.get('output', '')
-                    
-                    if script_id and script_output:
-                        # Сохраняем скрипт в информации о хосте с привязкой к порту
-                        script_key = f"port{port_id}_{script_id}"
-                        host_info.scripts[script_key] = script_output
-                        
-                        # Логируем скрипты уязвимостей
-                        if any(keyword in script_id.lower() for keyword in ['vuln', 'exploit', 'safe']):
-                            self.logger.info(f"Found {script_id} on port {port_id}")
+                    # Логируем скрипты уязвимостей
+                    if any(keyword in script_id.lower() for keyword in ['vuln', 'exploit', 'safe']):
+                        self.logger.info(f"Found {script_id} on port {port.port}")
         
         except Exception as e:
             self.logger.debug(f"Error parsing port scripts: {e}")
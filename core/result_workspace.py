@@ -0,0 +1,246 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from core.event_bus import EventBus
+from core.event_dispatch import DeliveryMode
+from core.history_store import ScanHistoryStore
+from shared.constants import RESULT_WORKSPACE_BUDGET_MB
+from shared.models.scan_result import HostInfo, ScanResult
+
+def estimate_host_size(host: HostInfo) -> int:
+    """Грубая оценка памяти хоста в байтах: объекты, порты и выводы скриптов"""
+    size = 600 + len(host.ip) + len(host.hostname) + len(host.os_details)
+    for port in host.ports:
+        size += 250 + len(port.service) + len(port.version)
+    for output in host.scripts.values():
+        size += 80 + len(output)
+    return size
+
+@dataclass
+class WorkspaceEntry:
+    """Сканирование, открытое в рабочем пространстве"""
+    scan_id: str
+    result: Optional[ScanResult] = None   # None - вытеснен в историю, загрузится по запросу
+    refs: int = 0                          # Сколько вкладок держат результат
+    final: bool = False                    # Сканирование завершено - результат больше не меняется
+    size_bytes: int = 0
+    sized_hosts: int = 0                   # Сколько хостов уже учтено в size_bytes
+    summary: Dict[str, Any] = field(default_factory=dict)
+    opened_at: float = field(default_factory=time.time)
+    last_used: float = 0.0
+
+class ResultHandle:
+    """
+    Ссылка вкладки на результат в рабочем пространстве. Пока ссылка не
+    отпущена, результат не вытесняется из памяти.
+    """
+
+    def __init__(self, workspace: 'ResultWorkspace', scan_id: str):
+        self.workspace = workspace
+        self.scan_id = scan_id
+        self.released = False
+
+    @property
+    def result(self) -> Optional[ScanResult]:
+        return None if self.released else self.workspace.peek(self.scan_id)
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.workspace.release(self.scan_id)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+class ResultWorkspace:
+    """
+    Общее рабочее пространство результатов, открытых в приложении.
+
+    Результаты хранятся по scan_id; вкладки берут их через acquire и
+    получают ResultHandle со счетчиком ссылок. Когда оценка занятой памяти
+    превышает бюджет, давно не использованные завершенные результаты без
+    ссылок освобождаются, если они уже есть в истории (сохраняет их
+    ScanManager после завершения); сканирование при этом остается открытым
+    и при следующем acquire загружается из истории без повторного разбора
+    XML nmap. История проверяется вне блокировки рабочего пространства,
+    чтобы GUI поток не ждал SQLite.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls, event_bus: EventBus, history_store: ScanHistoryStore = None):
+        if cls._instance is None:
+            cls._instance = ResultWorkspace(event_bus, history_store or ScanHistoryStore.get_instance())
+        return cls._instance
+
+    def __init__(self, event_bus: EventBus, history_store: ScanHistoryStore):
+        self.event_bus = event_bus
+        self.history_store = history_store
+        self.budget_bytes = RESULT_WORKSPACE_BUDGET_MB * 1024 * 1024
+        self.logger = self._setup_logging()
+
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[str, WorkspaceEntry]" = OrderedDict()  # От давно использованных к свежим
+        self.evictions = 0
+        self.reloads = 0
+
+        # Результат регистрируется до того, как вкладки получат событие из очереди
+        self.event_bus.connect_signal('results_updated', self._on_results, DeliveryMode.DIRECT)
+        self.event_bus.connect_signal('scan_completed', self._on_results, DeliveryMode.DIRECT)
+
+    def _setup_logging(self):
+        """Настройка логирования"""
+        logging.basicConfig(level=logging.INFO)
+        return logging.getLogger(__name__)
+
+    def _on_results(self, data):
+        results = data.get('results')
+        scan_id = data.get('scan_id')
+        if isinstance(results, ScanResult) and scan_id:
+            # Частичные результаты шардов еще дописываются; финал - scan_completed или полное обновление
+            self.put(scan_id, results, final=not data.get('partial', False))
+
+    def put(self, scan_id: str, result: ScanResult, final: bool = False, acquire: bool = False):
+        """Добавляет или обновляет результат сканирования (acquire - сразу взять ссылку)"""
+        with self._lock:
+            entry = self._entries.get(scan_id)
+            is_new = entry is None
+            if is_new:
+                entry = self._entries[scan_id] = WorkspaceEntry(scan_id)
+            if entry.result is not result:
+                entry.result = result
+                entry.size_bytes = entry.sized_hosts = 0
+            # Хосты результата только дописываются - досчитываем размер новых
+            for host in result.hosts[entry.sized_hosts:]:
+                entry.size_bytes += estimate_host_size(host)
+            entry.sized_hosts = len(result.hosts)
+            entry.final = entry.final or final
+            entry.summary = {
+                'hosts': len(result.hosts),
+                'status': result.status,
+                'targets': list(result.config.targets) if result.config else []
+            }
+            if acquire:
+                # Ссылка берется до проверки бюджета, иначе результат может быть сразу вытеснен
+                entry.refs += 1
+            self._touch(entry)
+
+        evicted = self._enforce_budget()
+        if is_new:
+            self._notify('opened', scan_id)
+        for evicted_id in evicted:
+            self._notify('evicted', evicted_id)
+
+    def acquire(self, scan_id: str, result: ScanResult = None) -> Optional[ResultHandle]:
+        """
+        Берет ссылку на результат. Вытесненный или только сохраненный в
+        истории результат загружается из нее. None - сканирования нет нигде.
+        """
+        final = False
+        if result is None:
+            result = self.peek(scan_id)
+        if result is None:
+            result = self.history_store.load_scan(scan_id)
+            if result is None:
+                return None
+            with self._lock:
+                self.reloads += 1
+            final = True
+        self.put(scan_id, result, final=final, acquire=True)
+        return ResultHandle(self, scan_id)
+
+    def release(self, scan_id: str):
+        with self._lock:
+            entry = self._entries.get(scan_id)
+            if entry is None or entry.refs == 0:
+                return
+            entry.refs -= 1
+        for evicted_id in self._enforce_budget():
+            self._notify('evicted', evicted_id)
+
+    def peek(self, scan_id: str) -> Optional[ScanResult]:
+        """Результат в памяти (без загрузки из истории)"""
+        with self._lock:
+            entry = self._entries.get(scan_id)
+            if entry is None or entry.result is None:
+                return None
+            self._touch(entry)
+            return entry.result
+
+    def close(self, scan_id: str) -> bool:
+        """Закрывает сканирование, если его не держит ни одна вкладка"""
+        with self._lock:
+            entry = self._entries.get(scan_id)
+            if entry is None or entry.refs > 0:
+                return False
+            del self._entries[scan_id]
+        self._notify('closed', scan_id)
+        return True
+
+    def _touch(self, entry: WorkspaceEntry):
+        entry.last_used = time.time()
+        self._entries.move_to_end(entry.scan_id)
+
+    def memory_usage(self) -> int:
+        with self._lock:
+            return sum(entry.size_bytes for entry in self._entries.values() if entry.result is not None)
+
+    def _enforce_budget(self) -> List[str]:
+        """Вытесняет давно не использованные результаты, пока память не уложится в бюджет"""
+        with self._lock:
+            if self.memory_usage() <= self.budget_bytes:
+                return []
+            candidates = [entry.scan_id for entry in self._entries.values()
+                          if entry.result is not None and entry.refs == 0 and entry.final]
+
+        evicted = []
+        for scan_id in candidates:
+            # Освобождаем только то, что уже в истории; еще не сохраненный результат
+            # останется в памяти до следующей проверки бюджета
+            if not self.history_store.has_scan(scan_id):
+                continue
+            with self._lock:
+                if self.memory_usage() <= self.budget_bytes:
+                    break
+                entry = self._entries.get(scan_id)
+                # Пока шла проверка истории, результат могли взять или обновить
+                if entry is None or entry.result is None or entry.refs > 0 or not entry.final:
+                    continue
+                entry.result = None
+                entry.size_bytes = entry.sized_hosts = 0
+                self.evictions += 1
+            evicted.append(scan_id)
+            self.logger.info(f"Evicted {scan_id} from workspace ({entry.summary.get('hosts', 0)} hosts)")
+        return evicted
+
+    def _notify(self, action: str, scan_id: str):
+        self.event_bus.workspace_changed.emit({'action': action, 'scan_id': scan_id,
+                                               'scans': self.list_scans()})
+
+    def list_scans(self) -> List[Dict[str, Any]]:
+        """Открытые сканирования, последние открытые первыми"""
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda entry: entry.opened_at, reverse=True)
+            return [{'scan_id': entry.scan_id, 'in_memory': entry.result is not None, 'refs': entry.refs,
+                     'final': entry.final, **entry.summary}
+                    for entry in entries]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            in_memory = sum(1 for entry in self._entries.values() if entry.result is not None)
+            return {
+                'open_scans': len(self._entries),
+                'in_memory': in_memory,
+                'memory_bytes': self.memory_usage(),
+                'budget_bytes': self.budget_bytes,
+                'evictions': self.evictions,
+                'reloads': self.reloads
+            }
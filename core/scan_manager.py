@@ -1,15 +1,30 @@
+import json
 import threading
 import queue
 import uuid
 import time
 import logging
-from typing import Dict, List
+from collections import deque
+from dataclasses import replace
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
 from enum import Enum
 
 from core.event_bus import EventBus
+from core.event_dispatch import DeliveryMode, QueuePolicy
 from core.nmap_engine import NmapEngine
-from shared.models.scan_config import ScanConfig
+from core.history_store import ScanHistoryStore
+from core.scope_manager import ScopeManager
+from core.dns_resolver import DnsResolver
+from core.target_prioritizer import TargetPrioritizer
+from core.incremental_scanner import IncrementalScanner
+from core.scheduler import ScanScheduler
+from shared.constants import HISTORY_CACHE_SIZE, BATCH_SHARD_SIZE
+from shared.models.scan_config import ScanConfig, ScanType
 from shared.models.scan_result import ScanResult
+from shared.utils.validators import TargetSet, split_targets
+from shared.utils.scan_diff import ScanDiff, diff_scans
+from shared.utils.script_store import ScriptOutputStore
 
 class ScanStatus(Enum):
     PENDING = "pending"
@@ -27,6 +42,12 @@ class ScanJob:
         self.result = None
         self.progress = 0
         self.thread = None
+        self.summary: Dict[str, Any] = {}
+        self.finished_at: Optional[float] = None
+        # Пакетная отправка: объединенное задание выполняет исходные запросы-подписчики
+        self.subscribers: List['ScanJob'] = []
+        self.parent_id: Optional[str] = None
+        self.is_carrier = False  # Задание только выполняет чужие запросы, само запросом не является
 
 class ScanManager:
     _instance = None
@@ -41,20 +62,34 @@ class ScanManager:
         self.event_bus = event_bus
         self.scan_queue = queue.Queue()
         self.active_scans: Dict[str, ScanJob] = {}
-        self.scan_history: List[ScanJob] = []
+        # Защищает присоединение запросов к идущим заданиям от гонки с их завершением;
+        # все изменения active_scans выполняются под ним
+        self._jobs_lock = threading.RLock()
+        # Ограниченный кэш сводок; полные результаты лежат в history_store
+        self.scan_history: Deque[ScanJob] = deque(maxlen=HISTORY_CACHE_SIZE)
         self.is_running = True
         self.nmap_engine = NmapEngine.get_instance(event_bus)
+        self.history_store = ScanHistoryStore.get_instance()
+        self.scope_manager = ScopeManager.get_instance()
+        self.dns_resolver = DnsResolver.get_instance()
+        self.target_prioritizer = TargetPrioritizer.get_instance(self.history_store)
+        self.incremental_scanner = IncrementalScanner.get_instance(event_bus)
         self.logger = self._setup_logging()
         
         # Подписываемся на события
-        self.event_bus.scan_progress.connect(self._on_scan_progress)
-        self.event_bus.scan_paused.connect(self._on_scan_paused)
-        self.event_bus.scan_resumed.connect(self._on_scan_resumed)
-        self.event_bus.scan_stopped.connect(self._on_scan_stopped)
+        # Прогресс обрабатывается в пуле шины: поток nmap не ждет GUI поток
+        self.event_bus.connect_signal('scan_progress', self._on_scan_progress, DeliveryMode.POOL,
+                                      policy=QueuePolicy.MERGE)
+        self.event_bus.connect_signal('scan_paused', self._on_scan_paused)
+        self.event_bus.connect_signal('scan_resumed', self._on_scan_resumed)
+        self.event_bus.connect_signal('scan_stopped', self._on_scan_stopped)
         
         # Запускаем worker thread
         self.worker_thread = threading.Thread(target=self._process_queue, daemon=True)
         self.worker_thread.start()
+        
+        # Повторяющиеся сканирования по расписанию
+        self.scheduler = ScanScheduler.get_instance(self)
 
     def _setup_logging(self):
         """Настройка логирования"""
@@ -63,17 +98,139 @@ class ScanManager:
     
     def submit_scan(self, config: ScanConfig) -> str:
         """Добавляет сканирование в очередь"""
+        # Цели вне области сканирования отбрасываются до постановки в очередь
+        config = self.scope_manager.apply_to_config(config)
+        
+        return self._enqueue(config)
+    
+    def _enqueue(self, config: ScanConfig) -> str:
+        """
+        Ставит сканирование в очередь. Если такое же сканирование (те же опции,
+        цели покрываются целиком) уже ждет в очереди или выполняется, новый
+        запрос присоединяется к нему и получает тот же прогресс и результат.
+        """
         job = ScanJob(config)
-        self.active_scans[job.id] = job
-        self.scan_queue.put(job)
+        with self._jobs_lock:
+            covering = self._find_covering_job(config)
+            if covering:
+                job.parent_id = covering.id
+                job.status = covering.status
+                job.progress = covering.progress
+                covering.subscribers.append(job)
+            self.active_scans[job.id] = job
+            if not covering:
+                self.scan_queue.put(job)
         
         self.event_bus.scan_started.emit({
             'scan_id': job.id,
             'config': config
         })
         
+        if covering:
+            self.logger.info(f"Scan {job.id} attached to in-flight scan {covering.id}")
+            self.event_bus.scan_progress.emit({
+                'scan_id': job.id,
+                'progress': covering.progress,
+                'status': f'Attached to running scan {covering.id}'
+            })
+        
         return job.id
     
+    def _find_covering_job(self, config: ScanConfig) -> Optional[ScanJob]:
+        """Ищет ожидающее или идущее задание с теми же опциями, цели которого покрывают config"""
+        key = self._batch_key(config, -1)
+        if key.startswith('custom:'):
+            return None
+        
+        target_set, passthrough = split_targets(config.targets)
+        for job in list(self.active_scans.values()):
+            if job.parent_id or job.status not in (ScanStatus.PENDING, ScanStatus.RUNNING, ScanStatus.PAUSED):
+                continue
+            if self._batch_key(job.config, -1) != key:
+                continue
+            job_set, job_passthrough = split_targets(job.config.targets)
+            if job_set.issuperset(target_set) and set(passthrough) <= set(job_passthrough):
+                return job
+        return None
+    
+    def submit_batch(self, configs: List[ScanConfig]) -> List[str]:
+        """
+        Добавляет в очередь пакет сканирований.
+        
+        Совместимые конфигурации (одинаковые опции, разные цели) объединяются
+        в одно задание nmap: цели сливаются в общее множество без повторов и
+        при необходимости режутся на части. Результат делится обратно по
+        исходным запросам. Возвращает ID запросов в порядке configs.
+        """
+        # Область сканирования проверяем для всех конфигураций до постановки в очередь
+        configs = [self.scope_manager.apply_to_config(config) for config in configs]
+        
+        groups: Dict[str, List[ScanConfig]] = {}
+        for index, config in enumerate(configs):
+            groups.setdefault(self._batch_key(config, index), []).append(config)
+        
+        request_ids: Dict[int, str] = {}
+        for group in groups.values():
+            if len(group) == 1:
+                request_ids[id(group[0])] = self._enqueue(group[0])
+                continue
+            
+            carrier = self._plan_batch_job(group)
+            with self._jobs_lock:
+                for request in carrier.subscribers:
+                    self.active_scans[request.id] = request
+                    request_ids[id(request.config)] = request.id
+                self.active_scans[carrier.id] = carrier
+            for request in carrier.subscribers:
+                self.event_bus.scan_started.emit({'scan_id': request.id, 'config': request.config})
+            
+            self.scan_queue.put(carrier)
+        
+        self.logger.info(f"Batch of {len(configs)} scans planned as {len(groups)} jobs")
+        return [request_ids[id(config)] for config in configs]
+    
+    @staticmethod
+    def _batch_key(config: ScanConfig, index: int) -> str:
+        """Ключ совместимости: конфигурации с одинаковым ключом можно сканировать одним запуском"""
+        if config.scan_type == ScanType.CUSTOM:
+            # Произвольные флаги не объединяем
+            return f"custom:{index}"
+        options = config.to_dict()
+        for name in ('targets', 'scan_id', 'host_labels', 'shard_size'):
+            options.pop(name, None)
+        return json.dumps(options, sort_keys=True, default=str)
+    
+    def _plan_batch_job(self, configs: List[ScanConfig]) -> ScanJob:
+        """Строит объединенное задание для группы совместимых конфигураций"""
+        merged_set = TargetSet()
+        passthrough: List[str] = []
+        for config in configs:
+            target_set, unparsed = split_targets(config.targets)
+            merged_set.update(target_set)
+            passthrough.extend(target for target in unparsed if target not in passthrough)
+        
+        # Части планируются по всему объединенному множеству
+        shard_size = max(config.shard_size for config in configs)
+        if not shard_size and merged_set.address_count() > BATCH_SHARD_SIZE:
+            shard_size = BATCH_SHARD_SIZE
+        
+        carrier = ScanJob(replace(
+            configs[0],
+            targets=merged_set.to_targets() + passthrough,
+            scan_id=None,
+            host_labels={},
+            shard_size=shard_size
+        ))
+        carrier.is_carrier = True
+        carrier.subscribers = [ScanJob(config) for config in configs]
+        for request in carrier.subscribers:
+            request.parent_id = carrier.id
+        
+        requested = sum(split_targets(config.targets)[0].address_count() for config in configs)
+        self.logger.info(f"Merged {len(configs)} scans into {carrier.id}: {requested} requested addresses, "
+                         f"{merged_set.address_count()} unique")
+        return carrier
+    
     def _process_queue(self):
         """Обрабатывает очередь сканирований"""
         while self.is_running:
@@ -86,6 +243,10 @@ class ScanManager:
     
     def _execute_scan(self, job: ScanJob):
         """Выполняет сканирование через nmap движок"""
+        if job.id not in self.active_scans:
+            # Остановлено, пока ждало в очереди
+            return
+        
         try:
             # Сохраняем оригинальный scan_id
             original_scan_id = job.config.scan_id
@@ -100,18 +261,36 @@ class ScanManager:
                 'status': 'Starting scan...'
             })
             
+            # Разрешаем доменные цели заранее: имена одного адреса сканируются один раз.
+            # Разрешенные адреса и порядок целей меняются только у копии для запуска,
+            # в историю уходят цели, заданные пользователем
+            run_config = self._pre_resolve_targets(job.config)
+            
             # Выполняем реальное сканирование
-            job.result = self.nmap_engine.execute_scan(job.config)
+            if run_config.shard_size > 0 and run_config.scan_type != ScanType.CUSTOM:
+                job.result = self._execute_sharded(job, run_config)
+            else:
+                job.result = self._run_scan(replace(run_config, targets=self._prioritize_targets(run_config)))
             
-            # Восстанавливаем оригинальный ID
+            # Восстанавливаем оригинальный ID и конфигурацию запроса
             if job.result:
                 job.result.scan_id = original_scan_id or job.id
+                job.result.config = job.config
+                self._label_hosts(job.result, run_config.host_labels)
                 
             # Проверяем, что сканирование не было остановлено во время выполнения
-            if job.id in self.active_scans and job.status == ScanStatus.RUNNING:
-                job.status = ScanStatus.COMPLETED
-                job.progress = 100
-                
+            with self._jobs_lock:
+                completed = job.id in self.active_scans and job.status == ScanStatus.RUNNING
+                if completed:
+                    # После смены статуса новые запросы к заданию не присоединяются
+                    job.status = ScanStatus.COMPLETED
+                    job.progress = 100
+            
+            if completed and job.subscribers:
+                # Присоединенные запросы получают свою часть результата
+                self._complete_subscribers(job, run_config.host_labels)
+            
+            if completed and not job.is_carrier:
                 # ФИНАЛЬНЫЙ ПРОГРЕСС
                 self.event_bus.scan_progress.emit({
                     'scan_id': job.id,
@@ -132,38 +311,248 @@ class ScanManager:
                     'results': job.result
                 })
                 
-                # Добавляем в историю
-                self.scan_history.append(job)
+                # Сохраняем в историю
+                self._archive_job(job)
                 
         except Exception as e:
-            job.status = ScanStatus.ERROR
+            with self._jobs_lock:
+                job.status = ScanStatus.ERROR
+            for failed in ([] if job.is_carrier else [job]) + list(job.subscribers):
+                failed.status = ScanStatus.ERROR
+                self.event_bus.scan_progress.emit({
+                    'scan_id': failed.id,
+                    'progress': 0,
+                    'status': f'Error: {e}'
+                })
+                
+                # Публикуем ошибку как обновление результатов
+                self.event_bus.results_updated.emit({
+                    'scan_id': failed.id,
+                    'results': None,
+                    'error': str(e)
+                })
+                if failed is not job:
+                    with self._jobs_lock:
+                        self.active_scans.pop(failed.id, None)
+            
+        finally:
+            # Удаляем из активных сканирований в любом случае (успех или ошибка)
+            # Но только если сканирование не было остановлено вручную и все еще в активных
+            with self._jobs_lock:
+                if job.id in self.active_scans and job.status != ScanStatus.STOPPED:
+                    del self.active_scans[job.id]
+    
+    def _pre_resolve_targets(self, config: ScanConfig) -> ScanConfig:
+        """
+        Возвращает копию config для запуска: доменные цели заменены уникальными
+        адресами (имена запомнены), цели проверены по области сканирования
+        """
+        targets, host_labels = config.targets, {}
+        if config.resolve_hostnames and config.scan_type != ScanType.CUSTOM:
+            try:
+                targets, host_labels = self.dns_resolver.collapse_targets(config.targets)
+            except Exception as e:
+                self.logger.warning(f"DNS pre-resolution failed, nmap will resolve targets: {e}")
+        
+        # При постановке в очередь домены не разрешались, а имя могло разрешиться
+        # в запрещенный или не разрешенный диапазон - область проверяется здесь,
+        # в потоке сканирования, для всех целей
+        in_scope, rejected, unparsed, scope_labels = self.scope_manager.restrict(targets)
+        if rejected:
+            self.logger.warning(f"Resolved targets out of scope removed: {', '.join(rejected[:10])}"
+                                f"{' ...' if len(rejected) > 10 else ''}")
+        if not in_scope and not unparsed:
+            raise ValueError("All resolved targets are out of scope")
+        
+        # Имена, уже разрешенные при проверке области, сохраняются
+        labels = {**config.host_labels, **host_labels, **scope_labels}
+        return replace(
+            config,
+            targets=in_scope.to_targets() + unparsed,
+            host_labels={address: names for address, names in labels.items() if address in in_scope}
+        )
+    
+    def _run_scan(self, config: ScanConfig) -> ScanResult:
+        """Запускает одно сканирование: инкрементально, если это включено и применимо"""
+        if config.incremental_rescan and config.scan_type not in [ScanType.DISCOVERY, ScanType.CUSTOM]:
+            return self.incremental_scanner.execute_incremental_rescan(config, self._run_scan)
+        if config.incremental and IncrementalScanner.wants_version_detection(config):
+            return self.incremental_scanner.execute_service_scan(config)
+        return self.nmap_engine.execute_scan(config)
+    
+    def _prioritize_targets(self, config: ScanConfig) -> List[str]:
+        """Возвращает цели в порядке, при котором известные живые хосты сканируются первыми"""
+        if not config.prioritize_targets or config.scan_type == ScanType.CUSTOM:
+            return config.targets
+        try:
+            return self.target_prioritizer.order_targets(config.targets)
+        except Exception as e:
+            self.logger.warning(f"Target prioritization failed: {e}")
+            return config.targets
+    
+    def _execute_sharded(self, job: ScanJob, config: ScanConfig) -> ScanResult:
+        """
+        Выполняет сканирование config частями по shard_size адресов.
+        Части с приоритетными хостами идут первыми, после каждой части
+        публикуется промежуточный результат.
+        """
+        if config.prioritize_targets:
+            shards = self.target_prioritizer.plan_shards(config.targets, config.shard_size)
+        else:
+            target_set, passthrough = split_targets(config.targets)
+            shards = [chunk.to_targets() for chunk in target_set.iter_chunks(config.shard_size)]
+            # Синтаксис nmap не делится на части и сканируется последней частью
+            if passthrough:
+                shards.append(passthrough)
+        
+        merged = ScanResult(
+            scan_id=job.id,
+            config=job.config,
+            start_time=datetime.now(),
+            status="completed",
+            script_store=ScriptOutputStore()
+        )
+        failed_shards = 0
+        
+        for index, shard_targets in enumerate(shards):
+            # Ждем снятия паузы, прекращаем при остановке
+            while job.status == ScanStatus.PAUSED:
+                time.sleep(0.5)
+            if job.status != ScanStatus.RUNNING or job.id not in self.active_scans:
+                break
+            
             self.event_bus.scan_progress.emit({
                 'scan_id': job.id,
-                'progress': 0,
-                'status': f'Error: {e}'
+                'progress': index * 100 // len(shards),
+                'status': f'Scanning shard {index + 1}/{len(shards)}'
             })
             
-            # Публикуем ошибку как обновление результатов
+            shard_result = self._run_scan(replace(config, targets=shard_targets))
+            if not shard_result or shard_result.status == "error":
+                failed_shards += 1
+                self.logger.warning(f"Shard {index + 1}/{len(shards)} of {job.id} failed")
+                continue
+            
+            for host in shard_result.hosts:
+                merged.script_store.adopt_host(host)
+                merged.hosts.append(host)
+            merged.mark_changed()
+            
             self.event_bus.results_updated.emit({
                 'scan_id': job.id,
-                'results': None,
-                'error': str(e)
+                'results': merged,
+                'partial': True
             })
+        
+        merged.end_time = datetime.now()
+        if failed_shards == len(shards):
+            merged.status = "error"
+        self.logger.info(f"Sharded scan {job.id}: {len(shards)} shards, {failed_shards} failed, "
+                         f"{len(merged.hosts)} hosts")
+        return merged
+    
+    def _label_hosts(self, result: ScanResult, host_labels: Dict[str, List[str]]):
+        """Подписывает хосты доменными именами, под которыми они были заданы"""
+        if not host_labels:
+            return
+        for host in result.hosts:
+            names = host_labels.get(host.ip)
+            if names and not host.hostname:
+                host.hostname = ", ".join(names)
+    
+    def _complete_subscribers(self, job: ScanJob, labels: Dict[str, List[str]]):
+        """Делит результат объединенного задания по запросам и завершает каждый запрос"""
+        result = job.result
+        requests = [request for request in job.subscribers if request.id in self.active_scans]
+        
+        request_targets = {request.id: split_targets(request.config.targets) for request in requests}
+        hosts_by_request: Dict[str, List] = {request.id: [] for request in requests}
+        unclaimed = []
+        for host in (result.hosts if result else []):
+            names = [name.lower() for name in labels.get(host.ip, [])]
+            if host.hostname:
+                names.append(host.hostname.lower())
+            claimed = False
+            for request in requests:
+                target_set = request_targets[request.id][0]
+                if host.ip in target_set or any(name in target_set.domains for name in names):
+                    hosts_by_request[request.id].append(host)
+                    claimed = True
+            if not claimed:
+                unclaimed.append(host)
+        
+        # Хосты из нераспознанного синтаксиса nmap отдаем запросам с такими целями
+        if unclaimed:
+            for request in requests:
+                if request_targets[request.id][1]:
+                    hosts_by_request[request.id].extend(unclaimed)
+        
+        for request in requests:
+            request.status = ScanStatus.COMPLETED
+            request.progress = 100
+            # Хосты и выводы скриптов общие с объединенным результатом; сырой XML
+            # содержит чужие цели, поэтому к частям не прикладывается
+            request.result = ScanResult(
+                scan_id=request.config.scan_id or request.id,
+                config=request.config,
+                hosts=hosts_by_request[request.id],
+                start_time=result.start_time if result else None,
+                end_time=result.end_time if result else None,
+                status=result.status if result else "error",
+                script_store=result.script_store if result else None
+            )
             
-        finally:
-            # Удаляем из активных сканирований в любом случае (успех или ошибка)
-            # Но только если сканирование не было остановлено вручную и все еще в активных
-            if job.id in self.active_scans and job.status != ScanStatus.STOPPED:
-                del self.active_scans[job.id]
+            self.event_bus.scan_progress.emit({
+                'scan_id': request.id,
+                'progress': 100,
+                'status': 'Scan completed successfully'
+            })
+            self.event_bus.scan_completed.emit({
+                'scan_id': request.id,
+                'results': request.result,
+                'status': ScanStatus.COMPLETED.value
+            })
+            self.event_bus.results_updated.emit({
+                'scan_id': request.id,
+                'results': request.result
+            })
+            
+            self._archive_job(request)
+            with self._jobs_lock:
+                self.active_scans.pop(request.id, None)
+        
+        self.logger.info(f"Scan {job.id} results delivered to {len(requests)} attached requests")
+    
+    def _archive_job(self, job: ScanJob):
+        """Сохраняет результат в постоянную историю и оставляет в памяти только сводку"""
+        job.finished_at = time.time()
+        if job.result:
+            job.summary = {
+                'hosts_count': job.result.get_hosts_count(),
+                'open_ports_count': job.result.get_open_ports_count(),
+                'status': job.result.status,
+                'targets': list(job.config.targets)
+            }
+            # Полный результат освобождаем только если он надежно сохранен
+            if self.history_store.save_scan(job.id, job.result):
+                job.result = None
+        
+        self.scan_history.append(job)
     
     def _on_scan_progress(self, data):
         """Обрабатывает обновление прогресса"""
         scan_id = data.get('scan_id')
         progress = data.get('progress', 0)
         
-        if scan_id in self.active_scans:
-            job = self.active_scans[scan_id]
+        job = self.active_scans.get(scan_id)
+        if job is not None:
             job.progress = progress
+            
+            # Прогресс объединенного задания транслируется исходным запросам
+            for request in job.subscribers:
+                if request.id in self.active_scans and progress < 100:
+                    request.status = job.status
+                    self.event_bus.scan_progress.emit({**data, 'scan_id': request.id})
     
     def _on_scan_paused(self, data):
         """Обрабатывает паузу сканирования"""
@@ -182,6 +571,8 @@ class ScanManager:
         scan_id = data.get('scan_id')
         if scan_id in self.active_scans:
             job = self.active_scans[scan_id]
+            if self._detach_request(job):
+                return
             job.status = ScanStatus.STOPPED
             
             # Публикуем событие обновления результатов с пустым результатом
@@ -195,8 +586,9 @@ class ScanManager:
             self.nmap_engine.stop_scan(scan_id)
             
             # Удаляем из активных сканирований НЕМЕДЛЕННО
-            if scan_id in self.active_scans:
-                del self.active_scans[scan_id]
+            with self._jobs_lock:
+                self.active_scans.pop(scan_id, None)
+            self._release_request(job)
     
     def get_scan_status(self, scan_id: str) -> ScanStatus:
         """Возвращает статус сканирования"""
@@ -207,31 +599,86 @@ class ScanManager:
         for job in self.scan_history:
             if job.id == scan_id:
                 return job.status
+        
+        # Более старые сканирования есть только в постоянной истории
+        if self.history_store.has_scan(scan_id):
+            return ScanStatus.COMPLETED
                 
         return ScanStatus.ERROR
     
+    def is_scan_active(self, scan_id: str) -> bool:
+        """Находится ли сканирование в очереди или выполняется"""
+        return scan_id in self.active_scans
+    
     def get_queue_size(self) -> int:
         """Возвращает размер очереди"""
         return self.scan_queue.qsize()
     
     def get_active_scans(self) -> Dict[str, ScanJob]:
         """Возвращает активные сканирования"""
-        return self.active_scans.copy()
+        with self._jobs_lock:
+            return self.active_scans.copy()
     
     def get_scan_history(self, limit: int = None) -> List[ScanJob]:
-        """Возвращает историю сканирований"""
+        """Возвращает недавнюю историю сканирований (сводки из памяти)"""
+        history = list(self.scan_history)
         if limit:
-            return self.scan_history[-limit:]
-        return self.scan_history
+            return history[-limit:]
+        return history
+    
+    def get_stored_history(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """Возвращает сводки из постоянной истории, новые первыми"""
+        return self.history_store.list_scans(limit, offset)
+    
+    def _carrier_id(self, scan_id: str) -> str:
+        """Для запроса из пакета возвращает ID объединенного задания, которое его выполняет"""
+        job = self.active_scans.get(scan_id)
+        parent = self.active_scans.get(job.parent_id) if job and job.parent_id else None
+        # Чужой запрос, к которому присоединились, приостанавливать нельзя
+        if parent and parent.is_carrier:
+            return parent.id
+        return scan_id
+    
+    def _release_request(self, job: ScanJob):
+        """Останавливает объединенное задание, если все его запросы остановлены"""
+        if not job.parent_id or job.parent_id not in self.active_scans:
+            return
+        carrier = self.active_scans[job.parent_id]
+        if carrier.is_carrier and not self._has_live_subscribers(carrier):
+            self.stop_scan(carrier.id)
+    
+    def _has_live_subscribers(self, job: ScanJob) -> bool:
+        return any(request.id in self.active_scans for request in job.subscribers)
+    
+    def _detach_request(self, job: ScanJob) -> bool:
+        """
+        Снимает запрос, к которому присоединены другие: сам запрос считается
+        остановленным, а сканирование продолжается для присоединенных.
+        Возвращает True, если сканирование нужно продолжить.
+        """
+        if not self._has_live_subscribers(job):
+            return False
+        if not job.is_carrier:
+            job.is_carrier = True
+            self.event_bus.scan_stopped.emit({'scan_id': job.id})
+            self.event_bus.results_updated.emit({
+                'scan_id': job.id,
+                'results': None,
+                'status': 'stopped'
+            })
+            self.logger.info(f"Scan {job.id} stopped by user, still running for attached requests")
+        return True
     
     def pause_scan(self, scan_id: str):
         """Приостанавливает сканирование"""
+        scan_id = self._carrier_id(scan_id)
         if scan_id in self.active_scans and self.active_scans[scan_id].status == ScanStatus.RUNNING:
             self.active_scans[scan_id].status = ScanStatus.PAUSED
             self.event_bus.scan_paused.emit({'scan_id': scan_id})
     
     def resume_scan(self, scan_id: str):
         """Возобновляет сканирование"""
+        scan_id = self._carrier_id(scan_id)
         if scan_id in self.active_scans and self.active_scans[scan_id].status == ScanStatus.PAUSED:
             self.active_scans[scan_id].status = ScanStatus.RUNNING
             self.event_bus.scan_resumed.emit({'scan_id': scan_id})
@@ -240,6 +687,8 @@ class ScanManager:
         """Останавливает сканирование - ИСПРАВЛЕННАЯ ВЕРСИЯ"""
         if scan_id in self.active_scans:
             job = self.active_scans[scan_id]
+            if self._detach_request(job):
+                return
             job.status = ScanStatus.STOPPED
             
             # ДОБАВЛЯЕМ ПРОВЕРКУ НА None и валидность scan_id
@@ -248,8 +697,8 @@ class ScanManager:
                 self.nmap_engine.stop_scan(scan_id)
             
             # Удаляем из активных
-            if scan_id in self.active_scans:
-                del self.active_scans[scan_id]
+            with self._jobs_lock:
+                self.active_scans.pop(scan_id, None)
             
             # Публикуем события
             self.event_bus.scan_stopped.emit({'scan_id': scan_id})
@@ -260,6 +709,7 @@ class ScanManager:
             })
             
             self.logger.info(f"Scan {scan_id} stopped by user")
+            self._release_request(job)
     
     def get_scan_result(self, scan_id: str) -> ScanResult:
         """Возвращает результаты сканирования"""
@@ -267,20 +717,53 @@ class ScanManager:
         if scan_id in self.active_scans:
             return self.active_scans[scan_id].result
         
-        # Проверяем историю
+        # Проверяем историю в памяти
         for job in self.scan_history:
-            if job.id == scan_id:
+            if job.id == scan_id and job.result is not None:
                 return job.result
-                
-        return None
+        
+        # Лениво загружаем из постоянной истории
+        return self.history_store.load_scan(scan_id)
+    
+    def diff_scans(self, old_scan_id: str, new_scan_id: str) -> Optional[ScanDiff]:
+        """Сравнивает два сканирования (из памяти или из истории) и публикует результат"""
+        old_result = self.get_scan_result(old_scan_id)
+        new_result = self.get_scan_result(new_scan_id)
+        
+        if old_result is None or new_result is None:
+            self.logger.warning(f"Cannot diff {old_scan_id} and {new_scan_id}: result not found")
+            return None
+        
+        diff = diff_scans(old_result, new_result)
+        self.logger.info(f"Diff {old_scan_id} -> {new_scan_id}: {diff.get_summary()}")
+        
+        self.event_bus.scan_diff_ready.emit({
+            'old_scan_id': old_scan_id,
+            'new_scan_id': new_scan_id,
+            'diff': diff
+        })
+        
+        return diff
+    
+    def diff_with_previous(self, scan_id: str) -> Optional[ScanDiff]:
+        """Сравнивает сканирование с предыдущим сканированием тех же целей"""
+        previous_id = self.history_store.find_previous_scan(scan_id)
+        if not previous_id:
+            self.logger.info(f"No previous scan of the same targets for {scan_id}")
+            return None
+        
+        return self.diff_scans(previous_id, scan_id)
     
-    def clear_history(self):
-        """Очищает историю сканирований"""
+    def clear_history(self, persistent: bool = False):
+        """Очищает историю сканирований (persistent=True - также и базу)"""
         self.scan_history.clear()
+        if persistent:
+            self.history_store.clear()
     
     def shutdown(self):
         """Корректное завершение работы менеджера"""
         self.is_running = False
+        self.scheduler.shutdown()
         
         # Останавливаем все активные сканирования
         for scan_id in list(self.active_scans.keys()):
@@ -0,0 +1,352 @@
+import json
+import os
+import random
+import uuid
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+
+from shared.constants import (SCHEDULES_FILE, SCHEDULER_TICK_SECONDS, SCHEDULER_DEFAULT_JITTER,
+                              SCHEDULER_MAX_QUEUED)
+from shared.models.scan_config import ScanConfig
+
+CRON_ALIASES = {
+    '@hourly': '0 * * * *',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@weekly': '0 0 * * 0',
+    '@monthly': '0 0 1 * *',
+}
+
+class CronSpec:
+    """
+    Расписание в формате cron: "минута час день месяц день_недели".
+
+    Поддерживаются *, списки через запятую, диапазоны a-b, шаг */n и a-b/n,
+    а также псевдонимы @hourly, @daily, @weekly, @monthly. День недели: 0-6,
+    0 (или 7) - воскресенье. Как и в cron, если ограничены и день месяца, и день
+    недели, достаточно совпадения любого из них.
+    """
+
+    FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression: str):
+        self.expression = expression.strip()
+        spec = CRON_ALIASES.get(self.expression.lower(), self.expression)
+        fields = spec.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron spec must have 5 fields: {expression!r}")
+
+        parsed = [self._parse_field(value, low, high)
+                  for value, (low, high) in zip(fields, self.FIELD_RANGES)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {day % 7 for day in weekdays}
+        self.days_restricted = fields[2] != '*'
+        self.weekdays_restricted = fields[4] != '*'
+
+    @staticmethod
+    def _parse_field(value: str, low: int, high: int) -> Set[int]:
+        """Разбирает одно поле cron в множество значений"""
+        values = set()
+        for part in value.split(','):
+            step = 1
+            if '/' in part:
+                part, step_text = part.split('/', 1)
+                step = int(step_text)
+                if step <= 0:
+                    raise ValueError(f"Invalid cron step: {value!r}")
+
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start_text, end_text = part.split('-', 1)
+                start, end = int(start_text), int(end_text)
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+
+            if start < low or end > high or start > end:
+                raise ValueError(f"Cron value out of range {low}-{high}: {value!r}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_match = moment.day in self.days
+        weekday_match = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.days_restricted and self.weekdays_restricted:
+            return day_match or weekday_match
+        return day_match and weekday_match
+
+    def matches(self, moment: datetime) -> bool:
+        """Совпадает ли минута moment с расписанием"""
+        return (moment.minute in self.minutes and moment.hour in self.hours and
+                moment.month in self.months and self._day_matches(moment))
+
+    def next_after(self, moment: datetime) -> datetime:
+        """Ближайшее время запуска строго после moment"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Перебор с пропуском целых дней и часов; не дальше 5 лет (например, "0 0 29 2 *")
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months or not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+            return candidate
+        raise ValueError(f"Cron spec never fires: {self.expression!r}")
+
+@dataclass
+class ScheduledScan:
+    """Повторяющееся сканирование: профиль + цели + расписание"""
+    name: str
+    cron: str
+    config: ScanConfig
+    schedule_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    jitter_seconds: int = SCHEDULER_DEFAULT_JITTER
+    enabled: bool = True
+    next_run: Optional[float] = None   # Время следующего запуска (unix, с учетом jitter)
+    last_run: Optional[float] = None
+    last_job_id: Optional[str] = None
+    runs: int = 0
+    coalesced: int = 0                 # Пропущено: предыдущий запуск еще не завершился
+    deferred: int = 0                  # Отложено: очередь сканирований переполнена
+    deferred_slot: Optional[float] = None  # Срок, запуск на который уже отложен (не сохраняется)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'schedule_id': self.schedule_id,
+            'name': self.name,
+            'cron': self.cron,
+            'config': self.config.to_dict(),
+            'jitter_seconds': self.jitter_seconds,
+            'enabled': self.enabled,
+            'next_run': self.next_run,
+            'last_run': self.last_run,
+            'last_job_id': self.last_job_id,
+            'runs': self.runs,
+            'coalesced': self.coalesced,
+            'deferred': self.deferred
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ScheduledScan':
+        values = dict(data)
+        values['config'] = ScanConfig.from_dict(values.get('config') or {})
+        known = {name: value for name, value in values.items() if name in cls.__dataclass_fields__}
+        return cls(**known)
+
+class ScanScheduler:
+    """
+    Планировщик повторяющихся сканирований.
+
+    Раз в SCHEDULER_TICK_SECONDS проверяет расписания и отправляет наступившие
+    запуски в ScanManager. Запуск объединяется (пропускается), если предыдущий
+    запуск того же расписания еще в очереди или выполняется, и откладывается до
+    следующей проверки, если очередь уже заполнена. Время запуска сдвигается
+    на случайную задержку до jitter_seconds, чтобы задания не стартовали
+    одновременно в :00. Расписания сохраняются в SCHEDULES_FILE.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls, scan_manager, schedules_file: str = None):
+        if cls._instance is None:
+            cls._instance = ScanScheduler(scan_manager, schedules_file or SCHEDULES_FILE)
+        return cls._instance
+
+    def __init__(self, scan_manager, schedules_file: str = SCHEDULES_FILE,
+                 tick_seconds: float = SCHEDULER_TICK_SECONDS, max_queued: int = SCHEDULER_MAX_QUEUED):
+        self.scan_manager = scan_manager
+        self.schedules_file = schedules_file
+        self.tick_seconds = tick_seconds
+        self.max_queued = max_queued
+        self.logger = self._setup_logging()
+        self._lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self.schedules: Dict[str, ScheduledScan] = {}
+        self._load_schedules()
+
+        self._thread = threading.Thread(target=self._run, daemon=True, name="scan-scheduler")
+        self._thread.start()
+
+    def _setup_logging(self):
+        """Настройка логирования"""
+        logging.basicConfig(level=logging.INFO)
+        return logging.getLogger(__name__)
+
+    def _load_schedules(self):
+        """Загружает расписания; пропущенные за время простоя запуски выполняются один раз"""
+        if not os.path.exists(self.schedules_file):
+            return
+
+        try:
+            with open(self.schedules_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for item in data.get('schedules', []):
+                schedule = ScheduledScan.from_dict(item)
+                CronSpec(schedule.cron)  # Проверяем спецификацию
+                self.schedules[schedule.schedule_id] = schedule
+            self.logger.info(f"Loaded {len(self.schedules)} scan schedules")
+        except Exception as e:
+            self.logger.error(f"Error loading schedules: {e}")
+
+    def _save_schedules(self):
+        """Атомарно сохраняет расписания в файл"""
+        try:
+            temp_file = f"{self.schedules_file}.tmp"
+            with self._lock:
+                data = {'schedules': [schedule.to_dict() for schedule in self.schedules.values()]}
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+            os.replace(temp_file, self.schedules_file)
+        except Exception as e:
+            self.logger.error(f"Error saving schedules: {e}")
+
+    @staticmethod
+    def _compute_next_run(schedule: ScheduledScan, after: datetime) -> float:
+        """Следующее срабатывание расписания со случайной задержкой"""
+        next_time = CronSpec(schedule.cron).next_after(after)
+        jitter = random.uniform(0, schedule.jitter_seconds) if schedule.jitter_seconds > 0 else 0.0
+        return next_time.timestamp() + jitter
+
+    def add_schedule(self, name: str, cron: str, config: ScanConfig,
+                     jitter_seconds: int = SCHEDULER_DEFAULT_JITTER) -> str:
+        """Добавляет расписание (ValueError при некорректной спецификации cron)"""
+        CronSpec(cron)
+        schedule = ScheduledScan(name=name, cron=cron, config=config, jitter_seconds=jitter_seconds)
+        schedule.next_run = self._compute_next_run(schedule, datetime.now())
+
+        with self._lock:
+            self.schedules[schedule.schedule_id] = schedule
+        self._save_schedules()
+        self.logger.info(f"Scheduled '{name}' ({cron}), next run at "
+                         f"{datetime.fromtimestamp(schedule.next_run):%Y-%m-%d %H:%M:%S}")
+        return schedule.schedule_id
+
+    def remove_schedule(self, schedule_id: str) -> bool:
+        with self._lock:
+            removed = self.schedules.pop(schedule_id, None) is not None
+        if removed:
+            self._save_schedules()
+        return removed
+
+    def set_enabled(self, schedule_id: str, enabled: bool):
+        """Включает или выключает расписание; при включении срок пересчитывается"""
+        with self._lock:
+            schedule = self.schedules.get(schedule_id)
+            if schedule is None:
+                return
+            schedule.enabled = enabled
+            if enabled:
+                schedule.next_run = self._compute_next_run(schedule, datetime.now())
+        self._save_schedules()
+
+    def get_schedules(self) -> List[ScheduledScan]:
+        with self._lock:
+            return list(self.schedules.values())
+
+    def run_now(self, schedule_id: str) -> Optional[str]:
+        """Запускает расписание вне очереди (с учетом объединения запусков)"""
+        with self._lock:
+            schedule = self.schedules.get(schedule_id)
+        if schedule is None or self._defer_if_queue_full(schedule):
+            job_id = None
+        else:
+            job_id = self._fire(schedule)
+        self._save_schedules()
+        return job_id
+
+    def _defer_if_queue_full(self, schedule: ScheduledScan) -> bool:
+        """Откладывает запуск, если очередь сканирований заполнена"""
+        if self.scan_manager.get_queue_size() < self.max_queued:
+            return False
+        with self._lock:
+            # Повторные проверки того же срока отложенный запуск не пересчитывают
+            first = schedule.deferred_slot != schedule.next_run
+            if first:
+                schedule.deferred += 1
+                schedule.deferred_slot = schedule.next_run
+        if first:
+            self.logger.warning(f"Schedule '{schedule.name}': scan queue is full "
+                                f"({self.max_queued}), run deferred")
+        return True
+
+    def _fire(self, schedule: ScheduledScan) -> Optional[str]:
+        """
+        Отправляет запуск в ScanManager, если это допустимо. Вызывается без
+        self._lock: submit_scan проверяет область и может ждать DNS
+        """
+        if schedule.last_job_id and self.scan_manager.is_scan_active(schedule.last_job_id):
+            with self._lock:
+                schedule.coalesced += 1
+            self.logger.info(f"Schedule '{schedule.name}': previous run {schedule.last_job_id} "
+                             f"still active, run coalesced")
+            return None
+
+        # Каждый запуск получает свою копию конфигурации
+        with self._lock:
+            config = ScanConfig.from_dict(schedule.config.to_dict())
+        config.scan_id = None
+        try:
+            job_id = self.scan_manager.submit_scan(config)
+        except ValueError as e:
+            self.logger.warning(f"Schedule '{schedule.name}' not started: {e}")
+            return None
+
+        with self._lock:
+            schedule.last_job_id = job_id
+            schedule.last_run = datetime.now().timestamp()
+            schedule.runs += 1
+        self.logger.info(f"Schedule '{schedule.name}' started scan {job_id}")
+        return job_id
+
+    def check_due(self, now: datetime = None):
+        """Запускает наступившие расписания (вызывается из потока планировщика)"""
+        now = now or datetime.now()
+        timestamp = now.timestamp()
+        changed = False
+
+        # Наступившие расписания выбираются под блокировкой, запускаются без нее
+        due = []
+        with self._lock:
+            for schedule in self.schedules.values():
+                if not schedule.enabled:
+                    continue
+                if schedule.next_run is None:
+                    schedule.next_run = self._compute_next_run(schedule, now)
+                    changed = True
+                    continue
+                if schedule.next_run <= timestamp:
+                    due.append(schedule)
+
+        for schedule in due:
+            # Отложенный запуск сохраняет срок и повторяется на следующей проверке
+            if self._defer_if_queue_full(schedule):
+                continue
+
+            # Все пропущенные срабатывания схлопываются в один запуск
+            self._fire(schedule)
+            with self._lock:
+                schedule.next_run = self._compute_next_run(schedule, now)
+            changed = True
+
+        if changed:
+            self._save_schedules()
+
+    def _run(self):
+        while not self._stop_event.wait(self.tick_seconds):
+            try:
+                self.check_due()
+            except Exception as e:
+                self.logger.error(f"Scheduler tick failed: {e}")
+
+    def shutdown(self):
+        self._stop_event.set()
@@ -0,0 +1,232 @@
+import json
+import os
+import shlex
+import logging
+import threading
+from dataclasses import replace
+from typing import Dict, Iterable, List, Tuple
+
+from core.dns_resolver import DnsResolver
+from shared.constants import SCOPE_FILE, SCOPE_EXCLUDE_FILE
+from shared.models.scan_config import ScanConfig
+from shared.utils.validators import TargetSet, validate_domain
+
+class ScopeManager:
+    """
+    Область сканирования: разрешенные и запрещенные диапазоны.
+
+    Оба списка хранятся как TargetSet (отсортированные объединенные интервалы),
+    поэтому проверка одной цели - бинарный поиск, а обрезка списка целей -
+    линейный проход по интервалам. Запрещенные диапазоны дополнительно
+    передаются nmap через --excludefile, чтобы отсечь и адреса доменов.
+    Если задан разрешенный список, нераспознанный синтаксис nmap отбрасывается -
+    --excludefile защищает только от запрещенного, но не от чужого, - а домены
+    разрешаются и заменяются проверенными адресами. При постановке в очередь
+    (GUI поток) домены не разрешаются: их проверяет поток сканирования.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls, scope_file: str = None):
+        if cls._instance is None:
+            cls._instance = ScopeManager(scope_file or SCOPE_FILE)
+        return cls._instance
+
+    def __init__(self, scope_file: str = SCOPE_FILE, exclude_file: str = SCOPE_EXCLUDE_FILE):
+        self.scope_file = scope_file
+        self.exclude_file = exclude_file
+        self.logger = self._setup_logging()
+        self._lock = threading.Lock()
+        self.allowed = TargetSet()
+        self.denied = TargetSet()
+        self._load_scope()
+
+    def _setup_logging(self):
+        """Настройка логирования"""
+        logging.basicConfig(level=logging.INFO)
+        return logging.getLogger(__name__)
+
+    def _load_scope(self):
+        """Загружает область сканирования из файла"""
+        if not os.path.exists(self.scope_file):
+            return
+
+        try:
+            with open(self.scope_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.allowed = TargetSet.from_targets(data.get('allow', []))
+            self.denied = TargetSet.from_targets(data.get('deny', []))
+            self._write_exclude_file()
+            self.logger.info(f"Loaded scope: {self.allowed.range_count()} allowed, "
+                             f"{self.denied.range_count()} denied ranges")
+        except Exception as e:
+            self.logger.error(f"Error loading scope: {e}")
+
+    def _save_scope(self):
+        """Сохраняет область сканирования в файл"""
+        try:
+            with open(self.scope_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'allow': self.allowed.to_targets(),
+                    'deny': self.denied.to_targets()
+                }, f, indent=2)
+        except Exception as e:
+            self.logger.error(f"Error saving scope: {e}")
+
+    def _write_exclude_file(self):
+        """Записывает компактный список исключений для nmap --excludefile"""
+        if not self.denied:
+            return
+        directory = os.path.dirname(self.exclude_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.exclude_file, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(self.denied.to_targets()) + '\n')
+
+    def set_allowed(self, targets: Iterable[str]):
+        """Задает разрешенную область; пустой список - разрешено все, кроме запрещенного"""
+        with self._lock:
+            self.allowed = TargetSet.from_targets(targets)
+            self._save_scope()
+
+    def set_denied(self, targets: Iterable[str]):
+        """Задает запрещенные диапазоны"""
+        with self._lock:
+            self.denied = TargetSet.from_targets(targets)
+            self._save_scope()
+            self._write_exclude_file()
+
+    def add_denied(self, targets: Iterable[str]):
+        """Добавляет запрещенные диапазоны к существующим"""
+        with self._lock:
+            for target in targets:
+                self.denied.add(target.strip())
+            self._save_scope()
+            self._write_exclude_file()
+
+    def get_allowed(self) -> List[str]:
+        return self.allowed.to_targets()
+
+    def get_denied(self) -> List[str]:
+        return self.denied.to_targets()
+
+    def is_in_scope(self, target: str) -> bool:
+        """Проверяет одну цель: адреса - за O(log n), домены - по адресу, в который они разрешаются"""
+        with self._lock:
+            if self.denied.overlaps(target):
+                return False
+            if not self.allowed:
+                # Домены до разрешения имен проверить нельзя - их отсекает --excludefile
+                return True
+            if TargetSet.from_targets([target]).address_count():
+                return target in self.allowed
+        if not validate_domain(target):
+            # Нераспознанный синтаксис nmap в разрешенной области не проверить
+            return False
+        host_labels, _ = self._resolve_domains([target])
+        return any(self.is_in_scope(address) for address in host_labels)
+
+    def _resolve_domains(self, names: Iterable[str]) -> Tuple[Dict[str, List[str]], List[str]]:
+        """Разрешает домены: (адрес -> имена, неразрешенные имена). Как и nmap, берется первый адрес"""
+        names = list(names)
+        if not names:
+            return {}, []
+        resolved = DnsResolver.get_instance().resolve_many(names)
+        host_labels: Dict[str, List[str]] = {}
+        unresolved = []
+        for name in names:
+            addresses = resolved.get(name.lower())
+            if addresses:
+                host_labels.setdefault(addresses[0], []).append(name)
+            else:
+                unresolved.append(name)
+        return host_labels, unresolved
+
+    def restrict(self, targets: Iterable[str],
+                 resolve_domains: bool = True) -> Tuple[TargetSet, List[str], List[str], Dict[str, List[str]]]:
+        """
+        Обрезает цели по области сканирования.
+        Возвращает (цели в области, отброшенные цели, нераспознанные цели, адрес -> имена).
+        Без разрешенного списка домены и нераспознанный синтаксис nmap передаются
+        как есть под защитой --excludefile. С разрешенным списком домены
+        заменяются своими адресами (имена возвращаются для подписи хостов) и
+        проверяются как адреса, а нераспознанный синтаксис отбрасывается.
+        resolve_domains=False оставляет незапрещенные домены непроверенными -
+        их нужно проверить повторным restrict перед запуском.
+        """
+        requested = TargetSet()
+        excluded = []
+        unparsed = []
+        for target in targets:
+            target = target.strip()
+            if target.startswith('!'):
+                excluded.append(target[1:].strip())
+            elif target and not requested.add(target):
+                unparsed.append(target)
+        for target in excluded:
+            requested.exclude(target)
+
+        rejected = []
+        host_labels: Dict[str, List[str]] = {}
+        deferred = set()
+        if self.allowed:
+            # Октетные диапазоны и шаблоны nmap не проверить без разворачивания
+            rejected.extend(unparsed)
+            unparsed = []
+            if resolve_domains:
+                # Имена разрешаются вне блокировки - это сетевые запросы
+                host_labels, unresolved = self._resolve_domains(sorted(requested.domains))
+                rejected.extend(unresolved)
+            else:
+                deferred = requested.domains
+            requested.domains = set()
+            requested_addresses = requested.copy()
+            for address in host_labels:
+                requested.add(address)
+        else:
+            requested_addresses = requested
+
+        with self._lock:
+            in_scope = requested
+            if self.allowed:
+                in_scope = in_scope.intersection(self.allowed)
+            in_scope = in_scope.difference(self.denied)
+            rejected.extend(sorted(deferred & self.denied.domains))
+            in_scope.domains |= deferred - self.denied.domains
+
+        for address in list(host_labels):
+            if address not in in_scope:
+                rejected.extend(host_labels.pop(address))
+        # Отброшенные имена перечислены сами, без адресов, в которые они разрешились
+        rejected = requested_addresses.difference(in_scope).to_targets() + rejected
+        return in_scope, rejected, unparsed, host_labels
+
+    def apply_to_config(self, config: ScanConfig) -> ScanConfig:
+        """
+        Применяет область к конфигурации перед постановкой в очередь.
+        Возвращает новую конфигурацию с обрезанными целями и --excludefile,
+        ValueError - если в области не осталось ни одной цели. Вызывается из
+        GUI потока, поэтому имена не разрешаются: домены проверяет
+        ScanManager перед запуском.
+        """
+        in_scope, rejected, unparsed, host_labels = self.restrict(config.targets, resolve_domains=False)
+
+        if rejected:
+            self.logger.warning(f"Out of scope targets removed: {', '.join(rejected[:10])}"
+                                f"{' ...' if len(rejected) > 10 else ''}")
+
+        if config.targets and not in_scope and not unparsed:
+            raise ValueError("All targets are out of scope")
+
+        exclude_file = self.exclude_file if self.denied else ""
+        labels = {**config.host_labels, **host_labels}
+        return replace(config, targets=in_scope.to_targets() + unparsed, exclude_file=exclude_file,
+                       host_labels=labels)
+
+    @staticmethod
+    def exclude_option(config: ScanConfig) -> str:
+        """Опция nmap для файла исключений (пустая строка, если исключений нет)"""
+        if config.exclude_file:
+            return f"--excludefile {shlex.quote(config.exclude_file)}"
+        return ""
@@ -0,0 +1,114 @@
+import math
+import time
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from core.history_store import ScanHistoryStore
+from shared.constants import (CRITICAL_SERVICES, PRIORITY_HALF_LIFE_DAYS,
+                              PRIORITY_MAX_PROMOTED, PRIORITY_HISTORY_DAYS, PRIORITY_IP_FILTER_MAX)
+from shared.utils.validators import TargetSet, split_targets
+
+@dataclass
+class HostPriority:
+    """Приоритет хоста по данным истории"""
+    ip: str
+    score: float
+    last_up: float = 0.0
+    open_ports: int = 0
+    critical_ports: int = 0
+    changed: bool = False
+
+class TargetPrioritizer:
+    """
+    Упорядочивает цели по истории сканирований.
+
+    Хосты, которые недавно были up, имели много открытых (особенно критичных)
+    портов или меняли набор портов, сканируются первыми. Остальные адреса
+    идут следом в исходном порядке диапазонов.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls, history_store: ScanHistoryStore = None):
+        if cls._instance is None:
+            cls._instance = TargetPrioritizer(history_store or ScanHistoryStore.get_instance())
+        return cls._instance
+
+    def __init__(self, history_store: ScanHistoryStore):
+        self.history_store = history_store
+        self.logger = logging.getLogger(__name__)
+
+    def _score(self, activity: Dict, now: float) -> HostPriority:
+        """Считает приоритет: свежесть * ценность хоста"""
+        last_up = activity.get('last_up') or 0.0
+        open_ports = activity.get('max_open_ports') or 0
+        critical_ports = activity.get('max_critical_ports') or 0
+        changed = (activity.get('port_variants') or 0) > 1
+
+        if not last_up:
+            # Хост ни разу не отвечал - приоритет не повышаем
+            return HostPriority(activity['ip'], 0.0)
+
+        age_days = max(0.0, now - last_up) / 86400
+        recency = 0.5 ** (age_days / PRIORITY_HALF_LIFE_DAYS)
+        value = 1 + math.log2(1 + open_ports) + 2 * critical_ports + (2 if changed else 0)
+        return HostPriority(activity['ip'], recency * value, last_up, open_ports, critical_ports, changed)
+
+    def get_priorities(self, target_set: TargetSet) -> List[HostPriority]:
+        """Возвращает известные живые хосты из множества целей, важные первыми"""
+        address_count = target_set.address_count()
+        if not address_count:
+            return []
+        # Небольшие списки целей запрашиваются по адресам, большие - только окном истории
+        ips = list(target_set.iter_addresses()) if address_count <= PRIORITY_IP_FILTER_MAX else None
+        try:
+            activity = self.history_store.get_host_activity(
+                since=datetime.now() - timedelta(days=PRIORITY_HISTORY_DAYS),
+                critical_services=CRITICAL_SERVICES, ips=ips)
+        except Exception as e:
+            self.logger.warning(f"Failed to load host activity: {e}")
+            return []
+
+        now = time.time()
+        priorities = []
+        for ip, host_activity in activity.items():
+            if ip in target_set:
+                priority = self._score(host_activity, now)
+                if priority.score > 0:
+                    priorities.append(priority)
+
+        priorities.sort(key=lambda priority: priority.score, reverse=True)
+        return priorities[:PRIORITY_MAX_PROMOTED]
+
+    def _partition(self, targets: List[str]) -> Tuple[List[str], TargetSet, List[str]]:
+        """(приоритетные IP, остаток множества, нераспознанные цели)"""
+        target_set, passthrough = split_targets(targets)
+        promoted = [priority.ip for priority in self.get_priorities(target_set)]
+        remainder = target_set.difference(TargetSet.from_targets(promoted)) if promoted else target_set
+        if promoted:
+            self.logger.info(f"Prioritized {len(promoted)} known live hosts")
+        return promoted, remainder, passthrough
+
+    def order_targets(self, targets: List[str]) -> List[str]:
+        """Возвращает цели в порядке сканирования: сначала известные живые хосты"""
+        promoted, remainder, passthrough = self._partition(targets)
+        if not promoted:
+            return targets
+        return promoted + remainder.to_targets() + passthrough
+
+    def plan_shards(self, targets: List[str], shard_size: int) -> List[List[str]]:
+        """
+        Разбивает цели на части не более shard_size адресов.
+        Первые части состоят из приоритетных хостов, остальные адреса режутся
+        по интервалам без разворачивания.
+        """
+        promoted, remainder, passthrough = self._partition(targets)
+
+        shards = [promoted[index:index + shard_size] for index in range(0, len(promoted), shard_size)]
+        shards.extend(chunk.to_targets() for chunk in remainder.iter_chunks(shard_size))
+        if passthrough:
+            shards.append(passthrough)
+        return shards
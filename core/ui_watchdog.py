@@ -0,0 +1,181 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from PyQt6.QtCore import QObject, QTimer, Qt
+
+from core.event_bus import EventBus
+from core.event_metrics import LatencyHistogram
+from shared.constants import (UI_WATCHDOG_INTERVAL_MS, UI_WATCHDOG_SAMPLE_MS, UI_STALL_THRESHOLD_MS,
+                              UI_STALL_MAX_SAMPLES, UI_STALL_HISTORY, UI_STALL_LOG_FILE)
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_STACK_LIMIT = 40  # Кадров в сохраняемом стеке
+
+def _frame_stack(frame) -> List[Dict[str, Any]]:
+    """Стек от внешнего кадра к внутреннему: файл, строка, функция"""
+    stack = []
+    while frame is not None and len(stack) < _STACK_LIMIT:
+        code = frame.f_code
+        stack.append({'file': code.co_filename, 'line': frame.f_lineno,
+                      'function': getattr(code, 'co_qualname', code.co_name)})
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+def _blocking_frame(stack: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Самый внутренний кадр кода приложения - слот или метод, который держит GUI поток"""
+    for entry in reversed(stack):
+        path = os.path.abspath(entry['file'])
+        if path.startswith(_PROJECT_ROOT) and 'site-packages' not in path:
+            return entry
+    return stack[-1] if stack else None
+
+def _describe(entry: Optional[Dict[str, Any]]) -> str:
+    if entry is None:
+        return "unknown"
+    return f"{entry['function']} ({os.path.basename(entry['file'])}:{entry['line']})"
+
+class UiWatchdog(QObject):
+    """
+    Сторож отзывчивости цикла событий GUI.
+
+    Таймер GUI потока тикает каждые UI_WATCHDOG_INTERVAL_MS; опоздание тика
+    относительно расписания - задержка цикла событий, она копится в
+    гистограмме. Отдельный поток проверяет, как давно был последний тик:
+    если GUI поток молчит дольше порога, снимается его Python стек
+    (sys._current_frames), пока зависание длится - до UI_STALL_MAX_SAMPLES
+    снимков. Когда GUI поток снова тикает, зависание записывается в журнал
+    зависаний и публикуется через EventBus.ui_stall.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls, event_bus: EventBus):
+        if cls._instance is None:
+            cls._instance = UiWatchdog(event_bus)
+        return cls._instance
+
+    def __init__(self, event_bus: EventBus):
+        super().__init__()
+        self.event_bus = event_bus
+        self.logger = self._setup_logging()
+        self.interval = UI_WATCHDOG_INTERVAL_MS / 1000
+        self.threshold = UI_STALL_THRESHOLD_MS / 1000
+        self.log_file = UI_STALL_LOG_FILE
+
+        self._lock = threading.Lock()
+        self._last_tick = 0.0
+        self._samples: List[Dict[str, Any]] = []  # Снимки стека текущего зависания
+        self._gui_thread_id: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.latency = LatencyHistogram()
+        self.stalls: Deque[Dict[str, Any]] = deque(maxlen=UI_STALL_HISTORY)  # Последние зависания
+        self.stall_count = 0
+
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._on_tick)
+
+    def _setup_logging(self):
+        """Настройка логирования"""
+        logging.basicConfig(level=logging.INFO)
+        return logging.getLogger(__name__)
+
+    def start(self):
+        """Запускает сторожа; вызывается из GUI потока"""
+        if self._thread is not None:
+            return
+        self._gui_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._timer.start(UI_WATCHDOG_INTERVAL_MS)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample_loop, daemon=True, name="ui-watchdog")
+        self._thread.start()
+        self.logger.info(f"UI watchdog started (stall threshold {UI_STALL_THRESHOLD_MS} ms)")
+
+    def stop(self):
+        self._timer.stop()
+        self._stop.set()
+        self._thread = None
+
+    def _on_tick(self):
+        """Тик GUI потока: задержка цикла событий и завершение зависания, если оно было"""
+        now = time.monotonic()
+        with self._lock:
+            lag = max(now - self._last_tick - self.interval, 0.0)
+            self._last_tick = now
+            samples, self._samples = self._samples, []
+        self.latency.add(lag * 1000)
+
+        if lag >= self.threshold:
+            self._report_stall(lag, samples)
+
+    def _sample_loop(self):
+        """Поток-сэмплер: снимает стек GUI потока, пока тот не отвечает дольше порога"""
+        while not self._stop.wait(UI_WATCHDOG_SAMPLE_MS / 1000):
+            with self._lock:
+                silent = time.monotonic() - self._last_tick - self.interval
+                # Снимок на каждый пройденный порог: 1x, 2x, ... до лимита снимков
+                taken = len(self._samples)
+                due = taken < UI_STALL_MAX_SAMPLES and silent >= self.threshold * (taken + 1)
+            if not due:
+                continue
+
+            frame = sys._current_frames().get(self._gui_thread_id)
+            if frame is None:
+                continue
+            stack = _frame_stack(frame)
+            del frame
+            with self._lock:
+                # Тик мог успеть прийти, пока снимался стек - тогда снимок уже не нужен
+                if time.monotonic() - self._last_tick - self.interval >= self.threshold:
+                    self._samples.append({'after_ms': round(silent * 1000), 'stack': stack})
+
+    def _report_stall(self, lag: float, samples: List[Dict[str, Any]]):
+        stack = samples[0]['stack'] if samples else []
+        blocking = _blocking_frame(stack)
+        stall = {
+            'started_at': datetime.fromtimestamp(time.time() - lag).isoformat(timespec='milliseconds'),
+            'duration_ms': round(lag * 1000),
+            'blocking': _describe(blocking),
+            # Если за время зависания работа GUI потока сменилась, видно все места
+            'blocking_samples': list(dict.fromkeys(_describe(_blocking_frame(sample['stack'])) for sample in samples)),
+            'samples': samples
+        }
+        self.stall_count += 1
+        self.stalls.append(stall)
+
+        self.logger.warning(f"GUI event loop stalled for {stall['duration_ms']} ms in {stall['blocking']}")
+        self._write_stall(stall)
+        self.event_bus.ui_stall.emit(stall)
+
+    def _write_stall(self, stall: Dict[str, Any]):
+        """Дописывает зависание в журнал (JSON Lines)"""
+        try:
+            directory = os.path.dirname(self.log_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(stall, ensure_ascii=False) + "\n")
+        except OSError as e:
+            self.logger.error(f"Failed to write stall log {self.log_file}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Задержка цикла событий (мс) и число зависаний"""
+        return {
+            'ticks': self.latency.count,
+            'avg_lag_ms': round(self.latency.total_ms / self.latency.count, 2) if self.latency.count else 0.0,
+            'p95_lag_ms': self.latency.percentile(0.95),
+            'max_lag_ms': round(self.latency.max_ms, 1),
+            'stalls': self.stall_count
+        }
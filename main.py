@@ -2,6 +2,7 @@
 import sys
 import os
 import logging
+import argparse
 from datetime import datetime
 from PyQt6.QtWidgets import QApplication, QMessageBox
 from PyQt6.QtCore import QTimer
@@ -112,10 +113,60 @@ def handle_exception(exc_type, exc_value, exc_traceback):
     except:
         pass  # Если QApplication не доступен
 
+def parse_arguments(argv=None):
+    """Разбирает аргументы командной строки (аргументы Qt пропускаются)"""
+    parser = argparse.ArgumentParser(description="NMAP GUI Scanner")
+    parser.add_argument('--record-events', metavar='FILE',
+                        help="record EventBus traffic to FILE (.gz - compressed)")
+    parser.add_argument('--replay-events', metavar='FILE',
+                        help="replay a recorded EventBus stream into the application")
+    parser.add_argument('--replay-speed', type=float, default=1.0,
+                        help="replay speed multiplier, 0 - as fast as possible (default: 1)")
+    parser.add_argument('--headless', action='store_true',
+                        help="do not show the window (offscreen) and quit when the replay finishes")
+    parser.add_argument('--metrics-out', metavar='FILE',
+                        help="enable EventBus instrumentation and save metrics to FILE on exit")
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+def setup_event_tools(app, event_bus, args):
+    """Запись/воспроизведение трафика EventBus и сохранение метрик для бенчмарков UI"""
+    logger = logging.getLogger(__name__)
+    
+    if args.metrics_out:
+        event_bus.metrics.set_enabled(True)
+        app.aboutToQuit.connect(lambda: event_bus.dump_metrics(args.metrics_out))
+    
+    if args.record_events:
+        from core.event_recorder import EventRecorder
+        recorder = EventRecorder(event_bus, args.record_events)
+        recorder.start()
+        app.aboutToQuit.connect(recorder.stop)
+    
+    if args.replay_events:
+        from core.event_recorder import EventReplayer
+        replayer = EventReplayer(event_bus, args.replay_events, args.replay_speed)
+        
+        def on_replay_finished(stats):
+            logger.info(f"⏱️ Replay finished: {stats}")
+            if args.headless:
+                app.exit(1 if 'error' in stats else 0)
+        
+        replayer.finished.connect(on_replay_finished)
+        app.aboutToQuit.connect(replayer.stop)
+        # Старт после запуска цикла событий, когда все вкладки уже подписаны
+        QTimer.singleShot(0, replayer.start)
+        logger.info(f"▶️ Replaying {args.replay_events} at speed {args.replay_speed or 'max'}")
+        return replayer
+    return None
+
 def main():
     """Основная функция приложения"""
     # Настройка глобального обработчика исключений
     sys.excepthook = handle_exception
+    args = parse_arguments(sys.argv[1:])
+    if args.headless:
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
     
     # Настройка логирования
     setup_logging()
@@ -127,7 +178,8 @@ def main():
     # Проверяем зависимости
     logger.info("🔍 Checking dependencies...")
     
-    if not check_dependencies():
+    # Воспроизведению записи nmap не нужен
+    if not check_dependencies() and not args.replay_events:
         app = QApplication(sys.argv)
         QMessageBox.critical(
             None,
@@ -179,15 +231,24 @@ def main():
         
         from core.app_loader import ApplicationLoader
         
+        if args.replay_events:
+            # Воспроизведенные сканирования не должны попасть в настоящую историю:
+            # из нее строятся приоритеты целей, кэш версий и smart ports
+            from core.history_store import ScanHistoryStore
+            ScanHistoryStore.get_instance(":memory:")
+        
         loader = ApplicationLoader()
         main_window = loader.load_application()
         
         if main_window:
             logger.info("✅ Application loaded successfully")
+            # Ссылка на воспроизведение держит его живым до выхода из цикла событий
+            replayer = setup_event_tools(app, loader.event_bus, args)
             
             # Показываем главное окно
-            main_window.show()
-            logger.info("👀 Main window displayed")
+            if not args.headless:
+                main_window.show()
+                logger.info("👀 Main window displayed")
             
             # Запускаем главный цикл
             logger.info("🔄 Starting main event loop...")
@@ -1,4 +1,4 @@
-from PyQt6.QtWidgets import QWidget
+from PyQt6.QtWidgets import QWidget, QComboBox
 from core.event_bus import EventBus
 
 class BaseTabModule(QWidget):
@@ -10,6 +10,12 @@ class BaseTabModule(QWidget):
         self.event_bus = event_bus
         self.dependencies = dependencies or {}
         
+        # Ссылка на отображаемый результат в рабочем пространстве
+        self._result_handle = None
+        # Переключаться на сканирование, результаты которого сейчас приходят
+        self.follow_live = True
+        self.scan_selector = None
+        
         # Вызываем методы инициализации
         self._setup_event_handlers()
         self._create_ui()
@@ -22,3 +28,88 @@ class BaseTabModule(QWidget):
     def _create_ui(self):
         """Создает UI компонент (должен быть переопределен)"""
         pass
+    
+    def _show_workspace_result(self, scan_id: str, result):
+        """Показывает сканирование, выбранное среди открытых (переопределяется вкладками со списком)"""
+        pass
+    
+    # Рабочее пространство результатов
+    def _hold_result(self, scan_id: str, result=None):
+        """
+        Берет ссылку на результат сканирования в рабочем пространстве и
+        отпускает ссылку на прежнее. Возвращает результат (из памяти или истории).
+        """
+        workspace = self.dependencies.get('result_workspace')
+        handle = self._result_handle
+        if workspace is None or not scan_id:
+            return result
+        if handle is not None and handle.scan_id == scan_id:
+            return result if result is not None else handle.result
+        
+        new_handle = workspace.acquire(scan_id, result)
+        if new_handle is None:
+            return result
+        if handle is not None:
+            handle.release()
+        self._result_handle = new_handle
+        self._select_scan_in_selector(scan_id)
+        return new_handle.result
+    
+    def _release_result(self):
+        if self._result_handle is not None:
+            self._result_handle.release()
+            self._result_handle = None
+    
+    def _follows_scan(self, scan_id: str) -> bool:
+        """Показывать ли пришедшие результаты: вкладка следит за идущим сканированием или это уже выбранное"""
+        return (self.follow_live or self._result_handle is None or
+                self._result_handle.scan_id == scan_id)
+    
+    def _create_scan_selector(self) -> QComboBox:
+        """Список открытых сканирований для переключения без повторной загрузки"""
+        self.scan_selector = QComboBox()
+        self.scan_selector.setMinimumWidth(260)
+        self.scan_selector.setToolTip("Open scans - switch without re-running or re-parsing")
+        # activated - только выбор пользователем, заполнение списка его не вызывает
+        self.scan_selector.activated.connect(self._on_scan_selector_activated)
+        
+        workspace = self.dependencies.get('result_workspace')
+        if workspace is not None:
+            self._fill_scan_selector(workspace.list_scans())
+            self.event_bus.connect_signal('workspace_changed', self._on_workspace_changed)
+            self.event_bus.connect_signal('scan_started', self._on_live_scan_started)
+        return self.scan_selector
+    
+    def _on_workspace_changed(self, data: dict):
+        self._fill_scan_selector(data.get('scans', []))
+    
+    def _on_live_scan_started(self, data: dict):
+        # Новое сканирование пользователя - снова показываем идущие результаты
+        self.follow_live = True
+    
+    def _fill_scan_selector(self, scans: list):
+        self.scan_selector.clear()
+        for scan in scans:
+            label = f"{scan['scan_id'][:8]} - {scan.get('hosts', 0)} hosts, {scan.get('status', '')}"
+            if not scan.get('in_memory', True):
+                label += " (on disk)"
+            self.scan_selector.addItem(label, scan['scan_id'])
+        if self._result_handle is not None:
+            self._select_scan_in_selector(self._result_handle.scan_id)
+    
+    def _select_scan_in_selector(self, scan_id: str):
+        if self.scan_selector is None:
+            return
+        index = self.scan_selector.findData(scan_id)
+        if index >= 0:
+            self.scan_selector.setCurrentIndex(index)
+    
+    def _on_scan_selector_activated(self, index: int):
+        scan_id = self.scan_selector.itemData(index)
+        if not scan_id:
+            return
+        # Выбор самого свежего сканирования возвращает слежение за идущими результатами
+        self.follow_live = index == 0
+        result = self._hold_result(scan_id)
+        if result is not None:
+            self._show_workspace_result(scan_id, result)
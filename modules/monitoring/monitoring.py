@@ -1,10 +1,14 @@
 from PyQt6.QtWidgets import (QVBoxLayout, QGroupBox,
                              QTextEdit, QLabel, QTableWidget,
-                             QTableWidgetItem, QHeaderView, QHBoxLayout, QPushButton)
-from PyQt6.QtCore import pyqtSlot
+                             QTableWidgetItem, QHeaderView, QHBoxLayout, QPushButton,
+                             QCheckBox, QFileDialog, QMessageBox)
+from PyQt6.QtCore import pyqtSlot, QTimer
 from datetime import datetime
 from modules.base_module import BaseTabModule
 from core.event_bus import EventBus
+from core.event_dispatch import DeliveryMode, QueuePolicy
+from core.analysis_service import AnalysisService
+from shared.constants import EVENT_METRICS_REFRESH_MS, UI_STALL_HISTORY
 
 def create_tab(event_bus: EventBus, dependencies: dict = None):
     return MonitoringTab(event_bus, dependencies)
@@ -13,10 +17,15 @@ class MonitoringTab(BaseTabModule):
     
     def _setup_event_handlers(self):
         """Настройка обработчиков событий"""
-        self.event_bus.scan_started.connect(self._on_scan_started)
-        self.event_bus.scan_progress.connect(self._on_scan_progress)
-        self.event_bus.scan_completed.connect(self._on_scan_completed)
-        self.event_bus.scan_stopped.connect(self._on_scan_stopped)
+        # Прогресс объединяется по сканированию; подключаем до событий завершения,
+        # чтобы последнее состояние пришло раньше них
+        self.event_bus.connect_coalesced('scan_progress', self._on_scan_progress)
+        self.event_bus.connect_signal('scan_started', self._on_scan_started)
+        self.event_bus.connect_signal('scan_completed', self._on_scan_completed)
+        self.event_bus.connect_signal('scan_stopped', self._on_scan_stopped)
+        self.event_bus.connect_signal('scan_diff_ready', self._on_scan_diff_ready)
+        self.event_bus.connect_signal('analysis_ready', self._on_analysis_ready, DeliveryMode.BOUNDED, policy=QueuePolicy.MERGE)
+        self.event_bus.connect_signal('ui_stall', self._on_ui_stall)
     
     def _create_ui(self):
         """Создает UI компонент мониторинга"""
@@ -68,12 +77,76 @@ class MonitoringTab(BaseTabModule):
         
         layout.addWidget(log_group)
         
+        # Метрики шины событий: какой обработчик тормозит GUI
+        metrics_group = QGroupBox("Event Bus Metrics")
+        metrics_layout = QVBoxLayout(metrics_group)
+        
+        metrics_controls = QHBoxLayout()
+        self.metrics_checkbox = QCheckBox("Instrument EventBus")
+        self.metrics_checkbox.setChecked(self.event_bus.metrics.enabled)
+        self.metrics_checkbox.toggled.connect(self._toggle_metrics)
+        metrics_controls.addWidget(self.metrics_checkbox)
+        metrics_controls.addStretch()
+        self.metrics_reset_btn = QPushButton("Reset")
+        self.metrics_reset_btn.clicked.connect(self._reset_metrics)
+        metrics_controls.addWidget(self.metrics_reset_btn)
+        self.metrics_export_btn = QPushButton("Export JSON")
+        self.metrics_export_btn.clicked.connect(self._export_metrics)
+        metrics_controls.addWidget(self.metrics_export_btn)
+        metrics_layout.addLayout(metrics_controls)
+        
+        self.handlers_table = QTableWidget()
+        self.handlers_table.setColumnCount(7)
+        self.handlers_table.setHorizontalHeaderLabels([
+            "Handler", "Calls", "Avg ms", "p95 ms", "Max ms", "Total ms", "Errors"
+        ])
+        self.handlers_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.handlers_table.setMaximumHeight(200)
+        metrics_layout.addWidget(self.handlers_table)
+        
+        self.signals_label = QLabel("Instrumentation disabled")
+        self.signals_label.setWordWrap(True)
+        metrics_layout.addWidget(self.signals_label)
+        
+        layout.addWidget(metrics_group)
+        
+        # Отзывчивость GUI: задержка цикла событий и зависания со слотом, который их вызвал
+        stalls_group = QGroupBox("UI Responsiveness")
+        stalls_layout = QVBoxLayout(stalls_group)
+        
+        self.responsiveness_label = QLabel("UI watchdog disabled")
+        stalls_layout.addWidget(self.responsiveness_label)
+        
+        self.stalls_table = QTableWidget()
+        self.stalls_table.setColumnCount(3)
+        self.stalls_table.setHorizontalHeaderLabels(["Time", "Duration", "Blocked in"])
+        self.stalls_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+        self.stalls_table.setMaximumHeight(150)
+        stalls_layout.addWidget(self.stalls_table)
+        
+        layout.addWidget(stalls_group)
+        
+        self.ui_watchdog = self.dependencies.get('ui_watchdog')
+        if self.ui_watchdog:
+            for stall in self.ui_watchdog.stalls:
+                self._add_stall_row(stall)
+            self.responsiveness_timer = QTimer(self)
+            self.responsiveness_timer.timeout.connect(self._refresh_responsiveness)
+            self.responsiveness_timer.start(EVENT_METRICS_REFRESH_MS)
+        
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.timeout.connect(self._refresh_metrics)
+        if self.event_bus.metrics.enabled:
+            self.metrics_timer.start(EVENT_METRICS_REFRESH_MS)
+        
         # Статистика
         self.status_label = QLabel("Ready - No active scans")
         layout.addWidget(self.status_label)
         
         # Хранилище данных
         self.active_scans = {}
+        self.awaiting_analysis = set()  # Завершенные сканирования, сводка по которым еще считается
+        self.analysis_service = self.dependencies.get('analysis_service') or AnalysisService.get_instance(self.event_bus)
     
     def _log_event(self, message: str, level: str = "INFO"):
         """Добавляет запись в журнал событий"""
@@ -176,14 +249,20 @@ class MonitoringTab(BaseTabModule):
         row = scan_info['row']
         
         if results and results.status == "completed":
-            host_count = len(results.hosts) if hasattr(results, 'hosts') else 0
-            open_ports = sum(len([p for p in h.ports if p.state == 'open']) for h in results.hosts) if results.hosts else 0
-            
             self.scans_table.item(row, 4).setText("100%")
             self.scans_table.item(row, 5).setText("Completed")
             
             self._log_event(f"✅ Scan {scan_id[:8]} completed successfully!", "SUCCESS")
-            self._log_event(f"📊 Results: {host_count} hosts, {open_ports} open ports", "INFO")
+            # Сводку считает сервис анализа; если снимок еще не готов - дождемся analysis_ready
+            analysis = self.analysis_service.get_analysis(results)
+            if analysis:
+                self._log_analysis(analysis)
+            else:
+                self.awaiting_analysis.add(scan_id)
+            
+            script_store = getattr(results, 'script_store', None)
+            if script_store and script_store.references:
+                self._log_event(f"🧩 Script outputs: {script_store.get_summary()}", "INFO")
         else:
             self.scans_table.item(row, 5).setText("Failed")
             self._log_event(f"❌ Scan {scan_id[:8]} failed", "ERROR")
@@ -192,6 +271,21 @@ class MonitoringTab(BaseTabModule):
         del self.active_scans[scan_id]
         self._update_status()
     
+    @pyqtSlot(dict)
+    def _on_analysis_ready(self, data):
+        """Логирует сводку по завершенному сканированию, когда анализ готов"""
+        scan_id = data.get('scan_id')
+        if scan_id in self.awaiting_analysis and data.get('analysis'):
+            self.awaiting_analysis.discard(scan_id)
+            self._log_analysis(data['analysis'])
+    
+    def _log_analysis(self, analysis):
+        self._log_event(f"📊 Results: {analysis.total_hosts} hosts, {analysis.open_ports} open ports", "INFO")
+        high_risk = analysis.risk_counts.get("HIGH", 0)
+        if analysis.vulnerability_total or high_risk:
+            self._log_event(f"⚠️ {analysis.vulnerability_total} potential vulnerabilities, "
+                            f"{high_risk} high-risk services", "WARNING")
+    
     @pyqtSlot(dict)
     def _on_scan_stopped(self, data):
         """Обрабатывает остановку сканирования"""
@@ -207,6 +301,94 @@ class MonitoringTab(BaseTabModule):
             del self.active_scans[scan_id]
             self._update_status()
     
+    @pyqtSlot(dict)
+    def _on_scan_diff_ready(self, data):
+        """Логирует результат сравнения сканирований"""
+        diff = data.get('diff')
+        if not diff:
+            return
+        
+        level = "WARNING" if diff.has_changes() else "INFO"
+        self._log_event(
+            f"🔀 Changes {data.get('old_scan_id', '')[:8]} → {data.get('new_scan_id', '')[:8]}: {diff.get_summary()}",
+            level
+        )
+    
+    def _toggle_metrics(self, enabled: bool):
+        """Включает/выключает инструментирование шины"""
+        self.event_bus.metrics.set_enabled(enabled)
+        if enabled:
+            self.metrics_timer.start(EVENT_METRICS_REFRESH_MS)
+        else:
+            self.metrics_timer.stop()
+        self._refresh_metrics()
+    
+    def _reset_metrics(self):
+        self.event_bus.metrics.reset()
+        self._refresh_metrics()
+    
+    def _refresh_metrics(self):
+        """Обновляет таблицу обработчиков (самые затратные сверху) и сводку по сигналам"""
+        metrics = self.event_bus.metrics
+        handlers = metrics.get_handler_stats()
+        
+        self.handlers_table.setRowCount(len(handlers))
+        for row, stats in enumerate(handlers):
+            values = [f"{stats['handler']} ({stats['signal']})", stats['count'], stats['avg_ms'],
+                      stats['p95_ms'], stats['max_ms'], stats['total_ms'], stats['errors']]
+            for column, value in enumerate(values):
+                self.handlers_table.setItem(row, column, QTableWidgetItem(str(value)))
+        
+        if not metrics.enabled:
+            self.signals_label.setText("Instrumentation disabled")
+            return
+        signals = sorted(metrics.get_signal_stats(), key=lambda stats: stats['emits'], reverse=True)
+        self.signals_label.setText("; ".join(
+            f"{stats['signal']}: {stats['emits']} ({stats['rate_per_sec']}/s, avg payload {stats['payload_avg']})"
+            for stats in signals[:6]
+        ) or "No events yet")
+    
+    def _export_metrics(self):
+        """Сохраняет метрики шины в JSON"""
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Export EventBus Metrics",
+            f"eventbus_metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json", "JSON Files (*.json)"
+        )
+        if not file_path:
+            return
+        try:
+            self.event_bus.dump_metrics(file_path)
+            self._log_event(f"💾 EventBus metrics saved to {file_path}", "SUCCESS")
+        except OSError as e:
+            QMessageBox.critical(self, "Export Error", f"Failed to save metrics: {e}")
+    
+    @pyqtSlot(dict)
+    def _on_ui_stall(self, stall):
+        """Показывает зависание GUI потока и место, где он был занят"""
+        self._add_stall_row(stall)
+        self._log_event(f"🐢 UI stalled for {stall['duration_ms']} ms in {stall['blocking']}", "WARNING")
+        self._refresh_responsiveness()
+    
+    def _add_stall_row(self, stall: dict):
+        self.stalls_table.insertRow(0)
+        self.stalls_table.setItem(0, 0, QTableWidgetItem(stall['started_at'].split('T')[-1]))
+        self.stalls_table.setItem(0, 1, QTableWidgetItem(f"{stall['duration_ms']} ms"))
+        item = QTableWidgetItem(stall['blocking'])
+        # Полный список мест, если за время зависания GUI поток был занят в нескольких
+        item.setToolTip("\n".join(stall.get('blocking_samples') or [stall['blocking']]))
+        self.stalls_table.setItem(0, 2, item)
+        if self.stalls_table.rowCount() > UI_STALL_HISTORY:
+            self.stalls_table.removeRow(self.stalls_table.rowCount() - 1)
+    
+    def _refresh_responsiveness(self):
+        if not self.ui_watchdog:
+            return
+        stats = self.ui_watchdog.get_stats()
+        self.responsiveness_label.setText(
+            f"Event loop lag: avg {stats['avg_lag_ms']} ms, p95 ≤{stats['p95_lag_ms']} ms, "
+            f"max {stats['max_lag_ms']} ms - {stats['stalls']} stalls (log: {self.ui_watchdog.log_file})"
+        )
+    
     def _update_status(self):
         """Обновляет статусную строку"""
         active_count = len(self.active_scans)
@@ -13,7 +13,9 @@ from typing import List, Dict
 
 from modules.base_module import BaseTabModule
 from core.event_bus import EventBus
+from core.analysis_service import AnalysisService
 from shared.models.scan_result import ScanResult, HostInfo, PortInfo
+from shared.models.result_analysis import ResultAnalysis
 
 def create_tab(event_bus: EventBus, dependencies: dict = None):
     return ReportingTab(event_bus, dependencies)
@@ -25,14 +27,15 @@ class ReportingTab(BaseTabModule):
         super().__init__(event_bus, dependencies)
         self.current_results = None
         self.report_templates = {}
+        self.analysis_service = self.dependencies.get('analysis_service') or AnalysisService.get_instance(event_bus)
         
         # Загружаем шаблоны отчетов
         self._load_report_templates()
     
     def _setup_event_handlers(self):
         """Настройка обработчиков событий"""
-        self.event_bus.results_updated.connect(self._on_results_updated)
-        self.event_bus.scan_completed.connect(self._on_scan_completed)
+        self.event_bus.connect_signal('results_updated', self._on_results_updated)
+        self.event_bus.connect_signal('scan_completed', self._on_scan_completed)
     
     def _create_ui(self) -> QWidget:
         """Создает UI компонент отчетов"""
@@ -217,10 +220,14 @@ class ReportingTab(BaseTabModule):
         
         if file_path:
             try:
-                report_content = self._create_report_content()
-                
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(report_content)
+                if file_format == "xml" and self.current_results.has_raw_xml():
+                    # Исходный XML распаковываем прямо в файл, минуя память
+                    self.current_results.raw_xml_blob.copy_to(file_path)
+                else:
+                    report_content = self._create_report_content()
+                    
+                    with open(file_path, 'w', encoding='utf-8') as f:
+                        f.write(report_content)
                 
                 QMessageBox.information(self, "Success", f"Report exported to {file_path}")
                 
@@ -647,120 +654,40 @@ class ReportingTab(BaseTabModule):
     def _generate_xml_report(self) -> str:
         """Генерирует XML отчет"""
         # Используем существующий XML от nmap, добавляем метаданные
-        if hasattr(self.current_results, 'raw_xml') and self.current_results.raw_xml:
-            return self.current_results.raw_xml
+        if self.current_results.has_raw_xml():
+            return self.current_results.raw_xml_blob.read_text()
         else:
             return "<?xml version=\"1.0\"?>\n<report>No raw XML data available</report>"
     
+    def _analysis(self) -> ResultAnalysis:
+        """Снимок анализа текущих результатов (обычно уже посчитан сервисом в фоне)"""
+        return self.analysis_service.get_analysis(self.current_results, compute=True)
+    
     def _calculate_statistics(self) -> Dict:
         """Вычисляет статистику сканирования"""
         if not self.current_results:
             return {}
         
-        stats = {
-            "total_hosts": len(self.current_results.hosts),
-            "active_hosts": len([h for h in self.current_results.hosts if h.state == "up"]),
-            "open_ports": 0,
-            "unique_services": set(),
-            "os_detected": 0,
-            "potential_vulnerabilities": 0
+        analysis = self._analysis()
+        return {
+            "total_hosts": analysis.total_hosts,
+            "active_hosts": analysis.active_hosts,
+            "open_ports": analysis.open_ports,
+            "unique_services": analysis.unique_services,
+            "os_detected": analysis.os_detected,
+            "potential_vulnerabilities": len(analysis.potential_vulnerabilities)
         }
-        
-        for host in self.current_results.hosts:
-            if host.os_family:
-                stats["os_detected"] += 1
-            
-            for port in host.ports:
-                if port.state == "open":
-                    stats["open_ports"] += 1
-                    if port.service and port.service != "unknown":
-                        stats["unique_services"].add(port.service)
-        
-        stats["unique_services"] = len(stats["unique_services"])
-        stats["potential_vulnerabilities"] = len(self._find_potential_vulnerabilities())
-        
-        return stats
     
     def _get_top_services(self, limit: int = 10) -> List[tuple]:
         """Возвращает топ сервисов по количеству"""
-        service_count = {}
-        service_ports = {}
-        
-        for host in self.current_results.hosts:
-            for port in host.ports:
-                if port.state == "open" and port.service != "unknown":
-                    service = port.service
-                    if service not in service_count:
-                        service_count[service] = 0
-                        service_ports[service] = set()
-                    
-                    service_count[service] += 1
-                    service_ports[service].add(port.port)
-        
-        # Сортируем по количеству
-        sorted_services = sorted(service_count.items(), key=lambda x: x[1], reverse=True)
-        
-        result = []
-        for service, count in sorted_services[:limit]:
-            common_ports = sorted(service_ports[service])
-            result.append((service, count, common_ports))
-        
-        return result
+        return [(stat.service, stat.count, list(stat.ports))
+                for stat in self._analysis().top_services(limit)]
     
     def _find_potential_vulnerabilities(self) -> List[Dict]:
         """Находит потенциальные уязвимости based on service versions и скриптов"""
-        vulnerabilities = []
-        
-        # Расширенный список уязвимых версий
-        vulnerable_versions = {
-            "apache": [("2.4.49", "HIGH", "CVE-2021-41773 - Path Traversal"),
-                      ("2.4.50", "HIGH", "CVE-2021-42013 - Path Traversal")],
-            "openssh": [("7.0", "MEDIUM", "Multiple vulnerabilities"), 
-                       ("7.1", "MEDIUM", "Multiple vulnerabilities"),
-                       ("7.2", "MEDIUM", "Multiple vulnerabilities")],
-            "ftp": [("vsftpd 2.3.4", "HIGH", "Backdoor command execution")],
-            "samba": [("3.0.0", "HIGH", "Multiple vulnerabilities"),
-                     ("3.0.1", "HIGH", "Multiple vulnerabilities")],
-            "tomcat": [("7.0.0", "MEDIUM", "Initial release - consider upgrading"),
-                      ("8.0.0", "MEDIUM", "Initial release - consider upgrading")]
-        }
-        
-        for host in self.current_results.hosts:
-            for port in host.ports:
-                if port.state == "open" and port.version:
-                    version_lower = port.version.lower()
-                    
-                    # Проверяем версии сервисов
-                    for service, vulnerable_list in vulnerable_versions.items():
-                        if service in port.service.lower() or service in version_lower:
-                            for vulnerable_version, risk, issue in vulnerable_list:
-                                if vulnerable_version in port.version:
-                                    vulnerabilities.append({
-                                        "host": host.ip,
-                                        "port": port.port,
-                                        "service": port.service,
-                                        "version": port.version,
-                                        "risk": risk,
-                                        "issue": issue,
-                                        "recommendation": f"Update {service} to latest version"
-                                    })
-                                    break
-                    
-                    # Проверяем скрипты nmap на индикаторы уязвимостей
-                    for script_name, script_output in host.scripts.items():
-                        script_lower = script_output.lower()
-                        if any(keyword in script_lower for keyword in ['vulnerable', 'vulnerability']):
-                            vulnerabilities.append({
-                                "host": host.ip,
-                                "port": port.port,
-                                "service": port.service,
-                                "version": port.version or "Unknown",
-                                "risk": "MEDIUM",
-                                "issue": f"Potential vulnerability detected by {script_name}",
-                                "recommendation": "Investigate the script output for details"
-                            })
-        
-        return vulnerabilities
+        if not self.current_results:
+            return []
+        return [dict(vuln) for vuln in self._analysis().potential_vulnerabilities]
     
     def _count_vulnerabilities(self, host: HostInfo) -> int:
         """Считает количество уязвимостей для хоста"""
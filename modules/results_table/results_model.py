@@ -0,0 +1,323 @@
+import socket
+from typing import Any, Dict, List, Optional
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QAbstractProxyModel, QModelIndex, QTimer
+from PyQt6.QtGui import QColor
+
+from shared.constants import RESULTS_FINDINGS_RESORT_MS
+from shared.models.scan_result import HostInfo
+from shared.utils.findings import FindingsCache
+
+HostRole = Qt.ItemDataRole.UserRole  # Роль для получения самого HostInfo строки
+
+class HostTableModel(QAbstractTableModel):
+    """
+    Модель таблицы хостов поверх списка HostInfo результата.
+
+    Текст ячеек формируется по запросу - представление запрашивает только
+    видимые строки, поэтому размер результата не влияет на время отрисовки.
+    Число уязвимостей берется из FindingsCache: пока фоновый расчет не дошел
+    до хоста, в ячейке показывается многоточие.
+    """
+
+    COLUMNS = ["IP Address", "Hostname", "Status", "OS", "Open Ports", "Services", "Vulnerabilities"]
+    VULN_COLUMN = 6
+
+    def __init__(self, findings: FindingsCache, parent=None):
+        super().__init__(parent)
+        self._findings = findings
+        self._hosts: List[HostInfo] = []
+        self._rows_by_ip: Dict[str, int] = {}
+        self._sort_keys: Dict[int, List[Any]] = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._hosts)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        host = self._hosts[index.row()]
+        column = index.column()
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._display_text(index.row(), host, column)
+        if role == Qt.ItemDataRole.BackgroundRole and column == self.VULN_COLUMN:
+            if (self.vulnerability_count(index.row(), compute=False) or 0) > 0:
+                return QColor(255, 200, 200)  # Красный фон для уязвимостей
+        if role == HostRole:
+            return host
+        return None
+
+    def _display_text(self, row: int, host: HostInfo, column: int) -> str:
+        if column == 0:
+            return host.ip
+        if column == 1:
+            return host.hostname or "N/A"
+        if column == 2:
+            return host.state
+        if column == 3:
+            return self._os_text(host)
+        if column == 4:
+            return str(sum(1 for port in host.ports if port.state == "open"))
+        if column == 5:
+            return self._services_text(host)
+        count = self.vulnerability_count(row, compute=False)
+        if count is None:
+            return "…"
+        return f"{count} found" if count > 0 else "None"
+
+    @staticmethod
+    def _os_text(host: HostInfo) -> str:
+        if not host.os_family:
+            return "Unknown"
+        return f"{host.os_family} ({host.os_details})" if host.os_details else host.os_family
+
+    @staticmethod
+    def _services_text(host: HostInfo) -> str:
+        services = [f"{port.service}:{port.port}" for port in host.ports
+                    if port.state == "open" and port.service and port.service != "unknown"]
+        return ", ".join(services) if services else "None"
+
+    def vulnerability_count(self, row: int, compute: bool = True) -> Optional[int]:
+        """Число находок по строке; compute=False - только из кэша (None, если не посчитано)"""
+        host = self._hosts[row]
+        findings = self._findings.get(host) if compute else self._findings.peek(host)
+        return None if findings is None else len(findings)
+
+    @staticmethod
+    def _address_key(ip: str) -> int:
+        """
+        Числовой ключ адреса: IPv4, затем IPv6, затем нераспознанные.
+        inet_pton и целые ключи заметно быстрее ipaddress и кортежей на миллионе строк.
+        """
+        try:
+            if ':' in ip:
+                return (1 << 32) + int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), 'big')
+            return int.from_bytes(socket.inet_pton(socket.AF_INET, ip), 'big')
+        except OSError:
+            return 1 << 160
+
+    def _compute_sort_keys(self, column: int, start: int, stop: Optional[int] = None) -> List[Any]:
+        """Ключи сортировки строк [start, stop): адреса - численно, счетчики - как числа"""
+        hosts = self._hosts[start:stop]
+        if column == 0:
+            return [self._address_key(host.ip) for host in hosts]
+        if column == 4:
+            return [sum(1 for port in host.ports if port.state == "open") for host in hosts]
+        if column == self.VULN_COLUMN:
+            # Только из кэша: находки еще не посчитанных хостов считает фоновый поток,
+            # до этого строка сортируется как -1; refresh_findings обновляет порядок
+            counts = (self.vulnerability_count(row, compute=False) for row in range(start, start + len(hosts)))
+            return [-1 if count is None else count for count in counts]
+        return [self._display_text(row, host, column).lower() for row, host in enumerate(hosts, start)]
+
+    def sort_keys(self, column: int) -> List[Any]:
+        """Ключи сортировки всех строк по колонке (считаются один раз, новые строки - досчитываются)"""
+        keys = self._sort_keys.get(column)
+        if keys is None:
+            keys = self._sort_keys[column] = self._compute_sort_keys(column, 0)
+        elif len(keys) < len(self._hosts):
+            keys.extend(self._compute_sort_keys(column, len(keys)))
+        return keys
+
+    def host_at(self, row: int) -> HostInfo:
+        return self._hosts[row]
+
+    def hosts(self) -> List[HostInfo]:
+        return self._hosts
+
+    def row_of(self, ip: str) -> Optional[int]:
+        return self._rows_by_ip.get(ip)
+
+    def set_hosts(self, hosts: List[HostInfo]):
+        """Заменяет содержимое модели (модель держит свою копию списка)"""
+        self.beginResetModel()
+        self._hosts = list(hosts)
+        self._rows_by_ip = {host.ip: row for row, host in enumerate(self._hosts)}
+        self._sort_keys = {}
+        self.endResetModel()
+
+    def append_hosts(self, hosts: List[HostInfo]):
+        """Добавляет хосты в конец одной вставкой"""
+        if not hosts:
+            return
+        first = len(self._hosts)
+        self.beginInsertRows(QModelIndex(), first, first + len(hosts) - 1)
+        self._hosts.extend(hosts)
+        for row, host in enumerate(hosts, first):
+            self._rows_by_ip[host.ip] = row
+        self.endInsertRows()
+
+    def merge_hosts(self, hosts: List[HostInfo]):
+        """
+        Обновляет строки уже известных адресов и дописывает новые.
+        Используется для потоковых результатов: сброса модели нет, поэтому
+        выделение и позиция прокрутки сохраняются.
+        """
+        new_hosts: List[HostInfo] = []
+        pending: Dict[str, int] = {}
+        changed: List[int] = []
+        for host in hosts:
+            row = self._rows_by_ip.get(host.ip)
+            if row is not None:
+                self._hosts[row] = host
+                changed.append(row)
+            elif host.ip in pending:
+                # Адрес повторился в той же пачке - берем последнюю версию
+                new_hosts[pending[host.ip]] = host
+            else:
+                pending[host.ip] = len(new_hosts)
+                new_hosts.append(host)
+
+        if changed:
+            for column, keys in self._sort_keys.items():
+                for row in changed:
+                    if row < len(keys):
+                        keys[row] = self._compute_sort_keys(column, row, row + 1)[0]
+            self.dataChanged.emit(self.index(min(changed), 0),
+                                  self.index(max(changed), len(self.COLUMNS) - 1))
+        self.append_hosts(new_hosts)
+    
+    def refresh_findings(self):
+        """Перерисовывает колонку уязвимостей после фонового расчета находок"""
+        self._sort_keys.pop(self.VULN_COLUMN, None)
+        if self._hosts:
+            self.dataChanged.emit(self.index(0, self.VULN_COLUMN),
+                                  self.index(len(self._hosts) - 1, self.VULN_COLUMN))
+
+    def clear(self):
+        self.set_hosts([])
+
+class HostSortProxyModel(QAbstractProxyModel):
+    """
+    Сортирующий прокси для HostTableModel.
+
+    Вместо попарных сравнений через lessThan (вызов Python на каждое
+    сравнение) порядок строк строится одним sorted() по ключам, которые
+    модель считает для колонки один раз. Прокси хранит перестановку
+    строк и обратную к ней.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._order: List[int] = []
+        self._inverse: List[int] = []
+        self._sort_column = -1
+        self._sort_order = Qt.SortOrder.AscendingOrder
+        # Досчет находок приходит пачками - пересортировка по ним не чаще раза в интервал
+        self._resort_timer = QTimer(self)
+        self._resort_timer.setSingleShot(True)
+        self._resort_timer.setInterval(RESULTS_FINDINGS_RESORT_MS)
+        self._resort_timer.timeout.connect(self._resort_if_sorted)
+
+    def setSourceModel(self, model: HostTableModel):
+        self.beginResetModel()
+        super().setSourceModel(model)
+        model.modelReset.connect(self._on_source_reset)
+        model.rowsInserted.connect(self._on_rows_inserted)
+        model.dataChanged.connect(self._on_data_changed)
+        self._order = list(range(model.rowCount()))
+        self._inverse = list(self._order)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._order)
+
+    def columnCount(self, parent=QModelIndex()):
+        return self.sourceModel().columnCount() if self.sourceModel() else 0
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or row < 0 or row >= len(self._order):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        return self.sourceModel().headerData(section, orientation, role)
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return QModelIndex()
+        return self.sourceModel().index(self._order[proxy_index.row()], proxy_index.column())
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        return self.createIndex(self._inverse[source_index.row()], source_index.column())
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self._sort_column = column
+        self._sort_order = order
+        self._resort()
+
+    def _resort(self):
+        """Перестраивает порядок строк, сохраняя выделение"""
+        model = self.sourceModel()
+        count = model.rowCount()
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        source_rows = [self._order[index.row()] for index in persistent]
+
+        if self._sort_column < 0:
+            self._order = list(range(count))
+        else:
+            keys = model.sort_keys(self._sort_column)
+            self._order = sorted(range(count), key=keys.__getitem__,
+                                 reverse=self._sort_order == Qt.SortOrder.DescendingOrder)
+        self._inverse = [0] * count
+        for proxy_row, source_row in enumerate(self._order):
+            self._inverse[source_row] = proxy_row
+
+        self.changePersistentIndexList(
+            persistent,
+            [self.createIndex(self._inverse[row], index.column()) for row, index in zip(source_rows, persistent)]
+        )
+        self.layoutChanged.emit()
+
+    def _resort_if_sorted(self):
+        if self._sort_column >= 0 and self._order:
+            self._resort()
+
+    def _on_source_reset(self):
+        self.beginResetModel()
+        count = self.sourceModel().rowCount()
+        self._order = list(range(count))
+        self._inverse = list(self._order)
+        self.endResetModel()
+        if self._sort_column >= 0 and count:
+            self._resort()
+
+    def _on_rows_inserted(self, parent, first, last):
+        """Модель только дописывает строки в конец; при активной сортировке порядок пересчитывается"""
+        self.beginInsertRows(QModelIndex(), len(self._order), len(self._order) + last - first)
+        for source_row in range(first, last + 1):
+            self._inverse.append(len(self._order))
+            self._order.append(source_row)
+        self.endInsertRows()
+        if self._sort_column >= 0:
+            self._resort()
+
+    def _on_data_changed(self, top_left, bottom_right, roles=None):
+        """Изменение ячеек источника: строки могли переместиться, поэтому обновляем колонки целиком"""
+        if not self._order:
+            return
+        # Строки заменены целиком (merge_hosts) - ключ сортировки мог измениться.
+        # Досчет находок (одна колонка) пересобирает порядок, только если сортировка по ней
+        whole_rows = top_left.column() == 0 and bottom_right.column() == self.columnCount() - 1
+        if whole_rows and self._sort_column >= 0:
+            self._resort()
+        elif top_left.column() <= self._sort_column <= bottom_right.column():
+            if not self._resort_timer.isActive():
+                self._resort_timer.start()
+        self.dataChanged.emit(self.index(0, top_left.column()),
+                              self.index(len(self._order) - 1, bottom_right.column()))
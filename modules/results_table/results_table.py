@@ -1,72 +1,21 @@
 from PyQt6.QtWidgets import (QVBoxLayout, QGroupBox,
-                             QLabel, QTableWidget, QTableWidgetItem,
+                             QLabel, QTableWidget, QTableWidgetItem, QTableView,
                              QHeaderView, QTextEdit, QHBoxLayout, QPushButton, 
-                             QMessageBox, QDialog)  # Добавляем QDialog
-from PyQt6.QtCore import pyqtSlot
+                             QMessageBox, QDialog, QAbstractItemView)  # Добавляем QDialog
+from PyQt6.QtCore import pyqtSlot, pyqtSignal, Qt, QThread, QTimer
 from PyQt6.QtGui import QColor
 import re  # ДОБАВЛЯЕМ ИМПОРТ ДЛЯ РЕГУЛЯРНЫХ ВЫРАЖЕНИЙ
+import queue
 from modules.base_module import BaseTabModule
 from core.event_bus import EventBus
-from shared.models.scan_result import HostInfo, PortInfo
-
-# Добавляем заглушку для CVE checker если его нет
-class CVEChecker:
-    """Заглушка для проверки CVE уязвимостей"""
-    
-    def __init__(self):
-        self.logger = self._setup_logging()
-    
-    def _setup_logging(self):
-        import logging
-        return logging.getLogger(__name__)
-    
-    def check_service_cve(self, service: str, version: str) -> list:
-        """
-        Проверяет CVE уязвимости для сервиса
-        В реальной реализации здесь будет обращение к CVE базе
-        """
-        cves = []
-        
-        try:
-            # Простая заглушка для демонстрации
-            # В реальной системе здесь будет обращение к CVE базе данных
-            service_lower = service.lower()
-            version_lower = version.lower()
-            
-            # Пример проверки для OpenSSH
-            if 'ssh' in service_lower and '6.6.1' in version_lower:
-                cves.append({
-                    'id': 'CVE-2016-6210',
-                    'risk': 'MEDIUM',
-                    'description': 'OpenSSH 6.6.1 allows remote attackers to obtain sensitive information from process memory',
-                    'cvss_score': 5.3,
-                    'source': 'NVD'
-                })
-            
-            # Пример проверки для Apache
-            elif 'http' in service_lower and '2.4.7' in version_lower:
-                cves.append({
-                    'id': 'CVE-2017-3169',
-                    'risk': 'HIGH',
-                    'description': 'Apache HTTP Server mod_ssl vulnerability',
-                    'cvss_score': 7.5,
-                    'source': 'NVD'
-                })
-            
-            # Добавляем общие CVE на основе версий
-            if any(vuln_ver in version_lower for vuln_ver in ['2.4.49', '2.4.50']):
-                cves.append({
-                    'id': 'CVE-2021-41773',
-                    'risk': 'CRITICAL',
-                    'description': 'Apache HTTP Server path traversal vulnerability',
-                    'cvss_score': 9.8,
-                    'source': 'NVD'
-                })
-                
-        except Exception as e:
-            self.logger.debug(f"CVE check error for {service} {version}: {e}")
-        
-        return cves
+from core.event_dispatch import DeliveryMode, QueuePolicy
+from core.analysis_service import AnalysisService
+from shared.models.scan_result import HostInfo
+from shared.utils.scan_diff import ScanDiff, ChangeType
+from shared.utils.exporters import ExportManager
+from shared.utils.findings import FindingsCache
+from shared.constants import RESULTS_STREAM_FLUSH_MS
+from .results_model import HostTableModel, HostSortProxyModel
 
 def create_tab(event_bus: EventBus, dependencies: dict = None):
     return ResultsTableTab(event_bus, dependencies)
@@ -159,18 +108,136 @@ class VulnerabilityDetailsDialog(QDialog):
         
         self.text_edit.setHtml(''.join(html_parts))
 
+class ScanDiffDialog(QDialog):
+    """Диалог для отображения изменений между двумя сканированиями"""
+    
+    CHANGE_COLORS = {
+        ChangeType.HOST_NEW: QColor(200, 255, 200),
+        ChangeType.PORT_OPENED: QColor(255, 220, 200),
+        ChangeType.HOST_GONE: QColor(220, 220, 220),
+        ChangeType.PORT_CLOSED: QColor(220, 220, 220),
+        ChangeType.SERVICE_CHANGED: QColor(255, 255, 200),
+        ChangeType.OS_CHANGED: QColor(255, 255, 200)
+    }
+    
+    def __init__(self, diff: ScanDiff, parent=None):
+        super().__init__(parent)
+        self.diff = diff
+        self.setWindowTitle("Scan Changes")
+        self.setGeometry(100, 100, 900, 600)
+        
+        layout = QVBoxLayout(self)
+        
+        header = QLabel(f"{diff.old_scan_id[:8]} → {diff.new_scan_id[:8]}: {diff.get_summary()}")
+        header.setWordWrap(True)
+        layout.addWidget(header)
+        
+        self.table = QTableWidget()
+        self.table.setColumnCount(5)
+        self.table.setHorizontalHeaderLabels(["Change", "Host", "Port", "Old", "New"])
+        self.table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)
+        self.table.horizontalHeader().setSectionResizeMode(4, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+        
+        buttons_layout = QHBoxLayout()
+        export_btn = QPushButton("Export...")
+        export_btn.clicked.connect(self._export_diff)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        buttons_layout.addWidget(export_btn)
+        buttons_layout.addStretch()
+        buttons_layout.addWidget(close_btn)
+        layout.addLayout(buttons_layout)
+        
+        self._display_diff()
+    
+    def _display_diff(self):
+        """Заполняет таблицу изменений"""
+        self.table.setRowCount(len(self.diff.entries))
+        
+        for row, entry in enumerate(self.diff.entries):
+            port_text = f"{entry.port}/{entry.protocol}" if entry.port is not None else ""
+            values = [entry.change_type.value, entry.ip, port_text, entry.old_value, entry.new_value]
+            color = self.CHANGE_COLORS.get(entry.change_type)
+            
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if color:
+                    item.setBackground(color)
+                self.table.setItem(row, column, item)
+    
+    def _export_diff(self):
+        """Экспортирует изменения в CSV или JSON"""
+        from PyQt6.QtWidgets import QFileDialog
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Export Changes", "scan_changes.csv", "CSV Files (*.csv);;JSON Files (*.json)"
+        )
+        
+        if not file_path:
+            return
+        
+        try:
+            if file_path.endswith('.json') or 'JSON' in selected_filter:
+                content = ExportManager.export_diff_to_json(self.diff)
+            else:
+                content = ExportManager.export_diff_to_csv(self.diff)
+            
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            QMessageBox.information(self, "Success", f"Changes exported to {file_path}")
+            
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to export changes: {e}")
+
+class FindingsWorker(QThread):
+    """
+    Считает находки потоковых хостов в фоне, заполняя FindingsCache, пока
+    полного результата (и его снимка анализа) еще нет. Хосты подаются
+    пачками через submit. Поток завершается, разобрав очередь, и
+    перезапускается следующей пачкой.
+    """
+    
+    batch_done = pyqtSignal(int)        # Сколько хостов обработано
+    
+    def __init__(self, findings: FindingsCache, parent=None):
+        super().__init__(parent)
+        self.findings = findings
+        self._queue = queue.Queue()
+    
+    def submit(self, hosts: list):
+        """Ставит хосты в очередь"""
+        self._queue.put(list(hosts))
+    
+    def has_pending(self) -> bool:
+        return not self._queue.empty()
+    
+    def run(self):
+        while not self.isInterruptionRequested():
+            try:
+                hosts = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self.findings.compute_all(hosts, self.isInterruptionRequested, self.batch_done.emit)
+            if not self.isInterruptionRequested():
+                self.batch_done.emit(len(hosts))
+
 class ResultsTableTab(BaseTabModule):
     
     def __init__(self, event_bus: EventBus, dependencies: dict = None):
         super().__init__(event_bus, dependencies)
-        self.cve_checker = CVEChecker()  # Инициализируем CVE checker
+        self.findings_worker = None
         self.current_results = None
         self.current_host = None
+        self.current_scan_id = None
+        self.status_summary = ""
+        self.streamed_open_ports = 0
     
     def _setup_event_handlers(self):
         """Настройка обработчиков событий"""
-        self.event_bus.scan_completed.connect(self._on_scan_completed)
-        self.event_bus.results_updated.connect(self._on_results_updated)
+        self.event_bus.connect_coalesced('results_updated', self._on_results_updated)
+        self.event_bus.connect_signal('scan_completed', self._on_scan_completed)
+        self.event_bus.connect_signal('hosts_discovered', self._on_hosts_discovered)
+        self.event_bus.connect_signal('analysis_ready', self._on_analysis_ready, DeliveryMode.BOUNDED, policy=QueuePolicy.MERGE)
     
     def _create_ui(self):
         """Создает UI компонент таблицы результатов"""
@@ -187,10 +254,15 @@ class ResultsTableTab(BaseTabModule):
         self.export_btn.clicked.connect(self._export_results)
         self.clear_btn = QPushButton("Clear Results")
         self.clear_btn.clicked.connect(self.clear_results)
+        self.compare_btn = QPushButton("Compare with Previous")
+        self.compare_btn.clicked.connect(self._compare_with_previous)
         
         control_layout.addWidget(self.export_btn)
         control_layout.addWidget(self.clear_btn)
+        control_layout.addWidget(self.compare_btn)
         control_layout.addStretch()
+        control_layout.addWidget(QLabel("Scan:"))
+        control_layout.addWidget(self._create_scan_selector())
         
         layout.addLayout(control_layout)
         
@@ -198,24 +270,38 @@ class ResultsTableTab(BaseTabModule):
         table_group = QGroupBox("Scan Results")
         table_layout = QVBoxLayout(table_group)
         
-        self.results_table = QTableWidget()
-        self.results_table.setColumnCount(7)
-        self.results_table.setHorizontalHeaderLabels([
-            "IP Address", "Hostname", "Status", "OS", "Open Ports", "Services", "Vulnerabilities"
-        ])
-        
-        # Настройка таблицы
+        # Статистика и находки считаются сервисом анализа в фоне; его кэш находок
+        # общий для таблицы, деталей и экспорта
+        self.analysis_service = self.dependencies.get('analysis_service') or AnalysisService.get_instance(self.event_bus)
+        self.findings: FindingsCache = self.analysis_service.findings
+        self.cve_checker = self.findings.cve_checker
+        
+        # Модель отдает данные только видимых строк; сортировка - через прокси
+        self.results_model = HostTableModel(self.findings, self)
+        self.sort_proxy = HostSortProxyModel(self)
+        self.sort_proxy.setSourceModel(self.results_model)
+        
+        self.results_table = QTableView()
+        self.results_table.setModel(self.sort_proxy)
+        self.results_table.setSortingEnabled(True)
+        self.results_table.sortByColumn(-1, Qt.SortOrder.AscendingOrder)
+        self.results_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.results_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.results_table.verticalHeader().setDefaultSectionSize(24)
+        
+        # Настройка таблицы: без ResizeToContents - он измеряет все строки
         header = self.results_table.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
         header.setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)
-        header.setSectionResizeMode(4, QHeaderView.ResizeMode.ResizeToContents)
         header.setSectionResizeMode(5, QHeaderView.ResizeMode.Stretch)
-        header.setSectionResizeMode(6, QHeaderView.ResizeMode.ResizeToContents)
+        header.resizeSection(0, 130)
+        header.resizeSection(1, 160)
+        header.resizeSection(2, 70)
+        header.resizeSection(4, 80)
+        header.resizeSection(6, 110)
         
         # Подключаем обработчик выбора строки
-        self.results_table.itemSelectionChanged.connect(self._on_row_selected)
+        self.results_table.selectionModel().currentRowChanged.connect(self._on_row_selected)
         
         table_layout.addWidget(self.results_table)
         layout.addWidget(table_group)
@@ -241,6 +327,13 @@ class ResultsTableTab(BaseTabModule):
         self.status_label = QLabel("No results available")
         layout.addWidget(self.status_label)
         
+        # Потоковые хосты копятся и добавляются в таблицу пачкой по таймеру
+        self.pending_hosts = []
+        self.stream_timer = QTimer(self)
+        self.stream_timer.setSingleShot(True)
+        self.stream_timer.setInterval(RESULTS_STREAM_FLUSH_MS)
+        self.stream_timer.timeout.connect(self._flush_pending_hosts)
+        
         # Инициализируем результаты
         self.current_results = None
         self.current_host = None  # Текущий выбранный хост
@@ -268,6 +361,21 @@ class ResultsTableTab(BaseTabModule):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to export results: {e}")
     
+    def _compare_with_previous(self):
+        """Сравнивает текущие результаты с предыдущим сканированием тех же целей"""
+        scan_manager = self.dependencies.get('scan_manager')
+        if not self.current_scan_id or not scan_manager:
+            QMessageBox.warning(self, "Warning", "No scan selected to compare!")
+            return
+        
+        diff = scan_manager.diff_with_previous(self.current_scan_id)
+        if diff is None:
+            QMessageBox.information(self, "Compare", "No previous scan of the same targets found")
+            return
+        
+        dialog = ScanDiffDialog(diff, self)
+        dialog.exec()
+    
     def _generate_export_text(self):
         """Генерирует текст для экспорта"""
         if not self.current_results:
@@ -309,9 +417,8 @@ class ResultsTableTab(BaseTabModule):
         
         print(f"🔵 [ResultsTable] Scan completed: {scan_id}, has results: {results is not None}")
         
-        if results:
-            self.current_results = results
-            self._display_results(results)
+        if results and self._follows_scan(scan_id):
+            self._display_results(results, scan_id)
     
     @pyqtSlot(dict)
     def _on_results_updated(self, data):
@@ -321,75 +428,143 @@ class ResultsTableTab(BaseTabModule):
         
         print(f"🔵 [ResultsTable] Results updated: {scan_id}, has results: {results is not None}")
         
-        if results:
-            self.current_results = results
-            self._display_results(results)
+        if results and self._follows_scan(scan_id):
+            self._display_results(results, scan_id)
+    
+    @pyqtSlot(dict)
+    def _on_hosts_discovered(self, data):
+        """Хосты, о которых nmap уже отчитался, - копим до срабатывания таймера"""
+        scan_id = data.get('scan_id')
+        if scan_id != self.current_scan_id:
+            if not self.follow_live:
+                # Пользователь смотрит другое открытое сканирование
+                return
+            # Пошли хосты нового сканирования - таблица переключается на него
+            self._begin_scan(scan_id)
+        
+        self.pending_hosts.extend(data.get('hosts', []))
+        if not self.stream_timer.isActive():
+            self.stream_timer.start()
+    
+    def _begin_scan(self, scan_id):
+        """Очищает таблицу под новое сканирование, результаты которого будут приходить частями"""
+        self.stream_timer.stop()
+        self.pending_hosts = []
+        self._stop_findings_worker()
+        self.results_model.clear()
+        self.details_text.clear()
+        self.vuln_btn.setVisible(False)
+        self.current_scan_id = scan_id
+        self.current_results = None
+        self.current_host = None
+        self.streamed_open_ports = 0
+    
+    def _flush_pending_hosts(self):
+        """Добавляет накопленные хосты одной вставкой; строки известных адресов обновляются"""
+        if not self.pending_hosts:
+            return
+        # Повтор адреса в пачке - остается последняя версия хоста
+        hosts = list({host.ip: host for host in self.pending_hosts}.values())
+        self.pending_hosts = []
+        was_empty = self.results_model.rowCount() == 0
+        
+        # Счетчик портов ведется по разнице, без прохода по всей таблице
+        open_ports = lambda host: sum(1 for port in host.ports if port.state == "open")
+        for host in hosts:
+            row = self.results_model.row_of(host.ip)
+            if row is not None:
+                self.streamed_open_ports -= open_ports(self.results_model.host_at(row))
+            self.streamed_open_ports += open_ports(host)
+        self.results_model.merge_hosts(hosts)
+        self._submit_findings(hosts)
+        
+        self.status_summary = f"Receiving results: {self.results_model.rowCount()} hosts, {self.streamed_open_ports} open ports"
+        self.status_label.setText(self.status_summary)
+        if was_empty:
+            self._select_first_row()
     
-    def _display_results(self, results):
+    def _display_results(self, results, scan_id=None):
         """Отображает результаты в таблице"""
         print(f"🔵 [ResultsTable] Displaying results: {len(results.hosts) if results and hasattr(results, 'hosts') else 0} hosts")
         
         if not results or not hasattr(results, 'hosts'):
             self.status_label.setText("No results to display")
-            self.results_table.setRowCount(0)
+            self.results_model.clear()
             return
         
         hosts = results.hosts
-        
-        self.results_table.setRowCount(len(hosts))
-        
-        for row, host in enumerate(hosts):
-            self.results_table.setItem(row, 0, QTableWidgetItem(host.ip))
-            self.results_table.setItem(row, 1, QTableWidgetItem(host.hostname or "N/A"))
-            self.results_table.setItem(row, 2, QTableWidgetItem(host.state))
-            
-            # OS информация
-            os_info = ""
-            if host.os_family:
-                os_info = host.os_family
-                if host.os_details:
-                    os_info += f" ({host.os_details})"
-            else:
-                os_info = "Unknown"
-            self.results_table.setItem(row, 3, QTableWidgetItem(os_info))
-            
-            # Количество открытых портов
-            open_ports = [p for p in host.ports if p.state == "open"]
-            self.results_table.setItem(row, 4, QTableWidgetItem(str(len(open_ports))))
-            
-            # Список сервисов
-            services = []
-            for port in open_ports:
-                if port.service and port.service != "unknown":
-                    services.append(f"{port.service}:{port.port}")
-            
-            services_text = ", ".join(services) if services else "None"
-            self.results_table.setItem(row, 5, QTableWidgetItem(services_text))
-            
-            # Индикатор уязвимостей
-            vulnerability_count = self._count_vulnerabilities(host)
-            vuln_text = f"{vulnerability_count} found" if vulnerability_count > 0 else "None"
-            vuln_item = QTableWidgetItem(vuln_text)
-            if vulnerability_count > 0:
-                vuln_item.setBackground(QColor(255, 200, 200))  # Красный фон для уязвимостей
-            self.results_table.setItem(row, 6, vuln_item)
-        
-        # Обновляем статус с общей статистикой
-        total_open_ports = sum(len([p for p in h.ports if p.state == "open"]) for h in hosts)
-        total_vulnerabilities = sum(self._count_vulnerabilities(h) for h in hosts)
-        self.status_label.setText(
-            f"Displaying {len(hosts)} hosts, {total_open_ports} open ports, {total_vulnerabilities} vulnerabilities"
-        )
-        
-        # Показываем детали первого хоста, если есть результаты
-        if hosts:
-            self.results_table.selectRow(0)
-            self._show_host_details(hosts[0])
+        if scan_id != self.current_scan_id or not self.results_model.rowCount():
+            # Другое сканирование или таблица пуста - полная замена
+            self._begin_scan(scan_id)
+            self.results_model.set_hosts(hosts)
+            self._select_first_row()
+        else:
+            # Хосты этого сканирования уже пришли потоком - обновляем строки на месте,
+            # выделение и прокрутка оператора не сбрасываются
+            self.stream_timer.stop()
+            self.pending_hosts = []
+            self.results_model.merge_hosts(hosts)
+            if self.current_host is not None:
+                row = self.results_model.row_of(self.current_host.ip)
+                if row is not None:
+                    self._show_host_details(self.results_model.host_at(row))
+        # Отображаемый результат не вытесняется из рабочего пространства, пока он на экране
+        self.current_results = self._hold_result(scan_id, results)
+        
+        # Статистику и находки считает сервис анализа; снимок мог быть готов заранее
+        analysis = self.analysis_service.get_analysis(results)
+        if analysis:
+            self._show_analysis(analysis)
+        else:
+            self.status_label.setText(f"Displaying {len(hosts)} hosts, analyzing vulnerabilities...")
     
-    def _count_vulnerabilities(self, host: HostInfo) -> int:
-        """Считает количество уязвимостей для хоста"""
-        vulnerabilities = self._extract_vulnerabilities(host)
-        return len(vulnerabilities)
+    @pyqtSlot(dict)
+    def _on_analysis_ready(self, data):
+        """Снимок анализа готов - если он для отображаемого результата, обновляем счетчики"""
+        analysis = data.get('analysis')
+        if analysis and analysis is self.analysis_service.get_analysis(self.current_results):
+            self._show_analysis(analysis)
+    
+    def _show_workspace_result(self, scan_id, result):
+        """Переключение на другое открытое сканирование - результат уже в памяти или в истории"""
+        self._display_results(result, scan_id)
+    
+    def _show_analysis(self, analysis):
+        self.results_model.refresh_findings()
+        self.status_summary = f"Displaying {analysis.total_hosts} hosts, {analysis.open_ports} open ports"
+        self.status_label.setText(f"{self.status_summary}, {analysis.vulnerability_total} vulnerabilities")
+    
+    def _select_first_row(self):
+        """Выделяет первую строку и показывает ее детали"""
+        if not self.results_model.rowCount():
+            return
+        self.results_table.selectRow(0)
+        self._show_host_details(self.results_model.host_at(self.sort_proxy.mapToSource(self.sort_proxy.index(0, 0)).row()))
+    
+    def _submit_findings(self, hosts: list):
+        """Передает потоковые хосты фоновому расчету находок, запуская его при необходимости"""
+        if self.findings_worker is None:
+            self.findings_worker = FindingsWorker(self.findings, self)
+            self.findings_worker.batch_done.connect(self._on_findings_batch)
+            self.findings_worker.finished.connect(self._on_findings_worker_finished)
+        self.findings_worker.submit(hosts)
+        if not self.findings_worker.isRunning():
+            self.findings_worker.start()
+    
+    def _on_findings_worker_finished(self):
+        # Пачка могла прийти, пока поток уже выходил
+        worker = self.findings_worker
+        if worker is not None and worker.has_pending() and not worker.isRunning():
+            worker.start()
+    
+    def _stop_findings_worker(self):
+        if self.findings_worker and self.findings_worker.isRunning():
+            self.findings_worker.requestInterruption()
+            self.findings_worker.wait()
+        self.findings_worker = None
+    
+    def _on_findings_batch(self, processed: int):
+        self.results_model.refresh_findings()
     
     def _show_host_details(self, host: HostInfo):
         """Показывает детальную информацию о хосте"""
@@ -450,164 +625,27 @@ class ResultsTableTab(BaseTabModule):
             QMessageBox.information(self, "No Vulnerabilities", "No vulnerabilities found for this host")
     
     def _extract_vulnerabilities(self, host: HostInfo) -> list:
-        """Извлекает информацию об уязвимостях из скриптов nmap и CVE баз"""
-        vulnerabilities = []
-        
-        # Анализируем скрипты nmap
-        if hasattr(host, 'scripts') and host.scripts:
-            for script_name, script_output in host.scripts.items():
-                vuln_info = self._parse_vulnerability_from_script(script_name, script_output, host)
-                if vuln_info:
-                    vulnerabilities.append(vuln_info)
-        
-        # Проверяем CVE для сервисов
-        for port in host.ports:
-            if port.state == "open" and port.service and port.service != "unknown":
-                # Проверяем CVE уязвимости
-                cve_vulns = self._check_cve_vulnerabilities(port, host)
-                vulnerabilities.extend(cve_vulns)
-                
-                # Проверяем уязвимости версий
-                version_vulns = self._check_version_vulnerabilities(port, host)
-                vulnerabilities.extend(version_vulns)
-        
-        return vulnerabilities
+        """Находки по хосту из общего кэша (считаются один раз на версию хоста)"""
+        return self.findings.get(host)
     
-    def _check_cve_vulnerabilities(self, port: PortInfo, host: HostInfo) -> list:
-        """Проверяет CVE уязвимости для сервиса"""
-        vulnerabilities = []
-        
-        try:
-            # Проверяем CVE для конкретного сервиса
-            cves = self.cve_checker.check_service_cve(port.service, port.version)
-            
-            for cve in cves:
-                vulnerabilities.append({
-                    'type': 'CVE',
-                    'id': cve['id'],
-                    'service': port.service,
-                    'port': str(port.port),
-                    'version': port.version,
-                    'risk': cve['risk'],
-                    'issue': cve['description'],
-                    'cvss_score': cve.get('cvss_score'),
-                    'recommendation': f"Update {port.service} to latest version",
-                    'source': cve.get('source', 'CVE Database')
-                })
-                
-        except Exception as e:
-            self.logger.debug(f"CVE check failed for {port.service}: {e}")
-        
-        return vulnerabilities
-    
-    def _check_version_vulnerabilities(self, port, host: HostInfo) -> list:
-        """Проверяет версии сервисов на известные уязвимости"""
-        vulnerabilities = []
-        version_lower = port.version.lower()
-        
-        # Проверяем известные уязвимые версии
-        if 'openssh' in version_lower:
-            if any(vuln_ver in version_lower for vuln_ver in ['6.6.1', '7.1']):
-                vulnerabilities.append({
-                    'type': 'VERSION',
-                    'script': 'version_detection',
-                    'service': port.service,
-                    'port': str(port.port),
-                    'risk': 'MEDIUM',
-                    'issue': f'Potential vulnerabilities in {port.version}',
-                    'recommendation': 'Update to latest OpenSSH version',
-                    'version': port.version
-                })
-        
-        elif 'apache' in version_lower:
-            if any(vuln_ver in version_lower for vuln_ver in ['2.4.49', '2.4.50']):
-                vulnerabilities.append({
-                    'type': 'VERSION',
-                    'script': 'version_detection',
-                    'service': port.service,
-                    'port': str(port.port),
-                    'risk': 'HIGH',
-                    'issue': f'Known vulnerabilities in Apache {port.version}',
-                    'recommendation': 'Update Apache to latest version',
-                    'version': port.version
-                })
-        
-        return vulnerabilities
-    
-    def _parse_vulnerability_from_script(self, script_name: str, script_output: str, host: HostInfo) -> dict:
-        """Парсит информацию об уязвимости из вывода скрипта"""
-        if not script_output or not script_name:
-            return None
-            
-        script_lower = script_output.lower()
-        
-        # Пропускаем информационные скрипты без уязвимостей
-        non_vulnerability_scripts = ['http-title', 'http-date', 'ssh-hostkey', 'banner', 'port-states']
-        if any(non_vuln in script_name for non_vuln in non_vulnerability_scripts):
-            return None
-        
-        # Определяем уровень риска по ключевым словам
-        risk = "LOW"
-        issue = script_output[:200] + "..." if len(script_output) > 200 else script_output
-        
-        if any(keyword in script_lower for keyword in ['exploit', 'remote code', 'privilege escalation', 'critical', 'cve']):
-            risk = "HIGH"
-        elif any(keyword in script_lower for keyword in ['vulnerable', 'vulnerability', 'risk', 'warning']):
-            risk = "MEDIUM"
-        elif any(keyword in script_lower for keyword in ['info', 'detected', 'found']):
-            risk = "LOW"
-        
-        # Находим связанный порт
-        port_num = "unknown"
-        service = "unknown"
-        
-        # Пытаемся извлечь порт из имени скрипта
-        port_match = re.search(r'port(\d+)_', script_name)
-        if port_match:
-            port_num = port_match.group(1)
-        else:
-            # Ищем порт в выводе
-            port_in_output = re.search(r'port\s*(\d+)', script_lower)
-            if port_in_output:
-                port_num = port_in_output.group(1)
-        
-        # Находим сервис для порта
-        if port_num != "unknown":
-            for port in host.ports:
-                if str(port.port) == port_num:
-                    service = port.service
-                    break
-        
-        return {
-            'type': 'SCRIPT',
-            'script': script_name,
-            'service': service,
-            'port': port_num,
-            'risk': risk,
-            'issue': issue,
-            'recommendation': 'Investigate the script output for details'
-        }
-    
-    def _on_row_selected(self):
+    def _on_row_selected(self, current, previous=None):
         """Обрабатывает выбор строки в таблице"""
-        selected_items = self.results_table.selectedItems()
-        if not selected_items or not self.current_results:
+        if not current.isValid():
             return
         
-        row = selected_items[0].row()
-        host_ip = self.results_table.item(row, 0).text()
-        
-        # Находим выбранный хост
-        for host in self.current_results.hosts:
-            if host.ip == host_ip:
-                self._show_host_details(host)
-                break
+        source_row = self.sort_proxy.mapToSource(current).row()
+        self._show_host_details(self.results_model.host_at(source_row))
     
     def clear_results(self):
         """Очищает результаты"""
-        self.results_table.setRowCount(0)
+        self.stream_timer.stop()
+        self.pending_hosts = []
+        self._stop_findings_worker()
+        self.results_model.clear()
         self.details_text.clear()
         self.status_label.setText("No results available")
+        self._release_result()
         self.current_results = None
         self.current_host = None
+        self.current_scan_id = None
         self.vuln_btn.setVisible(False)
@@ -1,12 +1,114 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QPushButton, 
                              QTextEdit, QHBoxLayout, QGroupBox, QComboBox,
                              QLineEdit, QCheckBox, QProgressBar, QGridLayout,
-                             QMessageBox, QFrame)
+                             QMessageBox, QFrame, QInputDialog, QDialog, QTableWidget,
+                             QTableWidgetItem, QHeaderView, QAbstractItemView)
 from PyQt6.QtCore import Qt, pyqtSlot, QTimer
+from datetime import datetime
 import logging
 
 from core.event_bus import EventBus
 from shared.models.scan_config import ScanConfig, ScanType, ScanIntensity  # ОБНОВЛЕННЫЙ ИМПОРТ
+from shared.utils.validators import parse_targets, TargetSet
+
+class ScheduleManagerDialog(QDialog):
+    """Диалог управления расписаниями: список, включение/выключение, запуск и удаление"""
+    
+    COLUMNS = ["Name", "Cron", "Enabled", "Next Run", "Last Run", "Runs", "Skipped", "Deferred"]
+    
+    def __init__(self, scheduler, parent=None):
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.setWindowTitle("Scan Schedules")
+        self.setGeometry(100, 100, 900, 400)
+        
+        layout = QVBoxLayout(self)
+        
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+        
+        buttons_layout = QHBoxLayout()
+        self.toggle_btn = QPushButton("Enable / Disable")
+        self.toggle_btn.clicked.connect(self._toggle_selected)
+        self.run_btn = QPushButton("Run Now")
+        self.run_btn.clicked.connect(self._run_selected)
+        self.remove_btn = QPushButton("Remove")
+        self.remove_btn.clicked.connect(self._remove_selected)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        buttons_layout.addWidget(self.toggle_btn)
+        buttons_layout.addWidget(self.run_btn)
+        buttons_layout.addWidget(self.remove_btn)
+        buttons_layout.addStretch()
+        buttons_layout.addWidget(close_btn)
+        layout.addLayout(buttons_layout)
+        
+        self._display_schedules()
+    
+    @staticmethod
+    def _format_time(timestamp) -> str:
+        return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S') if timestamp else "-"
+    
+    def _display_schedules(self):
+        """Заполняет таблицу расписаний"""
+        schedules = sorted(self.scheduler.get_schedules(), key=lambda schedule: schedule.name)
+        self.table.setRowCount(len(schedules))
+        
+        for row, schedule in enumerate(schedules):
+            values = [
+                schedule.name,
+                schedule.cron,
+                "Yes" if schedule.enabled else "No",
+                self._format_time(schedule.next_run) if schedule.enabled else "-",
+                self._format_time(schedule.last_run),
+                str(schedule.runs),
+                str(schedule.coalesced),
+                str(schedule.deferred)
+            ]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                item.setData(Qt.ItemDataRole.UserRole, schedule.schedule_id)
+                self.table.setItem(row, column, item)
+    
+    def _selected_schedule(self):
+        """Выбранное расписание или None"""
+        row = self.table.currentRow()
+        item = self.table.item(row, 0) if row >= 0 else None
+        if item is None:
+            return None
+        return self.scheduler.schedules.get(item.data(Qt.ItemDataRole.UserRole))
+    
+    def _toggle_selected(self):
+        schedule = self._selected_schedule()
+        if schedule is None:
+            return
+        self.scheduler.set_enabled(schedule.schedule_id, not schedule.enabled)
+        self._display_schedules()
+    
+    def _run_selected(self):
+        schedule = self._selected_schedule()
+        if schedule is None:
+            return
+        job_id = self.scheduler.run_now(schedule.schedule_id)
+        if job_id is None:
+            QMessageBox.information(self, "Schedule",
+                                    "Run skipped: previous run still active, queue full or targets out of scope")
+        self._display_schedules()
+    
+    def _remove_selected(self):
+        schedule = self._selected_schedule()
+        if schedule is None:
+            return
+        reply = QMessageBox.question(self, "Remove Schedule", f"Remove schedule '{schedule.name}'?")
+        if reply == QMessageBox.StandardButton.Yes:
+            self.scheduler.remove_schedule(schedule.schedule_id)
+            self._display_schedules()
 
 class ScanLauncherTab(QWidget):
     """Вкладка для запуска сканирований"""
@@ -103,9 +205,18 @@ class ScanLauncherTab(QWidget):
         self.service_version_check = QCheckBox("Service Version")
         self.os_detection_check = QCheckBox("OS Detection")
         self.script_scan_check = QCheckBox("Script Scan")
+        self.incremental_check = QCheckBox("Reuse Versions")
+        self.incremental_check.setToolTip("Run -sV only on ports whose service is not in recent scan history")
+        self.rescan_changed_check = QCheckBox("Changed Hosts Only")
+        self.rescan_changed_check.setToolTip("Quick discovery pass first; full profile only for new or changed hosts")
+        self.smart_ports_check = QCheckBox("Smart Ports")
+        self.smart_ports_check.setToolTip("Scan the ports most often open in scan history instead of the default list")
         options_layout.addWidget(self.service_version_check)
         options_layout.addWidget(self.os_detection_check)
         options_layout.addWidget(self.script_scan_check)
+        options_layout.addWidget(self.smart_ports_check)
+        options_layout.addWidget(self.incremental_check)
+        options_layout.addWidget(self.rescan_changed_check)
         config_layout.addLayout(options_layout, row, 1)
         row += 1
         
@@ -127,8 +238,18 @@ class ScanLauncherTab(QWidget):
         self.stop_btn.setStyleSheet("padding: 8px; font-size: 14px; background-color: #f44336; color: white;")
         self.stop_btn.setEnabled(False)
         
+        self.schedule_btn = QPushButton("Schedule...")
+        self.schedule_btn.setStyleSheet("padding: 8px; font-size: 14px;")
+        self.schedule_btn.setToolTip("Run this profile and targets on a recurring cron schedule")
+        
+        self.schedules_btn = QPushButton("Schedules")
+        self.schedules_btn.setStyleSheet("padding: 8px; font-size: 14px;")
+        self.schedules_btn.setToolTip("List, enable/disable, run or remove recurring scans")
+        
         buttons_layout.addWidget(self.start_btn)
         buttons_layout.addWidget(self.stop_btn)
+        buttons_layout.addWidget(self.schedule_btn)
+        buttons_layout.addWidget(self.schedules_btn)
         buttons_layout.addStretch()
         
         main_layout.addLayout(buttons_layout)
@@ -170,12 +291,14 @@ class ScanLauncherTab(QWidget):
         """Подключает сигналы"""
         self.start_btn.clicked.connect(self._start_scan)
         self.stop_btn.clicked.connect(self._stop_scan)
+        self.schedule_btn.clicked.connect(self._schedule_scan)
+        self.schedules_btn.clicked.connect(self._manage_schedules)
         
         # Подписываемся на события сканирования
-        self.event_bus.scan_progress.connect(self._on_scan_progress)
-        self.event_bus.scan_completed.connect(self._on_scan_completed)
-        self.event_bus.scan_started.connect(self._on_scan_started)
-        self.event_bus.scan_stopped.connect(self._on_scan_stopped)  # НОВЫЙ СИГНАЛ
+        self.event_bus.connect_coalesced('scan_progress', self._on_scan_progress)
+        self.event_bus.connect_signal('scan_completed', self._on_scan_completed)
+        self.event_bus.connect_signal('scan_started', self._on_scan_started)
+        self.event_bus.connect_signal('scan_stopped', self._on_scan_stopped)  # НОВЫЙ СИГНАЛ
         
         # Обновляем видимость опций при изменении типа сканирования
         self.scan_type_combo.currentTextChanged.connect(self._update_ui_for_scan_type)
@@ -195,6 +318,9 @@ class ScanLauncherTab(QWidget):
         # Устанавливаем доступность
         self.port_range_input.setEnabled(not is_quick_or_discovery)
         self.custom_command_input.setEnabled(is_custom)
+        self.smart_ports_check.setEnabled(scan_type not in ["Discovery", "Custom"])
+        self.incremental_check.setEnabled(scan_type in ["Comprehensive", "Stealth"])
+        self.rescan_changed_check.setEnabled(scan_type in ["Comprehensive", "Stealth"])
         
         for check in checks:
             check.setEnabled(is_custom or (scan_type not in ["Quick", "Discovery", "Comprehensive"]))
@@ -214,62 +340,85 @@ class ScanLauncherTab(QWidget):
             # Для Custom и Stealth (по умолчанию) даем пользователю контроль
             pass
     
+    def _build_config(self):
+        """
+        Собирает ScanConfig из UI. Возвращает (config, target_set, unparsed_targets)
+        или None, если пользователь отменил действие или цели некорректны.
+        """
+        # Проверка уровня интенсивности
+        intensity_index = self.intensity_combo.currentIndex()
+        if intensity_index >= 2:  # AGGRESSIVE или PENETRATION
+            reply = QMessageBox.warning(
+                self,
+                "Security Warning",
+                f"You are about to run an {self.intensity_combo.currentText().split(' - ')[0]} scan.\n\n"
+                "This may:\n"
+                "• Trigger intrusion detection systems\n"
+                "• Disrupt services\n"
+                "• Be considered aggressive\n\n"
+                "Do you have proper authorization to proceed?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.No
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                return None
+        
+        # Получаем параметры из UI
+        targets_text = self.targets_input.text().strip()
+        if not targets_text:
+            QMessageBox.warning(self, "Error", "Please enter scan targets")
+            return None
+        
+        # Объединяем пересекающиеся цели, чтобы не сканировать адреса дважды
+        valid_targets, unparsed_targets = parse_targets(targets_text)
+        target_set = TargetSet.from_targets(valid_targets)
+        if not target_set and not unparsed_targets:
+            QMessageBox.warning(self, "Error", "All targets are excluded")
+            return None
+        
+        # Нераспознанный синтаксис (например, октетные диапазоны nmap) передаем как есть
+        targets = target_set.to_targets() + unparsed_targets
+        
+        # Создаем конфигурацию сканирования
+        scan_type_map = {
+            "Quick": ScanType.QUICK,
+            "Stealth": ScanType.STEALTH,
+            "Comprehensive": ScanType.COMPREHENSIVE,
+            "Discovery": ScanType.DISCOVERY,
+            "Custom": ScanType.CUSTOM
+        }
+        
+        intensity_map = {
+            0: ScanIntensity.SAFE,
+            1: ScanIntensity.NORMAL, 
+            2: ScanIntensity.AGGRESSIVE,
+            3: ScanIntensity.PENETRATION
+        }
+        
+        config = ScanConfig(
+            targets=targets,
+            scan_type=scan_type_map[self.scan_type_combo.currentText()],
+            scan_intensity=intensity_map[intensity_index],  # НОВЫЙ ПАРАМЕТР
+            timing_template=f"T{self.timing_combo.currentIndex()}",
+            port_range=self.port_range_input.text().strip() or None,
+            service_version=self.service_version_check.isChecked(),
+            os_detection=self.os_detection_check.isChecked(),
+            script_scan=self.script_scan_check.isChecked(),
+            smart_ports=self.smart_ports_check.isEnabled() and self.smart_ports_check.isChecked(),
+            incremental=self.incremental_check.isEnabled() and self.incremental_check.isChecked(),
+            incremental_rescan=self.rescan_changed_check.isEnabled() and self.rescan_changed_check.isChecked(),
+            custom_command=self.custom_command_input.text().strip() or None
+        )
+        return config, target_set, unparsed_targets
+    
     def _start_scan(self):
         """Запускает сканирование"""
         try:
-            # Проверка уровня интенсивности
-            intensity_index = self.intensity_combo.currentIndex()
-            if intensity_index >= 2:  # AGGRESSIVE или PENETRATION
-                reply = QMessageBox.warning(
-                    self,
-                    "Security Warning",
-                    f"You are about to run an {self.intensity_combo.currentText().split(' - ')[0]} scan.\n\n"
-                    "This may:\n"
-                    "• Trigger intrusion detection systems\n"
-                    "• Disrupt services\n"
-                    "• Be considered aggressive\n\n"
-                    "Do you have proper authorization to proceed?",
-                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-                    QMessageBox.StandardButton.No
-                )
-                if reply != QMessageBox.StandardButton.Yes:
-                    return
-            
-            # Получаем параметры из UI
-            targets_text = self.targets_input.text().strip()
-            if not targets_text:
-                QMessageBox.warning(self, "Error", "Please enter scan targets")
+            built = self._build_config()
+            if built is None:
                 return
-            
-            targets = [target.strip() for target in targets_text.split(',')]
-            
-            # Создаем конфигурацию сканирования
-            scan_type_map = {
-                "Quick": ScanType.QUICK,
-                "Stealth": ScanType.STEALTH,
-                "Comprehensive": ScanType.COMPREHENSIVE,
-                "Discovery": ScanType.DISCOVERY,
-                "Custom": ScanType.CUSTOM
-            }
-            
-            intensity_map = {
-                0: ScanIntensity.SAFE,
-                1: ScanIntensity.NORMAL, 
-                2: ScanIntensity.AGGRESSIVE,
-                3: ScanIntensity.PENETRATION
-            }
-            
-            config = ScanConfig(
-                targets=targets,
-                scan_type=scan_type_map[self.scan_type_combo.currentText()],
-                scan_intensity=intensity_map[intensity_index],  # НОВЫЙ ПАРАМЕТР
-                timing_template=f"T{self.timing_combo.currentIndex()}",
-                port_range=self.port_range_input.text().strip() or None,
-                service_version=self.service_version_check.isChecked(),
-                os_detection=self.os_detection_check.isChecked(),
-                script_scan=self.script_scan_check.isChecked(),
-                custom_command=self.custom_command_input.text().strip() or None
-            )
+            config, target_set, unparsed_targets = built
+            targets = config.targets
             
             # Запускаем сканирование
             self.current_scan_id = self.scan_manager.submit_scan(config)
@@ -282,7 +431,9 @@ class ScanLauncherTab(QWidget):
             # Логируем информацию об интенсивности
             intensity_level = self.intensity_combo.currentText().split(' - ')[0]
             self.log_output.append(f"🚀 Started {intensity_level} scan: {self.current_scan_id}")
-            self.log_output.append(f"📋 Targets: {', '.join(targets)}")
+            self.log_output.append(f"📋 Targets: {', '.join(targets)} ({target_set.address_count()} addresses)")
+            if unparsed_targets:
+                self.log_output.append(f"⚠️ Passed to nmap unchanged: {', '.join(unparsed_targets)}")
             self.log_output.append(f"🔧 Type: {self.scan_type_combo.currentText()}")
             self.log_output.append(f"⚡ Intensity: {intensity_level}\n")
             
@@ -296,6 +447,41 @@ class ScanLauncherTab(QWidget):
             self.log_output.append(f"❌ Error starting scan: {e}\n")
             QMessageBox.critical(self, "Error", f"Failed to start scan: {e}")
     
+    def _schedule_scan(self):
+        """Добавляет текущий профиль и цели в планировщик повторяющихся сканирований"""
+        try:
+            built = self._build_config()
+            if built is None:
+                return
+            config = built[0]
+            
+            cron, ok = QInputDialog.getText(
+                self, "Schedule Scan",
+                "Cron schedule (minute hour day month weekday), e.g. '0 2 * * *' or '@daily':",
+                text="@daily"
+            )
+            if not ok or not cron.strip():
+                return
+            
+            name = f"{self.scan_type_combo.currentText()}: {', '.join(config.targets[:3])}"
+            if len(config.targets) > 3:
+                name += f" (+{len(config.targets) - 3})"
+            
+            schedule_id = self.scan_manager.scheduler.add_schedule(name, cron.strip(), config)
+            schedule = self.scan_manager.scheduler.schedules[schedule_id]
+            next_run = datetime.fromtimestamp(schedule.next_run).strftime('%Y-%m-%d %H:%M:%S')
+            self.log_output.append(f"🕒 Scheduled '{name}' ({cron.strip()}), next run at {next_run}\n")
+            
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", f"Invalid schedule: {e}")
+        except Exception as e:
+            self.log_output.append(f"❌ Error scheduling scan: {e}\n")
+            QMessageBox.critical(self, "Error", f"Failed to schedule scan: {e}")
+    
+    def _manage_schedules(self):
+        """Открывает список расписаний"""
+        ScheduleManagerDialog(self.scan_manager.scheduler, self).exec()
+    
     def _update_progress_animation(self):
         """Анимирует прогресс-бар во время сканирования"""
         if not self.progress_bar.isVisible():
@@ -341,6 +527,9 @@ class ScanLauncherTab(QWidget):
         
         if scan_id == self.current_scan_id:
             if progress >= 0:
+                # Реальный прогресс пришел - анимация ожидания больше не нужна
+                if progress > 0 and self.progress_timer and self.progress_timer.isActive():
+                    self.progress_timer.stop()
                 self.progress_bar.setValue(progress)
                 if status:
                     # Добавляем в лог только значимые обновления
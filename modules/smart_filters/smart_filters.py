@@ -7,6 +7,9 @@ from PyQt6.QtCore import Qt, pyqtSlot
 import re
 from modules.base_module import BaseTabModule
 from core.event_bus import EventBus
+from core.event_dispatch import DeliveryMode, QueuePolicy
+from core.analysis_service import AnalysisService
+from shared.utils.risk import is_critical_service, is_potentially_vulnerable, assess_risk_level
 
 def create_tab(event_bus: EventBus, dependencies: dict = None):
     return SmartFiltersTab(event_bus, dependencies)
@@ -19,11 +22,13 @@ class SmartFiltersTab(BaseTabModule):
         self.saved_filters = {}
         self.current_results = None
         self.result_parser = dependencies.get('result_parser') if dependencies else None
+        self.analysis_service = self.dependencies.get('analysis_service') or AnalysisService.get_instance(event_bus)
     
     def _setup_event_handlers(self):
         """Настройка обработчиков событий"""
-        self.event_bus.results_updated.connect(self._on_results_updated)
-        self.event_bus.scan_completed.connect(self._on_scan_completed)
+        self.event_bus.connect_signal('results_updated', self._on_results_updated)
+        self.event_bus.connect_signal('scan_completed', self._on_scan_completed)
+        self.event_bus.connect_signal('analysis_ready', self._on_analysis_ready, DeliveryMode.BOUNDED, policy=QueuePolicy.MERGE)
     
     def _create_ui(self) -> QWidget:
         """Создает UI компонент умных фильтров"""
@@ -441,49 +446,17 @@ class SmartFiltersTab(BaseTabModule):
     
     def _is_critical_service(self, port):
         """Определяет является ли сервис критическим"""
-        critical_services = {
-            'ssh', 'telnet', 'ftp', 'smtp', 'domain', 'http', 'https',
-            'microsoft-ds', 'netbios-ssn', 'rpcbind', 'nfs', 'mysql',
-            'postgresql', 'mongodb', 'redis', 'vnc', 'rdp', 'snmp'
-        }
-        return port.service in critical_services
+        return is_critical_service(port)
     
     def _is_potentially_vulnerable(self, host, port):
         """Определяет потенциально уязвимый сервис"""
-        # Проверяем версии на известные уязвимости
-        if port.version:
-            version_lower = port.version.lower()
-            vulnerable_indicators = ['2.4.49', '2.4.50', 'vsftpd 2.3.4', '7.0', '7.1', '7.2']
-            if any(indicator in version_lower for indicator in vulnerable_indicators):
-                return True
-        
-        # Проверяем скрипты nmap
-        for script_name, script_output in host.scripts.items():
-            if 'vulnerable' in script_output.lower() or 'vulnerability' in script_output.lower():
-                return True
-        
-        return False
+        return is_potentially_vulnerable(host, port)
     
     def _assess_risk_level(self, host, port):
-        """Оценивает уровень риска для сервиса"""
-        risk = "LOW"
-        
-        # Повышаем риск для критических сервисов
-        if self._is_critical_service(port):
-            risk = "MEDIUM"
-        
-        # Повышаем риск для уязвимых версий
-        if self._is_potentially_vulnerable(host, port):
-            risk = "HIGH"
-        
-        # Проверяем скрипты nmap на высокорисковые индикаторы
-        for script_name, script_output in host.scripts.items():
-            script_lower = script_output.lower()
-            if any(keyword in script_lower for keyword in ['exploit', 'cve', 'remote code', 'privilege escalation']):
-                risk = "HIGH"
-                break
-        
-        return risk
+        """Оценивает уровень риска для сервиса (из снимка анализа, если он готов)"""
+        analysis = self.analysis_service.get_analysis(self.current_results)
+        risk = analysis.risk_of(host.ip, port.protocol, port.port) if analysis else None
+        return risk or assess_risk_level(host, port)
     
     def _match_regex(self, port, host, pattern):
         """Проверяет совпадение по регулярному выражению"""
@@ -555,6 +528,13 @@ class SmartFiltersTab(BaseTabModule):
             self.current_results = results
             self.filter_stats_label.setText(f"Results loaded: {len(results.hosts)} hosts")
     
+    @pyqtSlot(dict)
+    def _on_analysis_ready(self, data):
+        """Показывает сводку, когда снимок анализа текущих результатов готов"""
+        analysis = data.get('analysis')
+        if analysis and analysis is self.analysis_service.get_analysis(self.current_results):
+            self.filter_stats_label.setText(f"Results loaded: {analysis.get_summary()}")
+    
     @pyqtSlot(dict)
     def _on_scan_completed(self, data):
         """Обрабатывает завершение сканирования"""
@@ -1,13 +1,134 @@
+import os
+from typing import List, Set
+
 from PyQt6.QtWidgets import (QVBoxLayout, QHBoxLayout, QGroupBox,
-                             QTextEdit, QLabel, QPushButton, QListWidget,
-                             QListWidgetItem, QFileDialog, QMessageBox)
-from PyQt6.QtCore import pyqtSlot
+                             QTextEdit, QLabel, QPushButton, QListView,
+                             QFileDialog, QMessageBox, QProgressBar,
+                             QAbstractItemView)
+from PyQt6.QtCore import (pyqtSlot, pyqtSignal, Qt, QThread,
+                          QAbstractListModel, QModelIndex)
 from modules.base_module import BaseTabModule
 from core.event_bus import EventBus
+from shared.utils.validators import parse_targets, validate_target
+
+IMPORT_BATCH_SIZE = 5000  # Сколько целей передавать в GUI за раз
 
 def create_tab(event_bus: EventBus, dependencies: dict = None):
     return TargetManagerTab(event_bus, dependencies)
 
+class TargetListModel(QAbstractListModel):
+    """Модель списка целей - QListView отрисовывает только видимые строки"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._targets: List[str] = []
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._targets)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        return self._targets[index.row()]
+    
+    def targets(self) -> List[str]:
+        return self._targets
+    
+    def append_targets(self, targets: List[str]):
+        """Добавляет цели в конец списка одной вставкой"""
+        if not targets:
+            return
+        first = len(self._targets)
+        self.beginInsertRows(QModelIndex(), first, first + len(targets) - 1)
+        self._targets.extend(targets)
+        self.endInsertRows()
+    
+    def remove_rows(self, rows: List[int]) -> List[str]:
+        """Удаляет строки по номерам, возвращает удаленные цели"""
+        remove = set(rows)
+        removed = [self._targets[row] for row in sorted(remove)]
+        self.beginResetModel()
+        self._targets = [target for row, target in enumerate(self._targets) if row not in remove]
+        self.endResetModel()
+        return removed
+    
+    def clear(self):
+        self.beginResetModel()
+        self._targets = []
+        self.endResetModel()
+
+class TargetImportWorker(QThread):
+    """
+    Потоковый импорт целей из файла в фоновом потоке.
+    Строки читаются по одной, валидируются и дедуплицируются через множество,
+    новые цели передаются в GUI пачками.
+    """
+    
+    progress = pyqtSignal(int)          # Процент прочитанного файла
+    batch_ready = pyqtSignal(list)      # Пачка новых уникальных целей
+    import_finished = pyqtSignal(dict)  # Статистика импорта
+    
+    def __init__(self, file_path: str, known_targets: Set[str], parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.known_targets = set(known_targets)
+    
+    def run(self):
+        stats = {'added': 0, 'duplicates': 0, 'invalid': 0, 'invalid_samples': [],
+                 'cancelled': False, 'error': ''}
+        batch = []
+        last_percent = -1
+        
+        try:
+            total_size = os.path.getsize(self.file_path) or 1
+            bytes_read = 0
+            
+            with open(self.file_path, 'rb') as f:
+                for raw_line in f:
+                    if self.isInterruptionRequested():
+                        stats['cancelled'] = True
+                        break
+                    
+                    bytes_read += len(raw_line)
+                    line = raw_line.decode('utf-8', errors='replace').strip()
+                    if not line or line.startswith('#'):
+                        continue
+                    
+                    for target in line.split(','):
+                        target = target.strip()
+                        if not target:
+                            continue
+                        if target in self.known_targets:
+                            stats['duplicates'] += 1
+                            continue
+                        if not validate_target(target):
+                            stats['invalid'] += 1
+                            if len(stats['invalid_samples']) < 10:
+                                stats['invalid_samples'].append(target)
+                            continue
+                        
+                        self.known_targets.add(target)
+                        batch.append(target)
+                    
+                    if len(batch) >= IMPORT_BATCH_SIZE:
+                        stats['added'] += len(batch)
+                        self.batch_ready.emit(batch)
+                        batch = []
+                    
+                    percent = bytes_read * 100 // total_size
+                    if percent != last_percent:
+                        last_percent = percent
+                        self.progress.emit(percent)
+        
+        except Exception as e:
+            stats['error'] = str(e)
+        
+        if batch:
+            stats['added'] += len(batch)
+            self.batch_ready.emit(batch)
+        
+        self.import_finished.emit(stats)
+
 class TargetManagerTab(BaseTabModule):
     
     def _setup_event_handlers(self):
@@ -60,9 +181,24 @@ class TargetManagerTab(BaseTabModule):
         list_group = QGroupBox("Target List")
         list_layout = QVBoxLayout(list_group)
         
-        self.targets_list = QListWidget()
+        self.target_model = TargetListModel(self)
+        self.targets_list = QListView()
+        self.targets_list.setModel(self.target_model)
+        self.targets_list.setUniformItemSizes(True)
+        self.targets_list.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
         list_layout.addWidget(self.targets_list)
         
+        # Прогресс импорта из файла
+        import_progress_layout = QHBoxLayout()
+        self.import_progress = QProgressBar()
+        self.import_progress.setVisible(False)
+        self.cancel_import_btn = QPushButton("Cancel Import")
+        self.cancel_import_btn.setVisible(False)
+        self.cancel_import_btn.clicked.connect(self._cancel_import)
+        import_progress_layout.addWidget(self.import_progress)
+        import_progress_layout.addWidget(self.cancel_import_btn)
+        list_layout.addLayout(import_progress_layout)
+        
         # Кнопки управления списком
         list_buttons_layout = QHBoxLayout()
         self.remove_btn = QPushButton("Remove Selected")
@@ -82,12 +218,54 @@ class TargetManagerTab(BaseTabModule):
         list_layout.addLayout(list_buttons_layout)
         layout.addWidget(list_group)
         
+        # Группа области сканирования
+        scope_group = QGroupBox("Scope Exclusions (never scanned)")
+        scope_layout = QVBoxLayout(scope_group)
+        
+        self.exclusions_editor = QTextEdit()
+        self.exclusions_editor.setPlaceholderText(
+            "Excluded ranges (one per line):\n"
+            "10.10.0.0/16\n"
+            "192.168.5.10-192.168.5.20"
+        )
+        self.exclusions_editor.setMaximumHeight(100)
+        scope_layout.addWidget(self.exclusions_editor)
+        
+        scope_buttons_layout = QHBoxLayout()
+        self.save_scope_btn = QPushButton("Save Exclusions")
+        self.save_scope_btn.clicked.connect(self._save_exclusions)
+        
+        self.import_scope_btn = QPushButton("Import Exclusions")
+        self.import_scope_btn.clicked.connect(self._import_exclusions)
+        
+        self.scope_label = QLabel()
+        
+        scope_buttons_layout.addWidget(self.save_scope_btn)
+        scope_buttons_layout.addWidget(self.import_scope_btn)
+        scope_buttons_layout.addWidget(self.scope_label)
+        scope_buttons_layout.addStretch()
+        
+        scope_layout.addLayout(scope_buttons_layout)
+        layout.addWidget(scope_group)
+        
+        self.scope_manager = self.dependencies.get('scope_manager')
+        if self.scope_manager:
+            self.exclusions_editor.setPlainText('\n'.join(self.scope_manager.get_denied()))
+            self._update_scope_label()
+        else:
+            scope_group.setEnabled(False)
+        
         # Статистика
         self.stats_label = QLabel("Total targets: 0")
         layout.addWidget(self.stats_label)
         
-        # Инициализируем список целей
-        self.targets = []
+        # Множество для дедупликации за O(1), порядок хранит модель
+        self.target_index: Set[str] = set()
+        self.import_worker = None
+    
+    @property
+    def targets(self) -> List[str]:
+        return self.target_model.targets()
     
     def _add_targets(self):
         """Добавляет цели из редактора в список"""
@@ -96,49 +274,120 @@ class TargetManagerTab(BaseTabModule):
             QMessageBox.warning(self, "Warning", "No targets to add!")
             return
         
-        # Разделяем цели
+        valid_targets, invalid_targets = parse_targets(text)
+        
+        # Дедупликация через множество, а не поиском по списку
         targets = []
-        for line in text.split('\n'):
-            for target in line.split(','):
-                target = target.strip()
-                if target and target not in self.targets:
-                    targets.append(target)
+        for target in valid_targets:
+            if target not in self.target_index:
+                self.target_index.add(target)
+                targets.append(target)
         
-        # Добавляем в список
-        self.targets.extend(targets)
-        self._update_targets_list()
+        self.target_model.append_targets(targets)
+        self._update_stats()
         
-        QMessageBox.information(self, "Success", f"Added {len(targets)} targets")
+        message = f"Added {len(targets)} targets"
+        if invalid_targets:
+            message += f"\nSkipped {len(invalid_targets)} invalid: {', '.join(invalid_targets[:10])}"
+        QMessageBox.information(self, "Success", message)
     
     def _import_from_file(self):
-        """Импортирует цели из файла"""
+        """Импортирует цели из файла в фоновом потоке"""
+        if self.import_worker and self.import_worker.isRunning():
+            return
+        
         file_path, _ = QFileDialog.getOpenFileName(
             self, "Select targets file", "", "Text files (*.txt);;All files (*.*)"
         )
         
+        if file_path:
+            self.import_worker = TargetImportWorker(file_path, self.target_index, self)
+            self.import_worker.progress.connect(self.import_progress.setValue)
+            self.import_worker.batch_ready.connect(self._on_import_batch)
+            self.import_worker.import_finished.connect(self._on_import_finished)
+            
+            self._set_import_running(True)
+            self.import_worker.start()
+    
+    def _cancel_import(self):
+        """Прерывает импорт; уже добавленные цели остаются"""
+        if self.import_worker:
+            self.import_worker.requestInterruption()
+    
+    def _set_import_running(self, running: bool):
+        """Переключает UI на время импорта"""
+        self.import_progress.setValue(0)
+        self.import_progress.setVisible(running)
+        self.cancel_import_btn.setVisible(running)
+        self.import_btn.setEnabled(not running)
+        self.add_btn.setEnabled(not running)
+        self.remove_btn.setEnabled(not running)
+        self.clear_list_btn.setEnabled(not running)
+    
+    @pyqtSlot(list)
+    def _on_import_batch(self, targets):
+        """Добавляет пачку импортированных целей"""
+        self.target_index.update(targets)
+        self.target_model.append_targets(targets)
+        self._update_stats()
+    
+    @pyqtSlot(dict)
+    def _on_import_finished(self, stats):
+        """Показывает итоги импорта"""
+        self._set_import_running(False)
+        self.import_worker = None
+        
+        if stats['error']:
+            QMessageBox.critical(self, "Error", f"Failed to read file: {stats['error']}")
+            return
+        
+        message = (f"Imported {stats['added']} targets, "
+                   f"{stats['duplicates']} duplicates, {stats['invalid']} invalid")
+        if stats['invalid_samples']:
+            message += f"\nInvalid: {', '.join(stats['invalid_samples'])}"
+        if stats['cancelled']:
+            message = "Import cancelled. " + message
+        QMessageBox.information(self, "Import", message)
+    
+    def _save_exclusions(self):
+        """Сохраняет исключенные диапазоны в область сканирования"""
+        valid, invalid = parse_targets(self.exclusions_editor.toPlainText())
+        if invalid:
+            QMessageBox.warning(self, "Warning", f"Invalid exclusions: {', '.join(invalid[:10])}")
+            return
+        
+        self.scope_manager.set_denied(valid)
+        # Показываем нормализованный список (пересекающиеся диапазоны объединены)
+        self.exclusions_editor.setPlainText('\n'.join(self.scope_manager.get_denied()))
+        self._update_scope_label()
+    
+    def _import_exclusions(self):
+        """Импортирует исключения из файла"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Select exclusions file", "", "Text files (*.txt);;All files (*.*)"
+        )
+        
         if file_path:
             try:
                 with open(file_path, 'r', encoding='utf-8') as file:
-                    content = file.read()
-                
-                self.targets_editor.setPlainText(content)
-                QMessageBox.information(self, "Success", "File loaded into editor")
-                
+                    self.exclusions_editor.setPlainText(file.read())
+                self._save_exclusions()
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to read file: {e}")
     
+    def _update_scope_label(self):
+        """Обновляет статистику исключений"""
+        denied = self.scope_manager.denied
+        self.scope_label.setText(f"{denied.range_count()} excluded ranges, {denied.address_count()} addresses")
+    
     def _remove_selected(self):
         """Удаляет выбранные цели"""
-        selected_items = self.targets_list.selectedItems()
-        if not selected_items:
+        rows = [index.row() for index in self.targets_list.selectionModel().selectedRows()]
+        if not rows:
             return
         
-        for item in selected_items:
-            target = item.text()
-            if target in self.targets:
-                self.targets.remove(target)
-        
-        self._update_targets_list()
+        self.target_index.difference_update(self.target_model.remove_rows(rows))
+        self._update_stats()
     
     def _clear_all(self):
         """Очищает все цели"""
@@ -151,8 +400,9 @@ class TargetManagerTab(BaseTabModule):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            self.targets.clear()
-            self._update_targets_list()
+            self.target_index.clear()
+            self.target_model.clear()
+            self._update_stats()
     
     def _send_to_scanner(self):
         """Отправляет цели в модуль сканирования"""
@@ -160,13 +410,9 @@ class TargetManagerTab(BaseTabModule):
             QMessageBox.warning(self, "Warning", "No targets to send!")
             return
         
-        self.event_bus.targets_updated.emit(self.targets)
+        self.event_bus.targets_updated.emit(list(self.targets))
         QMessageBox.information(self, "Success", f"Sent {len(self.targets)} targets to scanner")
     
-    def _update_targets_list(self):
-        """Обновляет список целей"""
-        self.targets_list.clear()
-        for target in self.targets:
-            self.targets_list.addItem(target)
-        
+    def _update_stats(self):
+        """Обновляет статистику списка целей"""
         self.stats_label.setText(f"Total targets: {len(self.targets)}")
@@ -341,6 +341,7 @@ class VisualizationTab(BaseTabModule):
         self.graph_view = None
         self.status_label = None
         self._is_initialized = False
+        self._drawn_version = None  # (результат, версия), по которым построен текущий граф
         
         super().__init__(event_bus, dependencies)
         print(f"🟣 [Visualization] __init__ completed - current_results: {self.current_results}")
@@ -351,8 +352,9 @@ class VisualizationTab(BaseTabModule):
         # Убедимся, что current_results инициализирован
         if not hasattr(self, 'current_results'):
             self.current_results = None
-        self.event_bus.results_updated.connect(self._on_results_updated)
-        self.event_bus.scan_completed.connect(self._on_scan_completed)
+        # Частичные результаты шардов приходят часто - граф перестраивается не чаще лимита
+        self.event_bus.connect_coalesced('results_updated', self._on_results_updated)
+        self.event_bus.connect_signal('scan_completed', self._on_scan_completed)
 
     def _create_ui(self):
         """Создает UI компонент визуализации"""
@@ -393,6 +395,10 @@ class VisualizationTab(BaseTabModule):
         group = QGroupBox("Visualization Control")
         layout = QHBoxLayout(group)
         
+        # Открытые сканирования
+        layout.addWidget(QLabel("Scan:"))
+        layout.addWidget(self._create_scan_selector())
+        
         # Выбор layout
         layout.addWidget(QLabel("Layout:"))
         self.layout_combo = QComboBox()
@@ -523,12 +529,13 @@ class VisualizationTab(BaseTabModule):
         print(f"🟣 [Visualization] Has results: {results is not None}")
         print(f"🟣 [Visualization] Is initialized: {self._is_initialized}")
         
-        if results and self._is_initialized:
-            self.current_results = results
-            self._build_graph_from_results(results)
-        elif results:
-            # Сохраняем результаты, но ждем инициализации UI
-            self.current_results = results
+        if not results or not self._follows_scan(scan_id):
+            return
+        self.current_results = self._hold_result(scan_id, results)
+        if self._is_initialized:
+            self._build_graph_from_results(self.current_results)
+        else:
+            # Результаты сохранены, ждем инициализации UI
             print("🟣 [Visualization] Results saved, waiting for UI initialization")
     
     @pyqtSlot(dict)
@@ -539,11 +546,17 @@ class VisualizationTab(BaseTabModule):
         
         print(f"🟣 [Visualization] Scan completed: {scan_id}")
         
-        if results and self._is_initialized:
-            self.current_results = results
-            self._build_graph_from_results(results)
-        elif results:
-            self.current_results = results
+        if not results or not self._follows_scan(scan_id):
+            return
+        self.current_results = self._hold_result(scan_id, results)
+        if self._is_initialized:
+            self._build_graph_from_results(self.current_results)
+    
+    def _show_workspace_result(self, scan_id, result):
+        """Переключение на другое открытое сканирование без повторного разбора"""
+        self.current_results = result
+        if self._is_initialized:
+            self._build_graph_from_results(result)
     
     def showEvent(self, event):
         """Вызывается когда вкладка становится видимой"""
@@ -565,8 +578,14 @@ class VisualizationTab(BaseTabModule):
         if not hasattr(self, 'graph_view') or not self.graph_view:
             print(f"🟣 [Visualization] Graph view not available")
             return
+        
+        # Граф этой версии результата уже построен (повторное открытие вкладки, тот же результат)
+        drawn_version = (id(scan_result), scan_result.version)
+        if drawn_version == self._drawn_version and self.graph_view.nodes:
+            return
             
         self.graph_view.clear_graph()
+        self._drawn_version = drawn_version
         
         host_count = 0
         service_count = 0
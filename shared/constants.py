@@ -109,6 +109,83 @@ MAX_THREADS = 64
 MAX_PORT = 65535
 MAX_TARGETS = 10000
 
+# Хранилище истории сканирований
+HISTORY_DB_FILE = "scan_history.db"
+HISTORY_CACHE_SIZE = 50  # Сколько последних сводок держать в памяти
+RAW_XML_DIR = "scan_data/raw_xml"  # Сжатый XML вывод nmap (по SHA-256)
+
+# Предварительное разрешение доменных целей
+DNS_MAX_WORKERS = 16
+DNS_DEFAULT_TTL = 300   # Секунд, если резолвер не сообщает TTL
+DNS_NEGATIVE_TTL = 60   # Кэширование неудачных ответов
+
+# Приоритизация целей по истории
+PRIORITY_HALF_LIFE_DAYS = 7    # Вес "последний раз был up" падает вдвое за этот срок
+PRIORITY_MAX_PROMOTED = 1024   # Сколько известных хостов выносить в начало списка
+PRIORITY_HISTORY_DAYS = 60     # Более старая история не учитывается (ее вес уже меньше 1%)
+PRIORITY_IP_FILTER_MAX = 4096  # До стольких адресов целей история запрашивается только по ним
+
+# Списки портов по истории (smart ports)
+SMART_PORTS_COVERAGE = 0.95       # Доля исторически открытых сервисов, которую должен покрыть список
+SMART_PORTS_MAX = 1000            # Верхняя граница длины списка
+SMART_PORTS_MIN_OBSERVATIONS = 50 # Меньше наблюдений - истории не доверяем, используем -F
+SMART_PORTS_REFRESH_SECONDS = 300 # Как часто перечитывать частоты из истории
+SMART_PORTS_BASELINE = [21, 22, 23, 25, 53, 80, 110, 135, 139, 143, 443, 445,
+                        993, 995, 1433, 3306, 3389, 5432, 5900, 8080]  # Всегда в списке - для новых сервисов
+
+# Инкрементальное сканирование
+SERVICE_CACHE_MAX_AGE = 7 * 86400  # Секунд, сколько версия сервиса из истории считается актуальной
+RESCAN_PROBE_COVERAGE = 0.9        # Легкий проход пересканирования: доля исторически открытых сервисов
+RESCAN_PROBE_MAX_PORTS = 100
+
+# Пакетная отправка сканирований
+BATCH_SHARD_SIZE = 256  # Объединенные задания больше этого числа адресов сканируются частями
+
+# Планировщик повторяющихся сканирований
+SCHEDULES_FILE = "schedules.json"
+SCHEDULER_TICK_SECONDS = 15     # Как часто проверять наступившие расписания
+SCHEDULER_DEFAULT_JITTER = 120  # Секунд, случайная задержка запуска после срабатывания
+SCHEDULER_MAX_QUEUED = 10       # Не ставить запуски в очередь сверх этого размера
+
+# Потоковое отображение результатов
+RESULTS_STREAM_FLUSH_MS = 250  # Хосты, пришедшие за это время, добавляются в таблицу одной пачкой
+RESULTS_FINDINGS_RESORT_MS = 1000  # Не чаще - пересортировка по уязвимостям, пока находки считаются в фоне
+
+# Объединение частых событий для UI
+UI_EVENT_MAX_RATE = 4  # Доставок в секунду на подписчика (прогресс, частичные результаты)
+
+# Доставка событий шины между потоками
+EVENT_QUEUE_SIZE = 256   # Максимум ожидающих событий в очереди одного подписчика
+EVENT_POOL_WORKERS = 4   # Потоков в общем пуле для не-UI подписчиков
+
+# Инструментирование шины событий
+EVENT_METRICS_ENABLED = False  # Включается также из вкладки мониторинга
+EVENT_METRICS_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)  # Границы гистограммы времени обработчика
+EVENT_METRICS_REFRESH_MS = 2000  # Период обновления таблицы метрик
+
+# Запись и воспроизведение трафика шины событий
+EVENT_RECORDING_FORMAT = "nmap-gui-events/1"
+EVENT_DERIVED_SIGNALS = ('analysis_ready', 'ui_stall', 'workspace_changed')  # Не записываются: при воспроизведении их публикуют заново
+
+# Сторож отзывчивости GUI
+UI_WATCHDOG_ENABLED = True
+UI_WATCHDOG_INTERVAL_MS = 100  # Период тика таймера GUI потока
+UI_WATCHDOG_SAMPLE_MS = 50     # Период проверки потоком-сэмплером
+UI_STALL_THRESHOLD_MS = 500    # Зависание: GUI поток не отвечает дольше этого
+UI_STALL_MAX_SAMPLES = 5       # Снимков стека за одно зависание
+UI_STALL_HISTORY = 50          # Зависаний в памяти для вкладки мониторинга
+UI_STALL_LOG_FILE = "logs/ui_stalls.jsonl"
+
+# Рабочее пространство открытых результатов
+RESULT_WORKSPACE_BUDGET_MB = 256  # Оценка памяти результатов, сверх которой давно не использованные вытесняются в историю
+
+# Анализ результатов в фоне
+ANALYSIS_SNAPSHOT_LIMIT = 20  # Сколько снимков анализа последних сканирований держать в памяти
+
+# Область сканирования
+SCOPE_FILE = "scope.json"
+SCOPE_EXCLUDE_FILE = "scan_data/scope_exclude.txt"  # Передается nmap через --excludefile
+
 # Сообщения об ошибках
 ERROR_MESSAGES = {
     'nmap_not_found': 'Nmap not found in system PATH. Please install nmap.',
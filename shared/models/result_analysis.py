@@ -0,0 +1,50 @@
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+
+PortKey = Tuple[str, str, int]  # (ip, протокол, порт)
+
+@dataclass(frozen=True)
+class ServiceStat:
+    service: str
+    count: int                 # Сколько открытых портов с этим сервисом
+    ports: Tuple[int, ...]     # На каких номерах портов он встречался
+
+@dataclass(frozen=True)
+class ResultAnalysis:
+    """
+    Производные данные одной версии результата сканирования.
+
+    Снимок неизменяемый: вкладки читают его из GUI потока, пока сервис
+    анализа считает следующую версию в своем потоке.
+    """
+    scan_id: str
+    version: int
+    total_hosts: int = 0
+    active_hosts: int = 0
+    open_ports: int = 0
+    os_detected: int = 0
+    services: Tuple[ServiceStat, ...] = ()                  # По убыванию числа портов
+    findings_per_host: Mapping[str, int] = field(default_factory=lambda: MappingProxyType({}))
+    vulnerability_total: int = 0
+    potential_vulnerabilities: Tuple[Mapping, ...] = ()     # Эвристика версий и скриптов для отчетов
+    risk_levels: Mapping[PortKey, str] = field(default_factory=lambda: MappingProxyType({}))
+    risk_counts: Mapping[str, int] = field(default_factory=lambda: MappingProxyType({}))
+
+    @property
+    def unique_services(self) -> int:
+        return len(self.services)
+
+    def top_services(self, limit: int = 10) -> Tuple[ServiceStat, ...]:
+        return self.services[:limit]
+
+    def risk_of(self, ip: str, protocol: str, port: int) -> Optional[str]:
+        """Уровень риска открытого порта или None, если порта нет в снимке"""
+        return self.risk_levels.get((ip, protocol, port))
+
+    def get_summary(self) -> str:
+        """Короткое текстовое описание"""
+        risks = ", ".join(f"{count} {level}" for level, count in self.risk_counts.items() if count)
+        return (f"{self.active_hosts}/{self.total_hosts} hosts up, {self.open_ports} open ports, "
+                f"{self.unique_services} services, {self.vulnerability_total} findings"
+                + (f" (risk: {risks})" if risks else ""))
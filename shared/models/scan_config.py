@@ -1,7 +1,10 @@
-from dataclasses import dataclass
-from typing import List, Optional
+import shlex
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional
 from enum import Enum
 
+from ..constants import SMART_PORTS_COVERAGE, SERVICE_CACHE_MAX_AGE
+
 class ScanType(Enum):
     """Типы сканирования NMAP"""
     QUICK = "quick"
@@ -32,9 +35,42 @@ class ScanConfig:
     os_detection: bool = False
     script_scan: bool = False
     output_format: str = "xml"
+    exclude_file: str = ""  # Файл исключений области сканирования (--excludefile)
+    resolve_hostnames: bool = True  # Разрешать доменные цели до запуска nmap
+    host_labels: Dict[str, List[str]] = field(default_factory=dict)  # IP -> доменные имена целей
+    prioritize_targets: bool = True  # Сначала сканировать хосты, живые по истории
+    shard_size: int = 0  # Адресов в одной части сканирования (0 - без разбиения)
+    smart_ports: bool = False  # Порты из модели частот по истории вместо -F / port_range
+    smart_ports_coverage: float = SMART_PORTS_COVERAGE
+    incremental: bool = False  # -sV только для портов, которых нет в кэше версий
+    service_cache_max_age: int = SERVICE_CACHE_MAX_AGE  # Секунд
+    incremental_rescan: bool = False  # Полный профиль только для новых и изменившихся хостов
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Сериализует конфигурацию в словарь (для JSON/SQLite)"""
+        data = asdict(self)
+        data['scan_type'] = self.scan_type.value
+        data['scan_intensity'] = self.scan_intensity.value
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ScanConfig':
+        """Восстанавливает конфигурацию из словаря, игнорируя неизвестные ключи"""
+        known = {name: value for name, value in data.items() if name in cls.__dataclass_fields__}
+        known['targets'] = list(known.get('targets') or [])
+        known['scan_type'] = ScanType(known.get('scan_type', ScanType.QUICK.value))
+        known['scan_intensity'] = ScanIntensity(known.get('scan_intensity', ScanIntensity.SAFE.value))
+        return cls(**known)
     
-    def to_nmap_command(self) -> str:
-        """Генерирует команду nmap из конфигурации"""
+    def to_nmap_command(self, smart_port_spec: Optional[str] = None) -> str:
+        """
+        Генерирует команду nmap из конфигурации. smart_port_spec - список портов
+        по истории (PortFrequencyModel.build_port_spec) для конфигураций со
+        smart_ports; без него, как и в движке, остается стандартный список.
+        """
+        if not self.smart_ports or self.scan_type in [ScanType.DISCOVERY, ScanType.CUSTOM]:
+            smart_port_spec = None
+        
         cmd_parts = ["nmap"]
         
         # Базовые опции
@@ -46,7 +82,7 @@ class ScanConfig:
         
         # Тип сканирования
         if self.scan_type == ScanType.QUICK:
-            cmd_parts.append("-F")
+            cmd_parts.append(f"-p {smart_port_spec}" if smart_port_spec else "-F")
         elif self.scan_type == ScanType.STEALTH:
             cmd_parts.append("-sS")
         elif self.scan_type == ScanType.COMPREHENSIVE:
@@ -82,18 +118,27 @@ class ScanConfig:
                 cmd_parts.append("--script=safe,default,version,discovery,vuln,exploit")
         
         # Порты (игнорируем для quick и discovery сканирования)
-        if self.port_range and self.scan_type not in [ScanType.QUICK, ScanType.DISCOVERY]:
-            cmd_parts.append(f"-p {self.port_range}")
+        if self.scan_type not in [ScanType.QUICK, ScanType.DISCOVERY]:
+            if smart_port_spec:
+                cmd_parts.append(f"-p {smart_port_spec}")
+            elif self.port_range:
+                cmd_parts.append(f"-p {self.port_range}")
         
         # Пользовательская команда (имеет приоритет для custom сканирования)
         if (self.scan_type == ScanType.CUSTOM and 
             self.custom_command and 
             self.custom_command.strip()):
             custom_cmd = self.custom_command.strip()
+            if self.exclude_file and "--excludefile" not in custom_cmd:
+                custom_cmd += f" --excludefile {shlex.quote(self.exclude_file)}"
             if "-oX" not in custom_cmd:
                 custom_cmd += " -oX -"
             return custom_cmd
         
+        # Исключения области сканирования
+        if self.exclude_file:
+            cmd_parts.append(f"--excludefile {shlex.quote(self.exclude_file)}")
+        
         # Цели
         cmd_parts.extend(self.targets)
         
@@ -10,6 +10,7 @@ class PortInfo:
     service: str
     version: str = ""
     reason: str = ""
+    version_seen_at: Optional[float] = None  # Когда версия определена -sV (None - в этом сканировании)
 
 @dataclass
 class HostInfo:
@@ -18,6 +19,7 @@ class HostInfo:
     state: str = "unknown"
     os_family: str = ""
     os_details: str = ""
+    mac: str = ""
     ports: List[PortInfo] = field(default_factory=list)
     scripts: Dict[str, str] = field(default_factory=dict)
 
@@ -29,7 +31,13 @@ class ScanResult:
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
     status: str = "pending"
-    raw_xml: str = ""
+    raw_xml_blob: Optional['RawXmlBlob'] = None  # Сжатый XML на диске, читается только при экспорте
+    script_store: Optional['ScriptOutputStore'] = field(default=None, repr=False, compare=False)  # Общие выводы NSE скриптов
+    version: int = field(default=0, compare=False)  # Растет при каждом изменении уже опубликованного результата
+    
+    def mark_changed(self):
+        """Отмечает изменение результата (например, дописаны хосты очередной части)"""
+        self.version += 1
     
     def get_open_ports_count(self) -> int:
         """Возвращает количество открытых портов"""
@@ -40,6 +48,10 @@ class ScanResult:
                     count += 1
         return count
     
+    def has_raw_xml(self) -> bool:
+        """Проверяет, доступен ли исходный XML nmap"""
+        return self.raw_xml_blob is not None and self.raw_xml_blob.exists()
+    
     def get_hosts_count(self) -> int:
         """Возвращает количество хостов"""
         return len(self.hosts)
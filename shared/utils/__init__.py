@@ -1,3 +1,3 @@
-from .validators import validate_ip, validate_network, validate_domain, parse_targets
+from .validators import validate_ip, validate_network, validate_domain, parse_targets, normalize_targets, split_targets, TargetSet
 
-__all__ = ['validate_ip', 'validate_network', 'validate_domain', 'parse_targets']
+__all__ = ['validate_ip', 'validate_network', 'validate_domain', 'parse_targets', 'normalize_targets', 'split_targets', 'TargetSet']
@@ -0,0 +1,125 @@
+import gzip
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+import logging
+from typing import IO, Iterable, Optional
+
+from ..constants import RAW_XML_DIR
+
+_CHUNK_SIZE = 1024 * 1024
+
+class RawXmlBlob:
+    """Ленивая ссылка на сжатый XML вывод nmap, хранящийся на диске"""
+
+    def __init__(self, path: str, digest: str, size: int = 0):
+        self.path = path
+        self.digest = digest
+        self.size = size  # Размер несжатого XML в байтах
+
+    def __repr__(self) -> str:
+        return f"RawXmlBlob(digest={self.digest[:12]}..., size={self.size})"
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def open(self) -> IO[str]:
+        """Открывает XML для потокового чтения (текстовый режим)"""
+        return gzip.open(self.path, 'rt', encoding='utf-8')
+
+    def read_text(self) -> str:
+        """Читает XML целиком - только для предпросмотра и экспорта"""
+        with self.open() as f:
+            return f.read()
+
+    def copy_to(self, dest_path: str):
+        """Распаковывает XML в файл, не загружая его в память целиком"""
+        with gzip.open(self.path, 'rb') as src, open(dest_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, _CHUNK_SIZE)
+
+class RawXmlStore:
+    """Контентно-адресуемое хранилище сжатого XML (ключ - SHA-256 содержимого)"""
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls, base_dir: str = None):
+        if cls._instance is None:
+            cls._instance = RawXmlStore(base_dir or RAW_XML_DIR)
+        return cls._instance
+
+    def __init__(self, base_dir: str = RAW_XML_DIR):
+        self.base_dir = base_dir
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.base_dir, digest[:2], f"{digest}.xml.gz")
+
+    def get(self, digest: str) -> Optional[RawXmlBlob]:
+        """Возвращает blob по хэшу, если он есть на диске"""
+        if not digest:
+            return None
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            return None
+        return RawXmlBlob(path, digest)
+
+    def put_file(self, source_path: str) -> RawXmlBlob:
+        """Сохраняет XML файл; одинаковое содержимое записывается один раз"""
+        hasher = hashlib.sha256()
+        size = 0
+        with open(source_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+                hasher.update(chunk)
+                size += len(chunk)
+
+        with open(source_path, 'rb') as src:
+            return self._store(hasher.hexdigest(), size, src)
+
+    def put_text(self, xml_content: str) -> RawXmlBlob:
+        """Сохраняет XML из строки"""
+        data = xml_content.encode('utf-8')
+        return self._store(hashlib.sha256(data).hexdigest(), len(data), io.BytesIO(data))
+
+    def _store(self, digest: str, size: int, source: IO[bytes]) -> RawXmlBlob:
+        """Сжимает поток в blob, если такого содержимого еще нет"""
+        path = self._blob_path(digest)
+
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Пишем во временный файл и атомарно переименовываем
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+                try:
+                    with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb') as dst:
+                        shutil.copyfileobj(source, dst, _CHUNK_SIZE)
+                    os.replace(tmp_path, path)
+                except Exception:
+                    if os.path.exists(tmp_path):
+                        os.unlink(tmp_path)
+                    raise
+                self.logger.debug(f"Stored raw XML blob {digest[:12]} ({size} bytes)")
+
+        return RawXmlBlob(path, digest, size)
+
+    def remove(self, digests: Iterable[str]) -> int:
+        """Удаляет blob, на которые больше не ссылается история"""
+        removed = 0
+        with self._lock:
+            for digest in digests:
+                try:
+                    os.unlink(self._blob_path(digest))
+                    removed += 1
+                except FileNotFoundError:
+                    continue
+                except OSError as e:
+                    self.logger.warning(f"Cannot remove raw XML blob {digest[:12]}: {e}")
+        if removed:
+            self.logger.info(f"Removed {removed} unreferenced raw XML blobs")
+        return removed
+
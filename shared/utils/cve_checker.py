@@ -1,51 +1,58 @@
-class ResultsTableTab(BaseTabModule):
+import logging
+
+class CVEChecker:
+    """Заглушка для проверки CVE уязвимостей"""
     
-    def __init__(self, event_bus: EventBus, dependencies: dict = None):
-        super().__init__(event_bus, dependencies)
-        self.cve_checker = CVEChecker()  # Инициализируем CVE checker
-        self.current_results = None
+    def __init__(self):
+        self.logger = self._setup_logging()
     
-    def _extract_vulnerabilities(self, host: HostInfo) -> list:
-        """Извлекает информацию об уязвимостях из скриптов nmap и CVE баз"""
-        vulnerabilities = []
-        
-        # Анализируем скрипты nmap
-        for script_name, script_output in host.scripts.items():
-            vuln_info = self._parse_vulnerability_from_script(script_name, script_output, host)
-            if vuln_info:
-                vulnerabilities.append(vuln_info)
-        
-        # Проверяем CVE для сервисов
-        for port in host.ports:
-            if port.state == "open" and port.service and port.version:
-                cve_vulns = self._check_cve_vulnerabilities(port, host)
-                vulnerabilities.extend(cve_vulns)
-        
-        return vulnerabilities
+    def _setup_logging(self):
+        return logging.getLogger(__name__)
     
-    def _check_cve_vulnerabilities(self, port: PortInfo, host: HostInfo) -> list:
-        """Проверяет CVE уязвимости для сервиса"""
-        vulnerabilities = []
+    def check_service_cve(self, service: str, version: str) -> list:
+        """
+        Проверяет CVE уязвимости для сервиса
+        В реальной реализации здесь будет обращение к CVE базе
+        """
+        cves = []
         
         try:
-            # Проверяем CVE для конкретного сервиса
-            cves = self.cve_checker.check_service_cve(port.service, port.version)
+            # Простая заглушка для демонстрации
+            # В реальной системе здесь будет обращение к CVE базе данных
+            service_lower = service.lower()
+            version_lower = version.lower()
+            
+            # Пример проверки для OpenSSH
+            if 'ssh' in service_lower and '6.6.1' in version_lower:
+                cves.append({
+                    'id': 'CVE-2016-6210',
+                    'risk': 'MEDIUM',
+                    'description': 'OpenSSH 6.6.1 allows remote attackers to obtain sensitive information from process memory',
+                    'cvss_score': 5.3,
+                    'source': 'NVD'
+                })
+            
+            # Пример проверки для Apache
+            elif 'http' in service_lower and '2.4.7' in version_lower:
+                cves.append({
+                    'id': 'CVE-2017-3169',
+                    'risk': 'HIGH',
+                    'description': 'Apache HTTP Server mod_ssl vulnerability',
+                    'cvss_score': 7.5,
+                    'source': 'NVD'
+                })
             
-            for cve in cves:
-                vulnerabilities.append({
-                    'type': 'CVE',
-                    'id': cve['id'],
-                    'service': port.service,
-                    'port': port.port,
-                    'version': port.version,
-                    'risk': cve['risk'],
-                    'issue': cve['description'],
-                    'cvss_score': cve['cvss_score'],
-                    'recommendation': f"Update {port.service} to latest version",
-                    'source': cve['source']
+            # Добавляем общие CVE на основе версий
+            if any(vuln_ver in version_lower for vuln_ver in ['2.4.49', '2.4.50']):
+                cves.append({
+                    'id': 'CVE-2021-41773',
+                    'risk': 'CRITICAL',
+                    'description': 'Apache HTTP Server path traversal vulnerability',
+                    'cvss_score': 9.8,
+                    'source': 'NVD'
                 })
                 
         except Exception as e:
-            self.logger.debug(f"CVE check failed for {port.service}: {e}")
+            self.logger.debug(f"CVE check error for {service} {version}: {e}")
         
-        return vulnerabilities
+        return cves
@@ -4,6 +4,7 @@ import html
 from typing import List, Dict, Any
 from datetime import datetime
 from ..models.scan_result import ScanResult, HostInfo, PortInfo
+from .scan_diff import ScanDiff
 
 class ExportManager:
     """Менеджер экспорта результатов сканирования"""
@@ -37,6 +38,7 @@ class ExportManager:
                 "ip": host.ip,
                 "hostname": host.hostname,
                 "status": host.state,
+                "mac": host.mac,
                 "os": {
                     "family": host.os_family,
                     "details": host.os_details
@@ -58,8 +60,8 @@ class ExportManager:
             
             export_data["hosts"].append(host_data)
         
-        if include_raw_xml and scan_result.raw_xml:
-            export_data["raw_xml"] = scan_result.raw_xml
+        if include_raw_xml and scan_result.has_raw_xml():
+            export_data["raw_xml"] = scan_result.raw_xml_blob.read_text()
         
         return json.dumps(export_data, indent=2, ensure_ascii=False)
     
@@ -271,12 +273,24 @@ class ExportManager:
         Returns:
             str: XML строка
         """
-        if scan_result.raw_xml:
-            return scan_result.raw_xml
+        if scan_result.has_raw_xml():
+            return scan_result.raw_xml_blob.read_text()
         else:
             # Генерируем базовый XML если raw_xml недоступен
             return ExportManager._generate_basic_xml(scan_result)
     
+    @staticmethod
+    def export_to_xml_file(scan_result: ScanResult, file_path: str):
+        """
+        Записывает XML в файл; исходный XML nmap распаковывается потоково,
+        без загрузки в память
+        """
+        if scan_result.has_raw_xml():
+            scan_result.raw_xml_blob.copy_to(file_path)
+        else:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(ExportManager._generate_basic_xml(scan_result))
+    
     @staticmethod
     def _generate_basic_xml(scan_result: ScanResult) -> str:
         """Генерирует базовый XML если оригинальный недоступен"""
@@ -307,38 +321,60 @@ class ExportManager:
         
         xml_parts.append('</nmaprun>')
         return '\n'.join(xml_parts)
-                    xml_parts.append(f'<status state="{host.state}" reason=""/>')
-            
-            if host.ports:
-                xml_parts.append('<ports>')
-                for port in host.ports:
-                    xml_parts.append(f'<port protocol="{port.protocol}" portid="{port.port}">')
-                    xml_parts.append(f'<state state="{port.state}" reason=""/>')
-                    if port.service or port.version:
-                        service_attrs = f'name="{port.service}"' if port.service else ''
-                        if port.version:
-                            service_attrs += f' product="{port.version}"'
-                        xml_parts.append(f'<service {service_attrs}/>')
-                    xml_parts.append('</port>')
-                xml_parts.append('</ports>')
-            
-            # Информация об ОС
-            if host.os_family:
-                xml_parts.append('<os>')
-                xml_parts.append(f'<osmatch name="{host.os_family}" accuracy="100">')
-                if host.os_details:
-                    xml_parts.append(f'<osclass type="{host.os_details}" vendor="" osfamily="{host.os_family}" osgen="" accuracy="100"/>')
-                xml_parts.append('</osmatch>')
-                xml_parts.append('</os>')
-            
-            xml_parts.append('</host>')
+    
+    @staticmethod
+    def export_diff_to_json(diff: ScanDiff) -> str:
+        """
+        Экспортирует сравнение двух сканирований в JSON формат
+        
+        Returns:
+            str: JSON строка
+        """
+        export_data = {
+            "metadata": {
+                "old_scan_id": diff.old_scan_id,
+                "new_scan_id": diff.new_scan_id,
+                "export_time": datetime.now().isoformat(),
+                "counts": diff.get_counts()
+            },
+            "changes": [
+                {
+                    "type": entry.change_type.value,
+                    "ip": entry.ip,
+                    "port": entry.port,
+                    "protocol": entry.protocol,
+                    "old": entry.old_value,
+                    "new": entry.new_value
+                }
+                for entry in diff.entries
+            ]
+        }
         
-        # Добавляем время завершения
-        end_time = scan_result.end_time or datetime.now()
-        xml_parts.append(f'<runstats>')
-        xml_parts.append(f'<finished time="{int(end_time.timestamp())}" timestr="{end_time.isoformat()}"/>')
-        xml_parts.append('</runstats>')
+        return json.dumps(export_data, indent=2, ensure_ascii=False)
+    
+    @staticmethod
+    def export_diff_to_csv(diff: ScanDiff) -> str:
+        """
+        Экспортирует сравнение двух сканирований в CSV формат
         
-        xml_parts.append('</nmaprun>')
-        return '\n'.join(xml_parts)
-      
+        Returns:
+            str: CSV строка
+        """
+        import io
+        
+        output = io.StringIO()
+        writer = csv.writer(output)
+        
+        writer.writerow(["Change", "Host", "Port", "Protocol", "Old", "New"])
+        
+        for entry in diff.entries:
+            writer.writerow([
+                entry.change_type.value,
+                entry.ip,
+                entry.port if entry.port is not None else "",
+                entry.protocol,
+                entry.old_value,
+                entry.new_value
+            ])
+        
+        return output.getvalue()
@@ -0,0 +1,218 @@
+import re
+import logging
+import threading
+import weakref
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from shared.models.scan_result import HostInfo, PortInfo
+from shared.utils.cve_checker import CVEChecker
+
+def host_content_version(host: HostInfo) -> int:
+    """
+    Версия содержимого хоста: меняется при изменении портов, версий сервисов
+    или выводов скриптов. Хэши строк Python кэширует в самих объектах строк,
+    поэтому повторный расчет по тому же хосту дешевый.
+    """
+    ports = tuple((port.port, port.protocol, port.state, port.service, port.version) for port in host.ports)
+    return hash((host.ip, ports, tuple(host.scripts.items())))
+
+class FindingsCache:
+    """
+    Кэш находок (уязвимостей) по хостам.
+
+    Ключ - идентичность объекта HostInfo и версия его содержимого: находки
+    считаются один раз, а после изменения хоста (например, догрузки скриптов)
+    пересчитываются. Таблица, панель деталей, экспорт и диалог уязвимостей
+    читают из одного кэша. compute_all позволяет посчитать находки заранее
+    в фоновом потоке.
+    """
+
+    def __init__(self, cve_checker: CVEChecker = None):
+        self.cve_checker = cve_checker or CVEChecker()
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        # id(host) -> (слабая ссылка на хост, версия, находки)
+        self._entries: Dict[int, Tuple[weakref.ref, int, List[dict]]] = {}
+
+    def peek(self, host: HostInfo) -> Optional[List[dict]]:
+        """Находки из кэша или None, если они еще не посчитаны для текущей версии хоста"""
+        with self._lock:
+            entry = self._entries.get(id(host))
+        if entry is None or entry[0]() is not host or entry[1] != host_content_version(host):
+            return None
+        return entry[2]
+
+    def get(self, host: HostInfo) -> List[dict]:
+        """Находки по хосту; при отсутствии в кэше считаются и сохраняются"""
+        findings = self.peek(host)
+        if findings is None:
+            version = host_content_version(host)
+            findings = self.extract(host)
+            with self._lock:
+                self._entries[id(host)] = (weakref.ref(host), version, findings)
+        return findings
+
+    def compute_all(self, hosts: Iterable[HostInfo], should_stop: Callable[[], bool] = None,
+                    on_batch: Callable[[int], None] = None, batch_size: int = 2000) -> int:
+        """
+        Считает находки для всех хостов (для фонового потока).
+        Возвращает общее число находок; on_batch вызывается после каждых batch_size хостов.
+        """
+        total = 0
+        for index, host in enumerate(hosts, 1):
+            if should_stop and should_stop():
+                break
+            total += len(self.get(host))
+            if on_batch and index % batch_size == 0:
+                on_batch(index)
+        return total
+
+    def prune(self):
+        """Удаляет записи хостов, которые больше нигде не используются"""
+        with self._lock:
+            dead = [key for key, entry in self._entries.items() if entry[0]() is None]
+            for key in dead:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def extract(self, host: HostInfo) -> list:
+        """Извлекает информацию об уязвимостях из скриптов nmap и CVE баз (без кэша)"""
+        vulnerabilities = []
+        
+        # Анализируем скрипты nmap
+        if hasattr(host, 'scripts') and host.scripts:
+            for script_name, script_output in host.scripts.items():
+                vuln_info = self._parse_vulnerability_from_script(script_name, script_output, host)
+                if vuln_info:
+                    vulnerabilities.append(vuln_info)
+        
+        # Проверяем CVE для сервисов
+        for port in host.ports:
+            if port.state == "open" and port.service and port.service != "unknown":
+                # Проверяем CVE уязвимости
+                cve_vulns = self._check_cve_vulnerabilities(port, host)
+                vulnerabilities.extend(cve_vulns)
+                
+                # Проверяем уязвимости версий
+                version_vulns = self._check_version_vulnerabilities(port, host)
+                vulnerabilities.extend(version_vulns)
+        
+        return vulnerabilities
+    
+    def _check_cve_vulnerabilities(self, port: PortInfo, host: HostInfo) -> list:
+        """Проверяет CVE уязвимости для сервиса"""
+        vulnerabilities = []
+        
+        try:
+            # Проверяем CVE для конкретного сервиса
+            cves = self.cve_checker.check_service_cve(port.service, port.version)
+            
+            for cve in cves:
+                vulnerabilities.append({
+                    'type': 'CVE',
+                    'id': cve['id'],
+                    'service': port.service,
+                    'port': str(port.port),
+                    'version': port.version,
+                    'risk': cve['risk'],
+                    'issue': cve['description'],
+                    'cvss_score': cve.get('cvss_score'),
+                    'recommendation': f"Update {port.service} to latest version",
+                    'source': cve.get('source', 'CVE Database')
+                })
+                
+        except Exception as e:
+            self.logger.debug(f"CVE check failed for {port.service}: {e}")
+        
+        return vulnerabilities
+    
+    def _check_version_vulnerabilities(self, port, host: HostInfo) -> list:
+        """Проверяет версии сервисов на известные уязвимости"""
+        vulnerabilities = []
+        version_lower = port.version.lower()
+        
+        # Проверяем известные уязвимые версии
+        if 'openssh' in version_lower:
+            if any(vuln_ver in version_lower for vuln_ver in ['6.6.1', '7.1']):
+                vulnerabilities.append({
+                    'type': 'VERSION',
+                    'script': 'version_detection',
+                    'service': port.service,
+                    'port': str(port.port),
+                    'risk': 'MEDIUM',
+                    'issue': f'Potential vulnerabilities in {port.version}',
+                    'recommendation': 'Update to latest OpenSSH version',
+                    'version': port.version
+                })
+        
+        elif 'apache' in version_lower:
+            if any(vuln_ver in version_lower for vuln_ver in ['2.4.49', '2.4.50']):
+                vulnerabilities.append({
+                    'type': 'VERSION',
+                    'script': 'version_detection',
+                    'service': port.service,
+                    'port': str(port.port),
+                    'risk': 'HIGH',
+                    'issue': f'Known vulnerabilities in Apache {port.version}',
+                    'recommendation': 'Update Apache to latest version',
+                    'version': port.version
+                })
+        
+        return vulnerabilities
+    
+    def _parse_vulnerability_from_script(self, script_name: str, script_output: str, host: HostInfo) -> dict:
+        """Парсит информацию об уязвимости из вывода скрипта"""
+        if not script_output or not script_name:
+            return None
+            
+        script_lower = script_output.lower()
+        
+        # Пропускаем информационные скрипты без уязвимостей
+        non_vulnerability_scripts = ['http-title', 'http-date', 'ssh-hostkey', 'banner', 'port-states']
+        if any(non_vuln in script_name for non_vuln in non_vulnerability_scripts):
+            return None
+        
+        # Определяем уровень риска по ключевым словам
+        risk = "LOW"
+        issue = script_output[:200] + "..." if len(script_output) > 200 else script_output
+        
+        if any(keyword in script_lower for keyword in ['exploit', 'remote code', 'privilege escalation', 'critical', 'cve']):
+            risk = "HIGH"
+        elif any(keyword in script_lower for keyword in ['vulnerable', 'vulnerability', 'risk', 'warning']):
+            risk = "MEDIUM"
+        elif any(keyword in script_lower for keyword in ['info', 'detected', 'found']):
+            risk = "LOW"
+        
+        # Находим связанный порт
+        port_num = "unknown"
+        service = "unknown"
+        
+        # Пытаемся извлечь порт из имени скрипта
+        port_match = re.search(r'port(\d+)_', script_name)
+        if port_match:
+            port_num = port_match.group(1)
+        else:
+            # Ищем порт в выводе
+            port_in_output = re.search(r'port\s*(\d+)', script_lower)
+            if port_in_output:
+                port_num = port_in_output.group(1)
+        
+        # Находим сервис для порта
+        if port_num != "unknown":
+            for port in host.ports:
+                if str(port.port) == port_num:
+                    service = port.service
+                    break
+        
+        return {
+            'type': 'SCRIPT',
+            'script': script_name,
+            'service': service,
+            'port': port_num,
+            'risk': risk,
+            'issue': issue,
+            'recommendation': 'Investigate the script output for details'
+        }
@@ -0,0 +1,112 @@
+from typing import Dict, List
+
+from shared.models.scan_result import HostInfo, PortInfo
+
+# Сервисы, открытый доступ к которым сам по себе повышает риск
+CRITICAL_SERVICES = {
+    'ssh', 'telnet', 'ftp', 'smtp', 'domain', 'http', 'https',
+    'microsoft-ds', 'netbios-ssn', 'rpcbind', 'nfs', 'mysql',
+    'postgresql', 'mongodb', 'redis', 'vnc', 'rdp', 'snmp'
+}
+
+# Подстроки версий с известными уязвимостями (быстрая эвристика фильтров)
+VULNERABLE_VERSION_INDICATORS = ['2.4.49', '2.4.50', 'vsftpd 2.3.4', '7.0', '7.1', '7.2']
+
+# Уязвимые версии по сервисам для отчетов: (версия, риск, описание)
+VULNERABLE_VERSIONS = {
+    "apache": [("2.4.49", "HIGH", "CVE-2021-41773 - Path Traversal"),
+               ("2.4.50", "HIGH", "CVE-2021-42013 - Path Traversal")],
+    "openssh": [("7.0", "MEDIUM", "Multiple vulnerabilities"),
+                ("7.1", "MEDIUM", "Multiple vulnerabilities"),
+                ("7.2", "MEDIUM", "Multiple vulnerabilities")],
+    "ftp": [("vsftpd 2.3.4", "HIGH", "Backdoor command execution")],
+    "samba": [("3.0.0", "HIGH", "Multiple vulnerabilities"),
+              ("3.0.1", "HIGH", "Multiple vulnerabilities")],
+    "tomcat": [("7.0.0", "MEDIUM", "Initial release - consider upgrading"),
+               ("8.0.0", "MEDIUM", "Initial release - consider upgrading")]
+}
+
+_VULNERABLE_SCRIPT_KEYWORDS = ['vulnerable', 'vulnerability']
+_HIGH_RISK_SCRIPT_KEYWORDS = ['exploit', 'cve', 'remote code', 'privilege escalation']
+
+def is_critical_service(port: PortInfo) -> bool:
+    """Определяет является ли сервис критическим"""
+    return port.service in CRITICAL_SERVICES
+
+def has_vulnerable_scripts(host: HostInfo) -> bool:
+    """Есть ли в выводах скриптов хоста признаки уязвимости"""
+    return any(keyword in output.lower() for output in host.scripts.values()
+               for keyword in _VULNERABLE_SCRIPT_KEYWORDS)
+
+def has_high_risk_scripts(host: HostInfo) -> bool:
+    """Есть ли в выводах скриптов хоста высокорисковые индикаторы"""
+    return any(keyword in output.lower() for output in host.scripts.values()
+               for keyword in _HIGH_RISK_SCRIPT_KEYWORDS)
+
+def has_vulnerable_version(port: PortInfo) -> bool:
+    """Совпадает ли версия сервиса с известной уязвимой"""
+    if not port.version:
+        return False
+    version_lower = port.version.lower()
+    return any(indicator in version_lower for indicator in VULNERABLE_VERSION_INDICATORS)
+
+def is_potentially_vulnerable(host: HostInfo, port: PortInfo) -> bool:
+    """Определяет потенциально уязвимый сервис"""
+    return has_vulnerable_version(port) or has_vulnerable_scripts(host)
+
+def assess_port_risk(port: PortInfo, vulnerable_scripts: bool, high_risk_scripts: bool) -> str:
+    """
+    Уровень риска сервиса. Признаки по скриптам относятся ко всему хосту,
+    поэтому считаются один раз на хост и передаются сюда готовыми.
+    """
+    if high_risk_scripts or vulnerable_scripts or has_vulnerable_version(port):
+        return "HIGH"
+    if is_critical_service(port):
+        return "MEDIUM"
+    return "LOW"
+
+def assess_risk_level(host: HostInfo, port: PortInfo) -> str:
+    """Оценивает уровень риска для сервиса"""
+    return assess_port_risk(port, has_vulnerable_scripts(host), has_high_risk_scripts(host))
+
+def find_potential_vulnerabilities(hosts: List[HostInfo]) -> List[Dict]:
+    """Находит потенциальные уязвимости по версиям сервисов и выводам скриптов (формат отчетов)"""
+    vulnerabilities = []
+
+    for host in hosts:
+        script_hits = [name for name, output in host.scripts.items()
+                       if any(keyword in output.lower() for keyword in _VULNERABLE_SCRIPT_KEYWORDS)]
+        for port in host.ports:
+            if port.state != "open" or not port.version:
+                continue
+            version_lower = port.version.lower()
+
+            # Проверяем версии сервисов
+            for service, vulnerable_list in VULNERABLE_VERSIONS.items():
+                if service in port.service.lower() or service in version_lower:
+                    for vulnerable_version, risk, issue in vulnerable_list:
+                        if vulnerable_version in port.version:
+                            vulnerabilities.append({
+                                "host": host.ip,
+                                "port": port.port,
+                                "service": port.service,
+                                "version": port.version,
+                                "risk": risk,
+                                "issue": issue,
+                                "recommendation": f"Update {service} to latest version"
+                            })
+                            break
+
+            # Проверяем скрипты nmap на индикаторы уязвимостей
+            for script_name in script_hits:
+                vulnerabilities.append({
+                    "host": host.ip,
+                    "port": port.port,
+                    "service": port.service,
+                    "version": port.version or "Unknown",
+                    "risk": "MEDIUM",
+                    "issue": f"Potential vulnerability detected by {script_name}",
+                    "recommendation": "Investigate the script output for details"
+                })
+
+    return vulnerabilities
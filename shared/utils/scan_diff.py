@@ -0,0 +1,117 @@
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, List, Optional, Tuple
+
+from ..models.scan_result import ScanResult, HostInfo, PortInfo
+
+class ChangeType(Enum):
+    """Типы изменений между двумя сканированиями"""
+    HOST_NEW = "host_new"
+    HOST_GONE = "host_gone"
+    PORT_OPENED = "port_opened"
+    PORT_CLOSED = "port_closed"
+    SERVICE_CHANGED = "service_changed"
+    OS_CHANGED = "os_changed"
+
+@dataclass
+class DiffEntry:
+    """Одно изменение: хост, порт (если применимо), старое и новое значение"""
+    change_type: ChangeType
+    ip: str
+    port: Optional[int] = None
+    protocol: str = ""
+    old_value: str = ""
+    new_value: str = ""
+
+@dataclass
+class ScanDiff:
+    """Результат сравнения двух сканирований"""
+    old_scan_id: str
+    new_scan_id: str
+    entries: List[DiffEntry] = field(default_factory=list)
+
+    def has_changes(self) -> bool:
+        return bool(self.entries)
+
+    def by_type(self, change_type: ChangeType) -> List[DiffEntry]:
+        """Возвращает изменения заданного типа"""
+        return [entry for entry in self.entries if entry.change_type == change_type]
+
+    def get_counts(self) -> Dict[str, int]:
+        """Возвращает количество изменений по типам"""
+        counts = {change_type.value: 0 for change_type in ChangeType}
+        for entry in self.entries:
+            counts[entry.change_type.value] += 1
+        return counts
+
+    def get_summary(self) -> str:
+        """Короткое текстовое описание изменений"""
+        counts = self.get_counts()
+        return (f"{counts['host_new']} new hosts, {counts['host_gone']} disappeared, "
+                f"{counts['port_opened']} ports opened, {counts['port_closed']} closed, "
+                f"{counts['service_changed']} service changes, {counts['os_changed']} OS changes")
+
+PortKey = Tuple[str, int]
+
+def _service_label(port: PortInfo) -> str:
+    return f"{port.service} {port.version}".strip()
+
+def _open_ports(host: HostInfo) -> Dict[PortKey, PortInfo]:
+    return {(port.protocol, port.port): port for port in host.ports if port.state == "open"}
+
+def _live_hosts(result: ScanResult) -> Dict[str, HostInfo]:
+    return {host.ip: host for host in result.hosts if host.state == "up"}
+
+def diff_scans(old: ScanResult, new: ScanResult) -> ScanDiff:
+    """
+    Сравнивает два результата сканирования.
+
+    Хосты сопоставляются по IP, порты - по (протокол, номер) через словари,
+    поэтому сложность линейна от размера сканирований.
+    """
+    diff = ScanDiff(old_scan_id=old.scan_id, new_scan_id=new.scan_id)
+
+    old_hosts = _live_hosts(old)
+    new_hosts = _live_hosts(new)
+
+    for ip in sorted(new_hosts.keys() - old_hosts.keys()):
+        host = new_hosts[ip]
+        diff.entries.append(DiffEntry(ChangeType.HOST_NEW, ip, new_value=host.hostname))
+        for (protocol, port_num), port in sorted(_open_ports(host).items()):
+            diff.entries.append(DiffEntry(ChangeType.PORT_OPENED, ip, port_num, protocol,
+                                          new_value=_service_label(port)))
+
+    for ip in sorted(old_hosts.keys() - new_hosts.keys()):
+        host = old_hosts[ip]
+        diff.entries.append(DiffEntry(ChangeType.HOST_GONE, ip, old_value=host.hostname))
+        for (protocol, port_num), port in sorted(_open_ports(host).items()):
+            diff.entries.append(DiffEntry(ChangeType.PORT_CLOSED, ip, port_num, protocol,
+                                          old_value=_service_label(port)))
+
+    for ip in sorted(old_hosts.keys() & new_hosts.keys()):
+        old_host = old_hosts[ip]
+        new_host = new_hosts[ip]
+
+        if old_host.os_family != new_host.os_family and new_host.os_family:
+            diff.entries.append(DiffEntry(ChangeType.OS_CHANGED, ip,
+                                          old_value=old_host.os_family, new_value=new_host.os_family))
+
+        old_ports = _open_ports(old_host)
+        new_ports = _open_ports(new_host)
+
+        for key in sorted(new_ports.keys() - old_ports.keys()):
+            diff.entries.append(DiffEntry(ChangeType.PORT_OPENED, ip, key[1], key[0],
+                                          new_value=_service_label(new_ports[key])))
+
+        for key in sorted(old_ports.keys() - new_ports.keys()):
+            diff.entries.append(DiffEntry(ChangeType.PORT_CLOSED, ip, key[1], key[0],
+                                          old_value=_service_label(old_ports[key])))
+
+        for key in sorted(old_ports.keys() & new_ports.keys()):
+            old_label = _service_label(old_ports[key])
+            new_label = _service_label(new_ports[key])
+            if old_label != new_label:
+                diff.entries.append(DiffEntry(ChangeType.SERVICE_CHANGED, ip, key[1], key[0],
+                                              old_value=old_label, new_value=new_label))
+
+    return diff
@@ -0,0 +1,77 @@
+import hashlib
+from typing import Dict, Optional
+
+def output_digest(output: str) -> str:
+    """Хэш вывода скрипта - ключ в хранилище"""
+    return hashlib.blake2b(output.encode('utf-8'), digest_size=16).hexdigest()
+
+class ScriptOutputStore:
+    """
+    Хранилище выводов NSE скриптов одного сканирования.
+
+    Каждый уникальный вывод хранится один раз, хосты и порты ссылаются
+    на один и тот же объект строки. Попутно считается статистика экономии памяти.
+    """
+
+    def __init__(self):
+        self._outputs: Dict[str, str] = {}
+        self.references = 0
+        self.referenced_bytes = 0
+        self.unique_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._outputs)
+
+    def intern(self, output: str) -> str:
+        """Возвращает каноничный экземпляр строки вывода"""
+        digest = output_digest(output)
+        size = len(output.encode('utf-8'))
+        self.references += 1
+        self.referenced_bytes += size
+
+        stored = self._outputs.get(digest)
+        if stored is None:
+            self._outputs[digest] = output
+            self.unique_bytes += size
+            return output
+        return stored
+
+    def adopt_host(self, host):
+        """
+        Переводит выводы скриптов хоста из другого хранилища в это
+        (используется при объединении результатов частей сканирования)
+        """
+        aliases = set()
+        for port in host.ports:
+            scripts = getattr(port, 'scripts', None)
+            if not scripts:
+                continue
+            port.scripts = {script_id: self.intern(output) for script_id, output in scripts.items()}
+            for script_id, output in port.scripts.items():
+                key = f"port{port.port}_{script_id}"
+                host.scripts[key] = output
+                aliases.add(key)
+
+        for key, output in host.scripts.items():
+            if key not in aliases:
+                host.scripts[key] = self.intern(output)
+
+    def get(self, digest: str) -> Optional[str]:
+        """Возвращает вывод по хэшу"""
+        return self._outputs.get(digest)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Статистика дедупликации"""
+        return {
+            'references': self.references,
+            'unique_outputs': len(self._outputs),
+            'referenced_bytes': self.referenced_bytes,
+            'unique_bytes': self.unique_bytes,
+            'saved_bytes': self.referenced_bytes - self.unique_bytes
+        }
+
+    def get_summary(self) -> str:
+        """Короткое текстовое описание экономии"""
+        stats = self.get_stats()
+        return (f"{stats['references']} script outputs, {stats['unique_outputs']} unique, "
+                f"{stats['saved_bytes'] / 1024:.1f} KB saved")
@@ -1,6 +1,8 @@
+import bisect
+import heapq
 import ipaddress
 import re
-from typing import List, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 def validate_ip(ip_str: str) -> bool:
     """
@@ -61,6 +63,16 @@ def validate_ip_range(range_str: str) -> bool:
     
     return False
 
+def validate_target(target: str) -> bool:
+    """
+    Валидирует одну цель: IP, сеть, домен, диапазон или исключение (!цель)
+    """
+    candidate = target[1:].strip() if target.startswith('!') else target
+    return (validate_ip(candidate) or 
+            validate_network(candidate) or 
+            validate_domain(candidate) or 
+            validate_ip_range(candidate))
+
 def parse_targets(targets_text: str) -> Tuple[List[str], List[str]]:
     """
     Парсит текст с целями и возвращает валидные и невалидные цели
@@ -76,50 +88,332 @@ def parse_targets(targets_text: str) -> Tuple[List[str], List[str]]:
         if not target:
             continue
             
-        # Проверяем разные форматы
-        if (validate_ip(target) or 
-            validate_network(target) or 
-            validate_domain(target) or 
-            validate_ip_range(target)):
+        if validate_target(target):
             valid_targets.append(target)
         else:
             invalid_targets.append(target)
     
     return valid_targets, invalid_targets
 
-def normalize_targets(targets: List[str]) -> List[str]:
+def _parse_address_range(target: str) -> Optional[Tuple[int, int, int]]:
     """
-    Нормализует список целей (удаляет дубликаты, сортирует)
+    Разбирает IP, CIDR или диапазон в (версия, начало, конец) включительно
     """
-    # Удаляем дубликаты
-    unique_targets = list(set(targets))
+    if validate_ip(target):
+        address = ipaddress.ip_address(target)
+        return address.version, int(address), int(address)
     
-    # Сортируем: сначала IP, потом сети, потом домены
-    ip_targets = []
-    network_targets = []
-    domain_targets = []
-    range_targets = []
+    if validate_network(target):
+        network = ipaddress.ip_network(target, strict=False)
+        return network.version, int(network.network_address), int(network.broadcast_address)
     
-    for target in unique_targets:
-        if validate_ip(target):
-            ip_targets.append(target)
-        elif validate_network(target):
-            network_targets.append(target)
-        elif validate_ip_range(target):
-            range_targets.append(target)
+    if validate_ip_range(target):
+        start_str, end_str = (part.strip() for part in target.split('-'))
+        start = ipaddress.ip_address(start_str)
+        if validate_ip(end_str):
+            end = ipaddress.ip_address(end_str)
+            if end.version != start.version:
+                return None
         else:
-            domain_targets.append(target)
+            # 10.0.0.1-254: меняется только последний октет
+            end_octet = int(end_str)
+            if end_octet > 255:
+                return None
+            end = ipaddress.ip_address(start.packed[:-1] + bytes([end_octet]))
+        return start.version, int(start), int(end)
+    
+    return None
+
+class TargetSet:
+    """
+    Множество целей в виде объединенных целочисленных интервалов.
+    
+    IP, сети и диапазоны хранятся как отсортированные непересекающиеся
+    интервалы отдельно для IPv4 и IPv6, домены - отдельным множеством.
+    Количество адресов и разбиение на части считаются без разворачивания адресов.
+    """
+    
+    def __init__(self):
+        self._ranges: Dict[int, List[Tuple[int, int]]] = {4: [], 6: []}
+        self.domains: set = set()
+    
+    @classmethod
+    def from_targets(cls, targets: Iterable[str], excludes: Iterable[str] = ()) -> 'TargetSet':
+        """
+        Строит множество из списка целей; цели с префиксом ! и excludes исключаются
+        """
+        target_set = cls()
+        excluded = list(excludes)
+        for target in targets:
+            target = target.strip()
+            if not target:
+                continue
+            if target.startswith('!'):
+                excluded.append(target[1:].strip())
+            else:
+                target_set.add(target)
+        
+        for target in excluded:
+            target_set.exclude(target)
+        return target_set
+    
+    def add(self, target: str) -> bool:
+        """Добавляет цель; возвращает False, если формат не распознан"""
+        parsed = _parse_address_range(target)
+        if parsed:
+            version, start, end = parsed
+            self._add_range(version, start, end)
+            return True
+        if validate_domain(target):
+            self.domains.add(target.lower())
+            return True
+        return False
+    
+    def exclude(self, target: str) -> bool:
+        """Исключает цель из множества"""
+        parsed = _parse_address_range(target)
+        if parsed:
+            version, start, end = parsed
+            self._remove_range(version, start, end)
+            return True
+        if validate_domain(target):
+            self.domains.discard(target.lower())
+            return True
+        return False
+    
+    def _add_range(self, version: int, start: int, end: int):
+        """Вставляет интервал, сливая его с пересекающимися и соседними"""
+        ranges = self._ranges[version]
+        index = bisect.bisect_left(ranges, (start, start))
+        
+        # Предыдущий интервал может пересекаться или примыкать
+        if index > 0 and ranges[index - 1][1] >= start - 1:
+            index -= 1
+            start = ranges[index][0]
+            end = max(end, ranges[index][1])
+        
+        last = index
+        while last < len(ranges) and ranges[last][0] <= end + 1:
+            end = max(end, ranges[last][1])
+            last += 1
+        
+        ranges[index:last] = [(start, end)]
+    
+    def _remove_range(self, version: int, start: int, end: int):
+        """Вырезает интервал из множества; пересекающиеся интервалы ищутся бинарным поиском"""
+        ranges = self._ranges[version]
+        index = bisect.bisect_left(ranges, (start, start))
+        # Предыдущий интервал может заходить в вырезаемый
+        if index > 0 and ranges[index - 1][1] >= start:
+            index -= 1
+        last = bisect.bisect_right(ranges, (end, float('inf')))
+        if index >= last:
+            return
+        
+        remaining = []
+        if ranges[index][0] < start:
+            remaining.append((ranges[index][0], start - 1))
+        if ranges[last - 1][1] > end:
+            remaining.append((end + 1, ranges[last - 1][1]))
+        ranges[index:last] = remaining
+    
+    def copy(self) -> 'TargetSet':
+        """Возвращает независимую копию"""
+        result = TargetSet()
+        result._ranges = {version: list(ranges) for version, ranges in self._ranges.items()}
+        result.domains = set(self.domains)
+        return result
+    
+    def update(self, other: 'TargetSet'):
+        """Добавляет в множество все цели other (объединение на месте)"""
+        self.domains |= other.domains
+        for version, ranges in other._ranges.items():
+            merged = []
+            for start, end in heapq.merge(self._ranges[version], ranges):
+                if merged and start <= merged[-1][1] + 1:
+                    if end > merged[-1][1]:
+                        merged[-1] = (merged[-1][0], end)
+                else:
+                    merged.append((start, end))
+            self._ranges[version] = merged
     
-    # Сортируем IP адреса
-    ip_targets.sort(key=lambda x: ipaddress.ip_address(x))
+    def difference(self, other: 'TargetSet') -> 'TargetSet':
+        """Цели этого множества, не входящие в other"""
+        result = TargetSet()
+        result.domains = self.domains - other.domains
+        for version, ranges in self._ranges.items():
+            cut = other._ranges[version]
+            remaining = []
+            index = 0
+            for start, end in ranges:
+                # Пропускаем вырезаемые интервалы, которые целиком левее текущего
+                while index < len(cut) and cut[index][1] < start:
+                    index += 1
+                position = index
+                while start <= end and position < len(cut) and cut[position][0] <= end:
+                    if cut[position][0] > start:
+                        remaining.append((start, cut[position][0] - 1))
+                    start = max(start, cut[position][1] + 1)
+                    position += 1
+                if start <= end:
+                    remaining.append((start, end))
+            result._ranges[version] = remaining
+        return result
     
-    # Сортируем сети
-    network_targets.sort(key=lambda x: ipaddress.ip_network(x, strict=False))
+    def intersection(self, other: 'TargetSet') -> 'TargetSet':
+        """Цели, входящие в оба множества"""
+        result = TargetSet()
+        result.domains = self.domains & other.domains
+        for version, ranges in self._ranges.items():
+            theirs = other._ranges[version]
+            common = []
+            i = j = 0
+            while i < len(ranges) and j < len(theirs):
+                start = max(ranges[i][0], theirs[j][0])
+                end = min(ranges[i][1], theirs[j][1])
+                if start <= end:
+                    common.append((start, end))
+                if ranges[i][1] < theirs[j][1]:
+                    i += 1
+                else:
+                    j += 1
+            result._ranges[version] = common
+        return result
+    
+    def range_count(self) -> int:
+        """Количество непересекающихся интервалов"""
+        return sum(len(ranges) for ranges in self._ranges.values())
+    
+    def address_count(self) -> int:
+        """Точное количество IP адресов"""
+        return sum(end - start + 1 for ranges in self._ranges.values() for start, end in ranges)
+    
+    def __len__(self) -> int:
+        return self.address_count() + len(self.domains)
+    
+    def __bool__(self) -> bool:
+        return bool(self.domains) or any(self._ranges.values())
+    
+    def __contains__(self, target: str) -> bool:
+        """Проверяет, входит ли цель (адрес, сеть, диапазон или домен) целиком"""
+        parsed = _parse_address_range(target)
+        if parsed is None:
+            return target.lower() in self.domains
+        
+        version, start, end = parsed
+        ranges = self._ranges[version]
+        index = bisect.bisect_right(ranges, (start, float('inf'))) - 1
+        return index >= 0 and ranges[index][0] <= start and end <= ranges[index][1]
+    
+    def overlaps(self, target: str) -> bool:
+        """Проверяет, пересекается ли цель с множеством хотя бы одним адресом"""
+        parsed = _parse_address_range(target)
+        if parsed is None:
+            return target.lower() in self.domains
+        
+        version, start, end = parsed
+        ranges = self._ranges[version]
+        # Первый интервал, который заканчивается не раньше начала цели
+        index = bisect.bisect_left(ranges, (start, start))
+        if index > 0 and ranges[index - 1][1] >= start:
+            index -= 1
+        return index < len(ranges) and ranges[index][0] <= end
+    
+    def issuperset(self, other: 'TargetSet') -> bool:
+        """Проверяет, что other целиком входит в это множество"""
+        if not other.domains <= self.domains:
+            return False
+        for version, ranges in other._ranges.items():
+            own = self._ranges[version]
+            for start, end in ranges:
+                index = bisect.bisect_right(own, (start, float('inf'))) - 1
+                if index < 0 or own[index][1] < end:
+                    return False
+        return True
     
-    # Сортируем диапазоны (простая сортировка)
-    range_targets.sort()
+    def iter_addresses(self) -> Iterator[str]:
+        """Лениво перебирает адреса"""
+        for version, ranges in self._ranges.items():
+            for start, end in ranges:
+                for value in range(start, end + 1):
+                    yield str(ipaddress.ip_address(value) if version == 4 else ipaddress.IPv6Address(value))
     
-    # Сортируем домены
-    domain_targets.sort()
+    def iter_chunks(self, chunk_size: int) -> Iterator['TargetSet']:
+        """
+        Разбивает множество на части не более chunk_size целей.
+        Интервалы режутся арифметически, адреса не разворачиваются.
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        
+        chunk = TargetSet()
+        free = chunk_size
+        for version, ranges in self._ranges.items():
+            for start, end in ranges:
+                while start <= end:
+                    take = min(free, end - start + 1)
+                    chunk._ranges[version].append((start, start + take - 1))
+                    start += take
+                    free -= take
+                    if free == 0:
+                        yield chunk
+                        chunk = TargetSet()
+                        free = chunk_size
+        
+        for domain in sorted(self.domains):
+            chunk.domains.add(domain)
+            free -= 1
+            if free == 0:
+                yield chunk
+                chunk = TargetSet()
+                free = chunk_size
+        
+        if chunk:
+            yield chunk
     
-    return ip_targets + network_targets + range_targets + domain_targets
+    def to_targets(self) -> List[str]:
+        """
+        Возвращает минимальный список целей для nmap: сети CIDR, затем домены
+        """
+        targets = []
+        for version, ranges in self._ranges.items():
+            address_cls = ipaddress.IPv4Address if version == 4 else ipaddress.IPv6Address
+            for start, end in ranges:
+                if start == end:
+                    targets.append(str(address_cls(start)))
+                    continue
+                for network in ipaddress.summarize_address_range(address_cls(start), address_cls(end)):
+                    targets.append(str(network) if network.num_addresses > 1 else str(network.network_address))
+        return targets + sorted(self.domains)
+
+def split_targets(targets: Iterable[str]) -> Tuple[TargetSet, List[str]]:
+    """
+    Разделяет цели на TargetSet (с учетом исключений !) и нераспознанный
+    синтаксис nmap, который передается как есть
+    """
+    target_set = TargetSet()
+    excluded = []
+    passthrough = []
+    for target in targets:
+        if target.startswith('!'):
+            excluded.append(target[1:].strip())
+        elif not target_set.add(target):
+            passthrough.append(target)
+    for target in excluded:
+        target_set.exclude(target)
+    return target_set, passthrough
+
+def normalize_targets(targets: List[str]) -> List[str]:
+    """
+    Нормализует список целей: объединяет пересекающиеся адреса, сети
+    и диапазоны, применяет исключения (!цель), удаляет дубликаты доменов
+    """
+    return TargetSet.from_targets(targets).to_targets()
+
+def targets_key(targets: Iterable[str]) -> str:
+    """
+    Ключ набора целей, не зависящий от порядка и записи: одинаковые
+    множества адресов дают одинаковый ключ
+    """
+    target_set, passthrough = split_targets(targets)
+    return " ".join(target_set.to_targets() + sorted(set(passthrough)))